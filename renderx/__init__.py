@@ -0,0 +1,23 @@
+# renderx — non-UI pipeline for RenderX Veo Gemini
+# - api: Gemini REST helpers (kickoff, poll, URI extraction, download)
+# - http: shared pooled keep-alive session used by api
+# - download: resumable, verified (.part + Content-Length) and range-parallel downloads
+# - engine: concurrent batch engine (many jobs in flight, polled together; priorities, cancel, preemption)
+# - poller: adaptive multiplexed poll scheduler with global 429 pause
+# - store: durable SQLite (WAL) job journal, reattach to pending operations
+# - keypool: multi-key pool, per-key kickoff token bucket / in-flight cap / 429 benching
+# - errors: failure classes, retry/backoff policy per class, circuit breaker for kickoffs
+# - prompts: indexed prompt store (paging, search, tags, bulk edits, streamed .txt/JSONL ingest)
+# - cache: content-addressed render cache (hash of the normalized request body)
+# - worker: headless engine thread/process draining the journal queue, fair per user
+# - cli: headless batch entry point (python -m renderx run …), JSONL events on stdout
+# - fileindex: incremental index of result files (size/mtime/sha256/prompt/MP4 metadata/poster) + sweeper
+# - mp4: minimal MP4 box reader (duration, resolution, codec, audio track)
+# - poster: cached poster per video (ffmpeg frame if available, else SVG placeholder)
+# - retention: byte / age quota on the output folder, LRU eviction (pinned kept), optional archive + sweeper
+# - export: streaming ZIP export (ZIP_STORED for media, ZIP64, flat memory)
+# - fileserver: signed-URL static server for MP4s (Range), so videos skip the websocket
+# - metrics: per-phase timings / error counters / gauges, Prometheus text + percentiles
+# - mockserver: offline Veo REST stand-in (render-time distributions, failures, 429s)
+# - bench: load benchmark over the mock (wall time, calls/job, peak RSS, p50/p95)
+# - logs: queue-backed logger (JSON lines tagged job/op/phase) + time-seeking search over rotated files
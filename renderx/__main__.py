@@ -0,0 +1,6 @@
+# python -m renderx run prompts.txt …  (see renderx/cli.py)
+import sys
+
+from .cli import main
+
+sys.exit(main())
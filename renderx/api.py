@@ -0,0 +1,123 @@
+# renderx/api.py
+# Gemini REST helpers for Veo long-running operations (API key only).
+# No Streamlit imports here: these run from worker threads and headless tools.
+# All calls go through the shared pooled session in renderx.http (keep-alive, GET retries).
+
+import os, time, json, logging
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from . import http, download
+
+# RENDERX_API_BASE points everything at another endpoint (e.g. renderx.mockserver)
+BASE_URL = os.environ.get("RENDERX_API_BASE", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+logger = logging.getLogger("veo_gemini_adv")
+
+def build_params(model: str, aspect_ratio: str, negative_prompt: str | None,
+                 person_generation: str | None, duration_seconds: int | None) -> dict:
+    params = {"aspectRatio": aspect_ratio}
+    if model.startswith("veo-2.") and duration_seconds:
+        params["durationSeconds"] = int(duration_seconds)
+    if negative_prompt:
+        params["negativePrompt"] = negative_prompt
+    if person_generation:
+        params["personGeneration"] = person_generation
+    return params
+
+def start_generation(api_key: str, model: str, prompt: str,
+                     aspect_ratio: str, negative_prompt: str | None,
+                     person_generation: str | None,
+                     duration_seconds: int | None) -> tuple[bool, str]:
+    url = f"{BASE_URL}/models/{model}:predictLongRunning"
+    headers = {"x-goog-api-key": api_key, "Content-Type": "application/json"}
+    params = build_params(model, aspect_ratio, negative_prompt, person_generation, duration_seconds)
+    body = {"instances": [{"prompt": prompt}], "parameters": params}
+
+    logger.info(f"Kickoff -> model={model} aspect={aspect_ratio} dur={params.get('durationSeconds','8')} prompt='{prompt[:80]}'")
+    resp = http.session().post(url, headers=headers, data=json.dumps(body), timeout=90)
+    if resp.status_code != 200:
+        logger.error(f"Kickoff FAIL {resp.status_code}: {resp.text}")
+        return False, f"{resp.status_code}: {resp.text}"
+    data = resp.json()
+    op_name = data.get("name")
+    if not op_name:
+        logger.error(f"Kickoff BAD RESPONSE: {data}")
+        return False, f"Bad response: {data}"
+    logger.info(f"Kickoff OK operation={op_name}")
+    return True, op_name
+
+def fetch_operation(api_key: str, operation_name: str) -> tuple[int, dict | str, dict]:
+    """Single GET of an operation: (HTTP status or 0 on exception, json or error text, headers)."""
+    url = f"{BASE_URL}/{operation_name}"
+    headers = {"x-goog-api-key": api_key}
+    try:
+        r = http.session().get(url, headers=headers, timeout=60)
+    except Exception as e:
+        logger.error(f"Poll EXCEPTION: {e}"); return 0, f"Exception: {e}", {}
+    if r.status_code != 200:
+        logger.error(f"Poll FAIL {r.status_code}: {r.text}"); return r.status_code, f"{r.status_code}: {r.text}", dict(r.headers)
+    return 200, r.json(), dict(r.headers)
+
+def cancel_operation(api_key: str, operation_name: str) -> tuple[bool, str]:
+    """Ask the server to stop a running operation (best effort; it may finish anyway)."""
+    url = f"{BASE_URL}/{operation_name}:cancel"
+    headers = {"x-goog-api-key": api_key, "Content-Type": "application/json"}
+    try:
+        r = http.session().post(url, headers=headers, data="{}", timeout=30)
+    except Exception as e:
+        logger.error(f"Cancel EXCEPTION: {e}"); return False, f"Exception: {e}"
+    if r.status_code != 200:
+        logger.error(f"Cancel FAIL {r.status_code}: {r.text}"); return False, f"{r.status_code}: {r.text}"
+    logger.info(f"Cancel OK operation={operation_name}")
+    return True, operation_name
+
+def get_operation(api_key: str, operation_name: str) -> tuple[bool, dict | str]:
+    """Single poll of an operation. Returns (True, json) or (False, error text)."""
+    code, data, _ = fetch_operation(api_key, operation_name)
+    return code == 200, data
+
+def poll_operation(api_key: str, operation_name: str, timeout: int = 900, every: int = 5,
+                   on_progress=None) -> tuple[bool, dict | str]:
+    """Blocking poll until done. `on_progress(pct, text)` is optional (UI progress bar etc.)."""
+    start = time.time()
+    report = on_progress or (lambda pct, text: None)
+    while True:
+        ok, j = get_operation(api_key, operation_name)
+        if not ok:
+            return False, j
+        if j.get("done"):
+            logger.info("Poll DONE"); report(100, "Selesai.")
+            return True, j
+        elapsed = time.time() - start
+        pct = min(int((elapsed / timeout) * 100), 99)
+        report(pct, f"Polling… ({pct}%)")
+        logger.debug(f"Poll running… elapsed={int(elapsed)}s")
+        if elapsed > timeout:
+            logger.error("Poll TIMEOUT"); return False, "Timeout polling operation."
+        time.sleep(every)
+
+# ---------- URI helpers ----------
+def _append_key(u: str, key: str) -> str:
+    parts = list(urlparse(u))
+    q = dict(parse_qsl(parts[4])); q["key"] = key
+    parts[4] = urlencode(q); return urlunparse(parts)
+
+def extract_video_uri(op_json: dict) -> str | None:
+    r = op_json.get("response", {}) or {}
+    try:
+        v = r["generatedVideos"][0]["video"]
+        uri = v.get("uri") or v.get("fileUri")
+        if uri: return uri
+    except Exception:
+        pass
+    try:
+        v = r["generateVideoResponse"]["generatedSamples"][0]["video"]
+        uri = v.get("uri") or v.get("fileUri")
+        if uri: return uri
+    except Exception:
+        pass
+    return None
+
+def download_video_by_uri(api_key: str, uri: str, out_path: str) -> tuple[bool, str]:
+    """Resumable, verified download (renderx.download); the key is appended but never logged."""
+    logger.info(f"Download -> {uri} -> {out_path}")
+    return download.fetch(_append_key(uri, api_key), out_path)
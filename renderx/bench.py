@@ -0,0 +1,149 @@
+# renderx/bench.py
+# Reproducible load benchmark against renderx.mockserver (no key, no cost).
+# Starts one mock server, then runs every batch size in a fresh subprocess (so peak RSS is per
+# size) through the real engine, journal, HTTP pool and downloader, and reports:
+#   wall time, jobs/s, OK/ERROR, API calls per job (kickoff / poll / download), peak RSS,
+#   p50/p95 of job wall time, kickoff latency and poll latency.
+# Render times come from the mock's distribution × --time-scale; the engine's poll intervals, key
+# quotas, retry backoff (renderx.errors.RETRY) and circuit-breaker window/cooldowns are scaled by the
+# same factor so the run behaves like production, only faster.
+#
+#   python -m renderx.bench                                  # 1, 10, 100, 1000 prompts
+#   python -m renderx.bench --sizes 10,100 --kickoff-429 0.05 --fail-rate 0.02 --out bench_output.txt
+
+import os, sys, json, time, shutil, logging, argparse, tempfile, resource, subprocess, urllib.request
+
+from .mockserver import MockVeo, MockConfig
+
+DEFAULT_MODEL = "veo-3.0-fast-generate-preview"
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+def _stats(base: str) -> dict:
+    with urllib.request.urlopen(base.rsplit("/v1beta", 1)[0] + "/_stats", timeout=10) as r:
+        return json.loads(r.read())
+
+def run_one(args) -> dict:
+    """One batch in this process against args.api_base; returns the result row."""
+    os.environ["RENDERX_API_BASE"] = args.api_base
+    from . import api, http, poller
+    from .engine import BatchEngine, Job, OK
+    from .errors import CircuitBreaker, RETRY
+    from .keypool import KeyPool, DEFAULTS as KEY_DEFAULTS
+    from .metrics import METRICS, percentile
+    from .store import JobStore
+    api.BASE_URL = args.api_base
+    s = args.time_scale
+    poller.EXPECTED_RENDER.update({k: v * s for k, v in poller.EXPECTED_RENDER.items()})
+    scheduler = poller.PollScheduler(min_interval=2.0 * s, max_interval=20.0 * s, near_interval=2.5 * s,
+                                     throttle_base=5.0 * s, throttle_max=120.0 * s, seed=args.seed)
+    keys = KeyPool(rate_per_min=args.key_rpm / s, burst=KEY_DEFAULTS["burst"], max_inflight=args.key_inflight,
+                   bench_base=KEY_DEFAULTS["bench_base"] * s, bench_max=KEY_DEFAULTS["bench_max"] * s)
+    retry = {cls: (n, base * s, cap * s) for cls, (n, base, cap) in RETRY.items()}
+    d = CircuitBreaker()  # production thresholds, scaled windows
+    breaker = CircuitBreaker(window=d.window * s, min_calls=d.min_calls, threshold=d.threshold,
+                             cooldown=d.base_cooldown * s, max_cooldown=d.max_cooldown * s)
+    http.configure(pool_maxsize=max(http.DEFAULTS["pool_maxsize"], 2 * args.concurrency))
+    out = tempfile.mkdtemp(prefix="renderx-bench-")
+    try:
+        params = dict(model=args.model, aspect_ratio="16:9", negative_prompt=None, person_generation=None,
+                      duration_seconds=None)
+        jobs = [Job(index=i, prompt=f"bench prompt {i} {args.seed}", params=params) for i in range(1, args.one + 1)]
+        api_keys = [f"bench-key-{i}" for i in range(args.keys)]
+        before = _stats(args.api_base)
+        t0 = time.time()
+        with BatchEngine(api_keys, out, concurrency=args.concurrency, timeout=900 * s, scheduler=scheduler,
+                         store=JobStore.in_folder(out), keys=keys, breaker=breaker, retry=retry) as engine:
+            engine.run(jobs)
+        wall = time.time() - t0
+        after = _stats(args.api_base)
+        calls = {k: after.get(k, 0) - before.get(k, 0) for k in ("kickoff", "poll", "download")}
+        ok = sum(j.status == OK for j in jobs)
+        def pct(name):  # one model per run → one series
+            r = next((r for r in METRICS.summary() if r["metric"] == name), None)
+            return (r["p50"], r["p95"]) if r else (0.0, 0.0)
+        job_s = sorted(j.elapsed for j in jobs)
+        return {"prompts": len(jobs), "wall_s": round(wall, 2), "jobs_per_s": round(len(jobs) / max(wall, 1e-6), 2),
+                "ok": ok, "error": len(jobs) - ok,
+                "calls_per_job": round(sum(calls.values()) / len(jobs), 2),
+                "kickoff_per_job": round(calls["kickoff"] / len(jobs), 2),
+                "poll_per_job": round(calls["poll"] / len(jobs), 2),
+                "download_per_job": round(calls["download"] / len(jobs), 2),
+                "peak_rss_mb": round(_peak_rss_mb(), 1),
+                "job_p50_s": round(percentile(job_s, 50), 3), "job_p95_s": round(percentile(job_s, 95), 3),
+                "kickoff_p50_ms": round(pct("renderx_kickoff_seconds")[0] * 1000, 1),
+                "kickoff_p95_ms": round(pct("renderx_kickoff_seconds")[1] * 1000, 1),
+                "poll_p50_ms": round(pct("renderx_poll_seconds")[0] * 1000, 1),
+                "poll_p95_ms": round(pct("renderx_poll_seconds")[1] * 1000, 1)}
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+COLUMNS = ("prompts", "wall_s", "jobs_per_s", "ok", "error", "calls_per_job", "kickoff_per_job", "poll_per_job",
+           "download_per_job", "peak_rss_mb", "job_p50_s", "job_p95_s", "kickoff_p50_ms", "kickoff_p95_ms",
+           "poll_p50_ms", "poll_p95_ms")
+
+def format_table(rows: list[dict]) -> str:
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in COLUMNS}
+    line = lambda vals: "  ".join(str(v).rjust(widths[c]) for c, v in zip(COLUMNS, vals))
+    return "\n".join([line(COLUMNS)] + [line([r.get(c, "") for c in COLUMNS]) for r in rows])
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m renderx.bench", description="RenderX load benchmark (mock API)")
+    ap.add_argument("--sizes", default="1,10,100,1000", help="comma-separated batch sizes")
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--keys", type=int, default=4, help="fake API keys in the pool")
+    ap.add_argument("--key-rpm", type=float, default=10.0, help="kickoffs per key per minute (before scaling)")
+    ap.add_argument("--key-inflight", type=int, default=10)
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--render", default="lognormal:45:0.3", help="mock render-time distribution (seconds)")
+    ap.add_argument("--time-scale", type=float, default=0.02, help="compress every wait by this factor")
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--kickoff-429", type=float, default=0.0)
+    ap.add_argument("--poll-429", type=float, default=0.0)
+    ap.add_argument("--video-kb", type=int, default=256)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", default=None, help="also write the report here (e.g. bench_output.txt)")
+    ap.add_argument("--json", action="store_true", help="print one JSON line per size instead of a table")
+    ap.add_argument("--one", type=int, default=0, help=argparse.SUPPRESS)  # child: run one size
+    ap.add_argument("--api-base", default="", help=argparse.SUPPRESS)
+    return ap
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.getLogger("veo_gemini_adv").setLevel(logging.ERROR)
+    if args.one:
+        print(json.dumps(run_one(args)), flush=True); return 0
+    try:
+        sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    except ValueError:
+        print("--sizes harus angka, mis. 1,10,100", file=sys.stderr); return 2
+    mock = MockVeo(MockConfig(render={"": args.render}, time_scale=args.time_scale, fail_rate=args.fail_rate,
+                              kickoff_429=args.kickoff_429, poll_429=args.poll_429,
+                              video_bytes=args.video_kb * 1024, seed=args.seed), port=0).start()
+    rows = []
+    try:
+        for n in sizes:
+            child = [sys.executable, "-m", "renderx.bench", "--one", str(n), "--api-base", mock.base_url]
+            for opt in ("concurrency", "keys", "key_rpm", "key_inflight", "model", "time_scale", "seed"):
+                child += [f"--{opt.replace('_', '-')}", str(getattr(args, opt))]
+            p = subprocess.run(child, capture_output=True, text=True)
+            if p.returncode != 0:
+                print(p.stderr, file=sys.stderr); return 1
+            row = json.loads(p.stdout.strip().splitlines()[-1]); rows.append(row)
+            if args.json: print(json.dumps(row), flush=True)
+            else: print(f"… {n} prompts: {row['wall_s']} s", file=sys.stderr, flush=True)
+    finally:
+        mock.stop()
+    header = (f"# renderx bench • model={args.model} render={args.render} scale={args.time_scale} "
+              f"concurrency={args.concurrency} keys={args.keys} fail={args.fail_rate} "
+              f"429={args.kickoff_429}/{args.poll_429} video={args.video_kb}KB seed={args.seed}")
+    report = header + "\n" + format_table(rows) + "\n"
+    if not args.json: print(report, end="")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f: f.write(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# renderx/cache.py
+# Content-addressed render cache: identical (model + normalized request body) → same MP4.
+# - key = sha256 of the canonical predictLongRunning body, so it changes whenever anything
+#   that reaches the API changes (prompt, aspect ratio, duration, negativePrompt, personGeneration)
+# - entries live in the job journal's SQLite file (table render_cache)
+# - eviction by age and total bytes, least-recently-used first; evicting only forgets the
+#   mapping, the MP4 itself stays a normal result (disk cleanup is not the cache's job)
+
+import os, json, time, hashlib, logging
+
+from . import api
+
+logger = logging.getLogger("veo_gemini_adv")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS render_cache (
+    key        TEXT PRIMARY KEY,
+    path       TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_render_cache_lru ON render_cache(last_used);
+"""
+
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3       # 20 GB of reusable output
+DEFAULT_MAX_AGE = 30 * 24 * 3600         # 30 days
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split())
+
+def cache_key(prompt: str, model: str, aspect_ratio: str = "16:9", negative_prompt: str | None = None,
+              person_generation: str | None = None, duration_seconds: int | None = None) -> str:
+    """Hash of the request exactly as start_generation would send it."""
+    params = api.build_params(model, aspect_ratio, negative_prompt and negative_prompt.strip(),
+                              person_generation, duration_seconds)
+    body = {"model": model, "instances": [{"prompt": normalize_prompt(prompt)}], "parameters": params}
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    def __init__(self, store, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        self.store = store  # JobStore: shares its SQLite file and per-thread connections
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        with self.store.conn() as c:
+            c.executescript(SCHEMA)
+
+    def get(self, key: str) -> str | None:
+        """Path of a cached MP4 for `key`, or None. Stale entries (file gone/changed) are dropped."""
+        c = self.store.conn()
+        r = c.execute("SELECT path, size, created_at FROM render_cache WHERE key=?", (key,)).fetchone()
+        if not r: return None
+        path, size, created = r["path"], r["size"], r["created_at"]
+        try:
+            fresh = os.path.getsize(path) == size and time.time() - created <= self.max_age
+        except OSError:
+            fresh = False
+        with c:
+            if not fresh:
+                c.execute("DELETE FROM render_cache WHERE key=?", (key,)); return None
+            c.execute("UPDATE render_cache SET last_used=?, hits=hits+1 WHERE key=?", (time.time(), key))
+        return path
+
+    def put(self, key: str, path: str):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        now = time.time()
+        with self.store.conn() as c:
+            c.execute("INSERT INTO render_cache (key, path, size, created_at, last_used) VALUES (?, ?, ?, ?, ?) "
+                      "ON CONFLICT(key) DO UPDATE SET path=excluded.path, size=excluded.size, "
+                      "created_at=excluded.created_at, last_used=excluded.last_used",
+                      (key, path, size, now, now))
+
+    def forget(self, paths):
+        """Drop entries pointing at files that were deleted or moved elsewhere."""
+        with self.store.conn() as c:
+            c.executemany("DELETE FROM render_cache WHERE path=?", [(p,) for p in paths])
+
+    def evict(self) -> int:
+        """Apply the age and size policy. Returns the number of entries dropped."""
+        c = self.store.conn()
+        with c:
+            dropped = c.execute("DELETE FROM render_cache WHERE created_at < ?",
+                                (time.time() - self.max_age,)).rowcount
+            total = c.execute("SELECT COALESCE(SUM(size), 0) FROM render_cache").fetchone()[0]
+            if total > self.max_bytes:
+                victims = []
+                for r in c.execute("SELECT key, size FROM render_cache ORDER BY last_used"):
+                    if total <= self.max_bytes: break
+                    victims.append((r["key"],)); total -= r["size"]
+                c.executemany("DELETE FROM render_cache WHERE key=?", victims)
+                dropped += len(victims)
+        if dropped:
+            logger.info(f"Render cache: evicted {dropped} entr{'y' if dropped == 1 else 'ies'}")
+        return dropped
+
+    def stats(self) -> dict:
+        r = self.store.conn().execute("SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS bytes, "
+                                      "COALESCE(SUM(hits), 0) AS hits FROM render_cache").fetchone()
+        return dict(r)
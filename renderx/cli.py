@@ -0,0 +1,236 @@
+# renderx/cli.py
+# Headless batch entry point: same kickoff → poll → extract → download pipeline as the app,
+# without Streamlit. Prompts come from a file or stdin, one per line or JSONL with per-prompt
+# params; status events stream to stdout as JSON lines, logs go to stderr (+ optional file).
+#
+#   python -m renderx run prompts.txt --model veo-2.0-generate-001 --duration 6 --concurrency 8
+#   cat prompts.jsonl | python -m renderx run - > events.jsonl
+#   python -m renderx export batch.zip --output ~/Downloads/VEO_OUTPUT      (streamed ZIP of results)
+#   python -m renderx resubmit --output ~/Downloads/VEO_OUTPUT [--batch ID] [--run]   (retry transient failures)
+#   python -m renderx retention --output ~/Downloads/VEO_OUTPUT --max-gb 200 --max-days 30 [--archive-dir /mnt/nas] [--dry-run]
+#
+# JSONL line: {"prompt": "...", "model": "...", "aspect_ratio": "9:16", "duration_seconds": 6,
+#              "negative_prompt": "...", "person_generation": "allow_adult", "force": true, "priority": "high"}
+# Exit codes: 0 all OK • 1 some job failed • 2 bad usage/input • 130 interrupted
+
+import os, sys, json, time, uuid, logging, argparse
+
+from .engine import BatchEngine, Job, FINAL, OK, PRIORITIES
+from .store import JobStore, DB_NAME
+from .cache import RenderCache
+from .fileindex import FileIndex
+from .retention import Retention, add_retention_args, retention_settings
+from .prompts import PARAM_ALIASES  # accepted spellings in JSONL input → start_generation kwarg
+from .keypool import KeyPool, split_keys, DEFAULTS as KEY_DEFAULTS
+from .logs import setup_logger
+from .metrics import METRICS
+from . import http, download, export
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_INTERRUPTED = 0, 1, 2, 130
+
+DEFAULT_MODEL = "veo-3.0-fast-generate-preview"
+def read_jobs(lines, defaults: dict, force: bool = False, priority: str = "normal") -> list[Job]:
+    """Parse prompt lines (plain text or JSON objects). Raises ValueError with the line number."""
+    jobs, batch_id = [], uuid.uuid4().hex
+    for n, raw in enumerate(lines, start=1):
+        line = raw.strip()
+        if not line: continue
+        params, job_force, job_priority = dict(defaults), force, priority
+        if line.startswith("{"):
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"baris {n}: JSON tidak valid ({e.msg})")
+            prompt = str(obj.get("prompt") or "").strip()
+            if not prompt:
+                raise ValueError(f"baris {n}: field 'prompt' kosong")
+            for k, v in obj.items():
+                if k in PARAM_ALIASES: params[PARAM_ALIASES[k]] = v
+            job_force = bool(obj.get("force", force))
+            job_priority = str(obj.get("priority", priority)).lower()
+            if job_priority not in PRIORITIES:
+                raise ValueError(f"baris {n}: priority harus salah satu dari {', '.join(PRIORITIES)}")
+        else:
+            prompt = line
+        if params.get("person_generation") in ("", "(default)"): params["person_generation"] = None
+        if not str(params["model"]).startswith("veo-2."): params["duration_seconds"] = None
+        jobs.append(Job(index=len(jobs) + 1, prompt=prompt, params=params, batch_id=batch_id, force=job_force,
+                        priority=PRIORITIES[job_priority]))
+    return jobs
+
+def job_event(job: Job) -> dict:
+    return {"event": "job", "ts": round(time.time(), 3), "index": job.index, "id": job.id,
+            "status": job.status, "operation": job.operation, "path": job.path, "cached": job.cached,
+            "polls": job.polls, "elapsed": round(job.elapsed, 1), "error": job.error, "error_class": job.error_class,
+            "prompt": job.prompt[:120]}
+
+def emit(obj: dict, out=None):
+    out = out or sys.stdout
+    out.write(json.dumps(obj, ensure_ascii=False) + "\n"); out.flush()
+
+def api_keys_of(args) -> list[str]:
+    keys = split_keys(args.api_key or os.environ.get("GEMINI_API_KEY", ""))
+    if not keys: print("API key kosong: pakai --api-key atau env GEMINI_API_KEY.", file=sys.stderr)
+    return keys
+
+def cmd_run(args) -> int:
+    api_keys = api_keys_of(args)
+    if not api_keys: return EXIT_USAGE
+    defaults = dict(model=args.model, aspect_ratio=args.aspect_ratio, negative_prompt=args.negative_prompt or None,
+                    person_generation=args.person_generation, duration_seconds=args.duration)
+    try:
+        if args.prompts == "-":
+            jobs = read_jobs(sys.stdin, defaults, force=args.force, priority=args.priority)
+        else:
+            with open(args.prompts, encoding="utf-8") as f:
+                jobs = read_jobs(f, defaults, force=args.force, priority=args.priority)
+    except (OSError, ValueError) as e:
+        print(f"Input tidak valid: {e}", file=sys.stderr); return EXIT_USAGE
+    if not jobs:
+        print("Tidak ada prompt.", file=sys.stderr); return EXIT_USAGE
+
+    os.makedirs(args.output, exist_ok=True)
+    store = setup(args)
+    t0 = time.time()
+    emit({"event": "start", "ts": round(t0, 3), "total": len(jobs), "concurrency": args.concurrency,
+          "batch_id": jobs[0].batch_id, "output": args.output})
+    return execute(args, api_keys, store, lambda owner: jobs, t0)
+
+def setup(args) -> JobStore:
+    log_file = args.log_file or (None if args.no_log_file else os.path.join(args.output, "veo_gemini_advanced.log"))
+    setup_logger(log_file, getattr(logging, args.log_level.upper(), logging.INFO), stream=sys.stderr)
+    http.configure(pool_maxsize=max(http.DEFAULTS["pool_maxsize"], 2 * args.concurrency))
+    download.configure(bandwidth=args.download_limit * 1024 ** 2)
+    return JobStore.in_folder(args.output)
+
+def execute(args, api_keys: list[str], store: JobStore, claim, t0: float) -> int:
+    """Drive the jobs `claim(engine owner)` returns to a final status with one engine, streaming
+    events; returns the exit code."""
+    cache = None if args.no_cache else RenderCache(store)
+    if cache: cache.evict()
+    last = {}; next_metrics = [0.0]
+    def on_update(job: Job):
+        if args.metrics_file and time.time() >= next_metrics[0]:
+            METRICS.write_textfile(args.metrics_file); next_metrics[0] = time.time() + 10
+        if last.get(job.id) == job.status: return  # one event per status change, not per poll
+        last[job.id] = job.status; emit(job_event(job))
+
+    keys = KeyPool(rate_per_min=args.key_rpm, max_inflight=args.key_inflight)
+    engine = BatchEngine(api_keys, args.output, concurrency=args.concurrency, timeout=args.timeout,
+                         on_update=on_update, store=store, cache=cache, keys=keys)
+    jobs = []
+    try:
+        jobs = claim(engine.owner)
+        engine.run(jobs)
+    except KeyboardInterrupt:
+        emit({"event": "interrupted", "ts": round(time.time(), 3),
+              "pending": sum(j.status not in FINAL for j in jobs)})
+        return EXIT_INTERRUPTED
+    finally:
+        engine.close()
+        if args.metrics_file: METRICS.write_textfile(args.metrics_file)
+    ok = sum(j.status == OK for j in jobs)
+    emit({"event": "summary", "ts": round(time.time(), 3), "total": len(jobs), "ok": ok,
+          "error": len(jobs) - ok, "cached": sum(j.cached for j in jobs), "wall_seconds": round(time.time() - t0, 1)})
+    return EXIT_OK if ok == len(jobs) else EXIT_FAILED
+
+def cmd_resubmit(args) -> int:
+    """Re-queue failed jobs with a retryable error class; with --run, render them here."""
+    api_keys = api_keys_of(args) if args.run else []
+    if args.run and not api_keys: return EXIT_USAGE
+    if not os.path.isfile(os.path.join(args.output, DB_NAME)):
+        print(f"Tidak ada journal job di {args.output}.", file=sys.stderr); return EXIT_USAGE
+    store = setup(args); t0 = time.time()
+    def claim(owner: str = "") -> list[Job]:
+        # without --run they stay unowned in the queue and a running app worker picks them up
+        jobs = store.resubmit(args.batch or None, owner=owner)
+        emit({"event": "resubmit", "ts": round(time.time(), 3), "total": len(jobs), "run": args.run,
+              "batches": sorted({j.batch_id for j in jobs})})
+        return jobs
+    if not args.run:
+        claim(); return EXIT_OK
+    return execute(args, api_keys, store, claim, t0)
+
+def add_engine_args(p: argparse.ArgumentParser):
+    p.add_argument("--api-key", default=None, help="one key or several, comma separated (default: env GEMINI_API_KEY)")
+    p.add_argument("--output", default=os.path.join(os.path.expanduser("~"), "Downloads", "VEO_OUTPUT"))
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--timeout", type=float, default=900, help="per job, seconds")
+    p.add_argument("--key-rpm", type=float, default=KEY_DEFAULTS["rate_per_min"], help="kickoffs per minute per key")
+    p.add_argument("--key-inflight", type=int, default=KEY_DEFAULTS["max_inflight"], help="running operations per key")
+    p.add_argument("--download-limit", type=float, default=0, help="MB/s shared by all downloads (0 = unlimited)")
+    p.add_argument("--no-cache", action="store_true", help="don't read or write the render cache")
+    p.add_argument("--metrics-file", default=None, help="write Prometheus text metrics here (every 10 s + at exit)")
+    p.add_argument("--log-level", default="INFO")
+    p.add_argument("--log-file", default=None)
+    p.add_argument("--no-log-file", action="store_true")
+
+def cmd_export(args) -> int:
+    store = JobStore.in_folder(args.output)
+    ok, res = export.write_zip(FileIndex(store).result_paths(), args.zip)  # files known missing are skipped
+    emit({"event": "export", "ts": round(time.time(), 3), "ok": ok, "path": res if ok else None,
+          "error": None if ok else res})
+    return EXIT_OK if ok else EXIT_FAILED
+
+def cmd_retention(args) -> int:
+    if not os.path.exists(os.path.join(args.output, DB_NAME)):
+        print(f"Tidak ada journal di {args.output}", file=sys.stderr); return EXIT_USAGE
+    setup_logger(None, getattr(logging, args.log_level.upper(), logging.INFO))
+    store = JobStore.in_folder(args.output)
+    index = FileIndex(store)
+    while index.sync(args.output): pass  # bring the index up to date first (new results, outside changes)
+    retention = Retention(index, cache=RenderCache(store), **retention_settings(args))
+    if not retention.active:
+        print("Tidak ada batas: set --max-gb dan/atau --max-days.", file=sys.stderr); return EXIT_USAGE
+    if args.dry_run:
+        for r in retention.plan():
+            emit({"event": "evict", "ts": round(time.time(), 3), "dry_run": True, "path": r["path"], "size": r["size"], "reason": r["reason"]})
+        res = {"n": None, "bytes": None}
+    else:
+        res = retention.sweep()
+    st = retention.stats()
+    emit({"event": "retention", "ts": round(time.time(), 3), "evicted": res["n"], "evicted_bytes": res["bytes"],
+          "used_bytes": st["bytes"], "max_bytes": st["max_bytes"], "pinned": st["pinned"]})
+    return EXIT_OK
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m renderx", description="RenderX Veo Gemini — headless batch")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="render a batch of prompts")
+    run.add_argument("prompts", help="file with prompts (1/baris atau JSONL), '-' untuk stdin")
+    add_engine_args(run)
+    run.add_argument("--model", default=DEFAULT_MODEL)
+    run.add_argument("--aspect-ratio", default="16:9", choices=["16:9", "9:16"])
+    run.add_argument("--duration", type=int, default=8, choices=[5, 6, 7, 8], help="Veo 2 only")
+    run.add_argument("--negative-prompt", default="")
+    run.add_argument("--person-generation", default=None, choices=["allow_all", "allow_adult", "dont_allow"])
+    run.add_argument("--force", action="store_true", help="ignore the render cache")
+    run.add_argument("--priority", default="normal", choices=list(PRIORITIES),
+                     help="kickoff order; high may also use one slot above --concurrency")
+    run.set_defaults(func=cmd_run)
+
+    rs = sub.add_parser("resubmit", help="re-queue failed jobs with a transient / rate-limit / unknown error")
+    add_engine_args(rs)
+    rs.add_argument("--batch", action="append", default=[], help="only this batch id (repeatable)")
+    rs.add_argument("--run", action="store_true", help="render them now instead of leaving them to the app's worker")
+    rs.set_defaults(func=cmd_resubmit)
+
+    exp = sub.add_parser("export", help="write all OK results to one ZIP (streamed, ZIP64)")
+    exp.add_argument("zip", help="target .zip path")
+    exp.add_argument("--output", default=os.path.join(os.path.expanduser("~"), "Downloads", "VEO_OUTPUT"))
+    exp.set_defaults(func=cmd_export)
+
+    ret = sub.add_parser("retention", help="evict least recently used results over the byte / age quota")
+    ret.add_argument("--output", default=os.path.join(os.path.expanduser("~"), "Downloads", "VEO_OUTPUT"))
+    add_retention_args(ret)
+    ret.add_argument("--dry-run", action="store_true", help="only list what the next pass would evict")
+    ret.add_argument("--log-level", default="INFO")
+    ret.set_defaults(func=cmd_retention)
+    return ap
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    # journal, cache and file index store paths under it: relative ones break the app / worker / file server
+    args.output = os.path.abspath(os.path.expanduser(args.output))
+    return args.func(args)
@@ -0,0 +1,231 @@
+# renderx/download.py
+# Robust MP4 downloads:
+# - write to "<out>.part", verify the byte count against Content-Length / Content-Range,
+#   then os.replace() into place, so a truncated file never appears under its final name
+# - dropped connections resume with "Range: bytes=<have>-" (also across runs: the .part stays)
+# - large files with Accept-Ranges are fetched as N parallel byte ranges; completed ranges are
+#   recorded in "<out>.part.json" so a failed parallel download resumes only the missing ranges
+# - every chunk passes through one global token-bucket limiter, so downloads can't starve polling
+
+import os, re, json, time, threading, logging
+
+from . import http
+
+logger = logging.getLogger("veo_gemini_adv")
+
+CHUNK = 1024 * 1024
+SETTINGS = {
+    "retries": 4,                        # reconnects per stream / range before giving up
+    "parallel_threshold": 32 * 1024 ** 2,  # files at least this big use parallel ranges
+    "parts": 4,
+    "timeout": 300,
+}
+
+class RateLimiter:
+    """Thread-safe token bucket in bytes/second; rate 0 = unlimited."""
+    def __init__(self, rate: float = 0, burst: float | None = None):
+        self._lock = threading.Lock()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: float, burst: float | None = None):
+        with self._lock:
+            self.rate = max(0.0, float(rate or 0))
+            self.burst = burst or max(self.rate, CHUNK)
+            self._tokens = self.burst; self._last = time.monotonic()
+
+    def consume(self, n: int):
+        while True:
+            with self._lock:
+                if not self.rate: return
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= n or self._tokens >= self.burst:
+                    self._tokens -= n; return  # may go negative for n > burst: later callers wait it off
+                wait = (n - self._tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+LIMITER = RateLimiter()
+
+def configure(bandwidth: float | None = None, **settings):
+    """bandwidth in bytes/second (0 = unlimited); other keys as in SETTINGS."""
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown download option(s): {', '.join(sorted(unknown))}")
+    SETTINGS.update({k: v for k, v in settings.items() if v is not None})
+    if bandwidth is not None and bandwidth != LIMITER.rate:
+        LIMITER.set_rate(bandwidth)
+
+class DownloadError(Exception):
+    pass
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+def _error_text(r) -> str:
+    ct = r.headers.get("content-type", "")
+    return r.text if "application/json" in ct or "text" in ct else f"HTTP {r.status_code}"
+
+def _total_from(r, offset: int) -> int | None:
+    if r.status_code == 206:
+        m = _CONTENT_RANGE.match(r.headers.get("Content-Range", ""))
+        if not m or int(m.group(1)) != offset:
+            raise DownloadError(f"Content-Range tidak cocok: {r.headers.get('Content-Range')!r} (offset {offset})")
+        return int(m.group(3)) if m.group(3) != "*" else None
+    cl = r.headers.get("Content-Length")
+    return int(cl) if cl and cl.isdigit() else None
+
+def _copy(r, f) -> int:
+    """Stream the body into f (already positioned). Returns bytes written."""
+    n = 0
+    for chunk in r.iter_content(chunk_size=CHUNK):
+        if not chunk: continue
+        LIMITER.consume(len(chunk))
+        f.write(chunk); n += len(chunk)
+    return n
+
+# ---------- single stream (resumable) ----------
+def _open(url: str, have: int = 0):
+    headers = {"Range": f"bytes={have}-"} if have else {}
+    return http.session().get(url, headers=headers, stream=True, allow_redirects=True, timeout=SETTINGS["timeout"])
+
+def _fetch_stream(url: str, part: str, first=None) -> tuple[int | None, int]:
+    """Download/resume url into part (`first` = already-open response for a fresh start).
+    Returns (expected total or None, bytes on disk)."""
+    total = None
+    for attempt in range(SETTINGS["retries"] + 1):
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+        try:
+            r = first if first is not None else _open(url, have)
+            first = None
+            with r:
+                if r.status_code == 416 and have:
+                    m = re.match(r"bytes \*/(\d+)", r.headers.get("Content-Range", ""))
+                    if m and int(m.group(1)) == have: return have, have  # .part was already complete
+                    os.remove(part); continue  # stale .part from another file: start over
+                if r.status_code not in (200, 206):
+                    raise DownloadError(_error_text(r))
+                ct = r.headers.get("content-type", "")
+                if "video" not in ct and "octet-stream" not in ct:
+                    logger.warning(f"Unexpected content-type during download: {ct}")
+                if r.status_code == 200:  # no range support (or fresh start): rewrite from 0
+                    have = 0
+                total = _total_from(r, have)
+                if have: logger.info(f"Download resume at {have} bytes")
+                with open(part, "r+b" if have else "wb") as f:
+                    f.seek(have); f.truncate()
+                    have += _copy(r, f)
+            if total is None or have >= total:
+                return total, have
+            logger.warning(f"Download short read {have}/{total}, retrying with Range")
+        except DownloadError:
+            raise
+        except Exception as e:
+            if attempt >= SETTINGS["retries"]: raise
+            logger.warning(f"Download interrupted ({e}); resume attempt {attempt + 1}")
+            time.sleep(min(2 ** attempt, 10))
+    return total, os.path.getsize(part) if os.path.exists(part) else 0
+
+# ---------- parallel ranges ----------
+def _read_state(part: str) -> dict | None:
+    state_path = part + ".json"
+    if not (os.path.exists(state_path) and os.path.exists(part)): return None
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            st = json.load(f)
+        return {"total": int(st["total"]), "ranges": [tuple(x) for x in st["ranges"]]}
+    except Exception:
+        return None
+
+def _fetch_range(url: str, part: str, start: int, end: int, progress: list, slot: int):
+    """Fill [start, end] (inclusive) of part; progress[slot] = next offset to fetch."""
+    pos = progress[slot]
+    for attempt in range(SETTINGS["retries"] + 1):
+        if pos > end: return
+        try:
+            with http.session().get(url, headers={"Range": f"bytes={pos}-{end}"}, stream=True,
+                                    allow_redirects=True, timeout=SETTINGS["timeout"]) as r:
+                if r.status_code != 206:
+                    raise DownloadError(f"Range tidak didukung: {_error_text(r)}")
+                _total_from(r, pos)
+                with open(part, "r+b") as f:
+                    f.seek(pos)
+                    for chunk in r.iter_content(chunk_size=CHUNK):
+                        if not chunk: continue
+                        chunk = chunk[:end - pos + 1]
+                        LIMITER.consume(len(chunk))
+                        f.write(chunk); pos += len(chunk)
+                        progress[slot] = pos  # kept per chunk so a failure resumes mid-range
+                        if pos > end: break
+        except DownloadError:
+            raise
+        except Exception as e:
+            if attempt >= SETTINGS["retries"]: raise
+            logger.warning(f"Range {start}-{end} interrupted at {pos} ({e}); retry {attempt + 1}")
+            time.sleep(min(2 ** attempt, 10))
+    if pos <= end:
+        raise DownloadError(f"Range {start}-{end} tidak lengkap ({pos - start}/{end - start + 1} bytes)")
+
+def _fetch_parallel(url: str, part: str, total: int, ranges=None) -> int:
+    """ranges = [(start, end, next offset)] from a saved state, or None for a fresh split."""
+    state_path = part + ".json"
+    if ranges is None:
+        size = -(-total // SETTINGS["parts"])
+        ranges = [(a, min(a + size, total) - 1, a) for a in range(0, total, size)]
+        with open(part, "wb") as f:
+            f.truncate(total)
+    else:
+        logger.info(f"Download resume: {sum(e - n + 1 for _, e, n in ranges if n <= e)} bytes left in ranges")
+
+    progress = [n for _, _, n in ranges]
+    errors = []
+    def run(i, a, b):
+        try:
+            _fetch_range(url, part, a, b, progress, i)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(i, a, b), name=f"veo-range-{i}", daemon=True)
+               for i, (a, b, n) in enumerate(ranges) if n <= b]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    if errors:
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"total": total, "ranges": [(a, b, progress[i]) for i, (a, b, _) in enumerate(ranges)]}, f)
+        raise errors[0]
+    if os.path.exists(state_path): os.remove(state_path)
+    return total
+
+# ---------- entry point ----------
+def fetch(url: str, out_path: str) -> tuple[bool, str]:
+    """Download url to out_path via a verified .part file. Returns (ok, out_path or error)."""
+    part = out_path + ".part"
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    t0 = time.time()
+    try:
+        state = _read_state(part)
+        if state:  # an interrupted parallel download: fetch only the missing ranges
+            total = state["total"]; _fetch_parallel(url, part, total, state["ranges"])
+        elif not os.path.exists(part) and SETTINGS["parts"] > 1:
+            # one request decides: big + Accept-Ranges → parallel ranges, else keep streaming it
+            r = _open(url)
+            size = _total_from(r, 0) if r.status_code == 200 else None
+            if (size and size >= SETTINGS["parallel_threshold"]
+                    and r.headers.get("Accept-Ranges", "").lower() == "bytes"):
+                r.close()
+                total = size; _fetch_parallel(url, part, size)
+            else:
+                total, _ = _fetch_stream(url, part, first=r)
+        else:
+            total, _ = _fetch_stream(url, part)
+        on_disk = os.path.getsize(part)
+        if total is not None and on_disk != total:
+            raise DownloadError(f"Ukuran tidak cocok: {on_disk} dari {total} bytes (.part disimpan untuk resume)")
+        if total is None:
+            logger.warning("Download without Content-Length: size not verifiable")
+        os.replace(part, out_path)
+        dt = max(time.time() - t0, 1e-6)
+        logger.info(f"Download OK {on_disk} bytes in {dt:.1f}s ({on_disk / dt / 1024 ** 2:.1f} MB/s)")
+        return True, out_path
+    except DownloadError as e:
+        logger.error(f"Download FAIL: {e}"); return False, str(e)
+    except Exception as e:
+        logger.exception(f"Download EXCEPTION: {e}"); return False, str(e)
@@ -0,0 +1,556 @@
+# renderx/engine.py
+# Concurrent batch engine: keeps up to `concurrency` Veo jobs in flight,
+# polls all outstanding operations through one shared PollScheduler
+# (adaptive per-job intervals, global 429 pause) and downloads results as they finish.
+# Network calls run in a thread pool; state changes and callbacks happen on the
+# thread that drives the engine (run/step), so UI callbacks stay single-threaded.
+# Identical requests (same cache key) are rendered once: a render-cache hit finishes
+# immediately, and duplicates inside the batch wait for the first one and share its file.
+# Kickoffs go through a KeyPool (per-key rate/in-flight limits, 429 benching); once a job
+# has an operation, its polls and download stay on the key that created it (Job.key_id).
+# Failures are classified (renderx.errors): transient ones are retried with backoff (kickoff,
+# re-render or download resume), and a circuit breaker holds new kickoffs while the API's error
+# rate spikes. Final errors keep their class, so "resubmit failed" only re-queues retryable ones.
+# Jobs carry a priority: pending kickoffs are ordered by it, HIGH jobs may use `reserve` slots on
+# top of `concurrency`, and preempt() hands not-yet-started lower-priority jobs back to the caller.
+# cancel() stops a job in any phase; a running operation is cancelled on the server as well.
+# Per-phase timings, error counts and in-flight gauges go to renderx.metrics.
+# Log lines are tagged with job id / operation / phase (renderx.logs), including the ones api
+# and download write from pool threads.
+
+import os, time, uuid, heapq, socket, logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from . import api
+from .cache import cache_key
+from .logs import tags, context as log_context
+from .errors import (CircuitBreaker, classify, classify_operation, was_cancelled, maybe_accepted, backoff, RETRY,
+                     POLL_FAILURES, BREAKER_FAILURES, TRANSIENT, RATE_LIMIT, MODEL, UNKNOWN)
+from .keypool import KeyPool
+from .metrics import METRICS, http_status
+from .poller import PollScheduler, parse_retry_after
+
+logger = logging.getLogger("veo_gemini_adv")
+
+# Job lifecycle
+QUEUED, STARTING, RUNNING, DOWNLOADING, OK, ERROR = "QUEUED", "STARTING", "RUNNING", "DOWNLOADING", "OK", "ERROR"
+CANCELLED = "CANCELLED"
+FINAL = (OK, ERROR, CANCELLED)
+
+# Job.priority: interactive previews (HIGH) jump ahead of bulk backfill (LOW)
+LOW, NORMAL, HIGH = 0, 1, 2
+PRIORITIES = {"low": LOW, "normal": NORMAL, "high": HIGH}
+
+# owner tokens of engines alive in this process (see JobStore.orphans)
+LIVE_OWNERS: set[str] = set()
+
+@dataclass
+class Job:
+    index: int
+    prompt: str
+    params: dict  # kwargs for api.start_generation (model, aspect_ratio, ...)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    operation: str = ""
+    uri: str = ""
+    path: str = ""
+    fname: str = ""
+    error: str = ""
+    polls: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    batch_id: str = ""
+    created_at: float = field(default_factory=time.time)
+    cache_key: str = ""
+    force: bool = False   # skip the render cache (still deduped within the batch)
+    cached: bool = False  # result reused from the cache or from an identical job
+    owner: str = ""       # engine driving the job (see JobStore.orphans)
+    user: str = ""        # who queued it (fair scheduling in renderx.worker)
+    pool: str = ""        # key pool it may start on (see renderx.keypool)
+    key_id: str = ""      # fingerprint of the key that created its operation; the key itself is never stored
+    prompt_id: str = ""   # renderx.prompts entry it was built from (status shown in the prompt manager)
+    attempts: int = 0     # automatic retries used (BatchEngine.retry, renderx.errors.RETRY by default)
+    error_class: str = "" # renderx.errors class of a final ERROR
+    priority: int = NORMAL
+
+    @property
+    def elapsed(self) -> float:
+        if not self.started_at: return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_result(self) -> dict:
+        """Shape used by st.session_state.results in the UI."""
+        return {"id": self.id, "index": self.index, "status": self.status,
+                "path": self.path, "fname": self.fname, "prompt": self.prompt,
+                "auto_done": self.status != OK}
+
+class BatchEngine:
+    MAX_REQUEUES = 20  # kickoffs bounced by quota before a job gives up
+
+    def __init__(self, api_key, output_folder: str, concurrency: int = 4,
+                 timeout: float = 900, on_update=None, scheduler: PollScheduler | None = None,
+                 store=None, cache=None, keys: KeyPool | None = None, breaker: CircuitBreaker | None = None,
+                 reserve: int = 1, retry: dict | None = None):
+        self.keys = keys if keys is not None else KeyPool()  # shared with renderx.worker
+        self.default_pool = self.keys.add(api_key) if api_key else ""  # str or list of keys
+        self.output_folder = output_folder
+        self.concurrency = max(1, int(concurrency))
+        self.reserve = max(0, int(reserve))  # extra slots only HIGH priority jobs may use
+        self.timeout = timeout
+        self.scheduler = scheduler if scheduler is not None else PollScheduler()  # empty scheduler is falsy (__len__)
+        self.on_update = on_update or (lambda job: None)
+        self.store = store  # optional JobStore: every state change is journaled
+        self.cache = cache  # optional RenderCache: reuse MP4s of identical past requests
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.retry = RETRY if retry is None else retry  # class -> (retries, first delay, max delay)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        LIVE_OWNERS.add(self.owner)
+        self._pending: deque[Job] = deque()
+        self._inflight: dict[str, Job] = {}
+        self._futures = {}  # future -> (job, phase, submitted at)
+        self._busy: set[str] = set()  # job ids with a network call outstanding
+        self._leaders: dict[str, Job] = {}  # cache key -> job actually rendering it
+        self._followers: dict[str, list[Job]] = {}  # leader id -> identical jobs waiting on it
+        self._holding: dict[str, str] = {}  # job id -> key id with an operation slot taken
+        self._requeues: dict[str, int] = {}
+        self._op_started: dict[str, float] = {}  # job id -> kickoff accepted (render time metric)
+        self._delayed: list = []  # heap of (due, seq, job, phase): retries waiting out their backoff
+        self._seq = 0
+        self._poll_failures: dict[str, int] = {}  # job id -> consecutive failed polls
+        self._probe: str | None = None  # job id of the kickoff probing a half-open breaker
+        self._cancelling: set[str] = set()  # cancelled while a call was outstanding
+        # threads start lazily; at most one call per in-flight job, so `concurrency` may grow later
+        self._pool = ThreadPoolExecutor(max_workers=max(self.concurrency, 32), thread_name_prefix="veo-job")
+
+    # ---------- public ----------
+    def submit(self, job: Job) -> Job:
+        job.cache_key = job.cache_key or cache_key(job.prompt, **job.params)
+        job.owner = self.owner; job.pool = job.pool or self.default_pool
+        self._enqueue(job); self._notify(job)
+        return job
+
+    def attach(self, job: Job) -> Job:
+        """Resume a journaled job: poll its existing operation instead of kicking off again."""
+        job.owner = self.owner
+        if not job.operation:
+            if job.status == STARTING:  # kickoff may have gone through; re-sending could bill twice
+                self._inflight[job.id] = job
+                self._finish(job, ERROR, "Terputus saat kickoff (operation tidak tercatat).", TRANSIENT)
+                return job
+            job.status = QUEUED
+            return self.submit(job)
+        job.status = RUNNING
+        job.cache_key = job.cache_key or cache_key(job.prompt, **job.params)
+        self._leaders.setdefault(job.cache_key, job)
+        self._inflight[job.id] = job
+        self.keys.hold(job.key_id); self._holding[job.id] = job.key_id
+        self.scheduler.add(job.id, job.params.get("model"), started_at=job.started_at or time.time())
+        logger.info(f"=== JOB {job.index} REATTACH operation={job.operation} ===", extra=tags(job, "poll"))
+        self._notify(job)
+        return job
+
+    def cancel(self, job_id: str) -> Job | None:
+        """Stop a job wherever it is; a running operation is also cancelled on the server. The job ends
+        CANCELLED (right away, or once its outstanding call returns). None if this engine doesn't have it."""
+        job = self._take(job_id)
+        if job:
+            self._inflight[job.id] = job
+            self._finish(job, CANCELLED, "Dibatalkan.")
+            return job
+        job = self._inflight.get(job_id)
+        if not job: return None
+        logger.info(f"=== JOB {job.index} CANCEL ===", extra=tags(job, "cancel"))
+        if job.id in self._busy:
+            self._cancelling.add(job.id)  # handled when the kickoff / poll / download returns
+        else:
+            self._abort(job)
+        return job
+
+    def withdraw(self, job_id: str) -> Job | None:
+        """Take back a job that hasn't kicked off yet (pause, preemption); the caller re-queues it."""
+        job = self._take(job_id)
+        if job:
+            self._requeues.pop(job.id, None); job.status = QUEUED; job.started_at = 0.0
+        return job
+
+    def preempt(self, priority: int, n: int = 1) -> list[Job]:
+        """Withdraw up to `n` not-yet-started jobs below `priority` (lowest first) to make room."""
+        waiting = list(self._pending) + [j for *_, j, phase in self._delayed if phase == "kickoff"]
+        waiting += [f for fs in self._followers.values() for f in fs]
+        victims = sorted((j for j in waiting if j.priority < priority), key=lambda j: (j.priority, -j.created_at))
+        out = [self.withdraw(j.id) for j in victims[:n]]
+        for job in out:
+            logger.info(f"=== JOB {job.index} PREEMPTED (priority {job.priority} < {priority}) ===",
+                        extra=tags(job, "kickoff"))
+        return out
+
+    def slots(self, priority: int = NORMAL) -> int:
+        """Jobs of `priority` that can be taken on now."""
+        waiting = sum(1 for *_, phase in self._delayed if phase == "kickoff")  # not in _inflight meanwhile
+        return max(0, self._cap(priority) - len(self._inflight) - len(self._pending) - waiting)
+
+    @property
+    def free_slots(self) -> int:
+        return self.slots()
+
+    @property
+    def idle(self) -> bool:
+        return not self._pending and not self._inflight and not self._followers and not self._delayed
+
+    def run(self, jobs) -> list[Job]:
+        jobs = [(self.attach if j.operation else self.submit)(j) for j in jobs]  # resubmitted jobs keep theirs
+        while not self.idle:
+            self.step()
+        return jobs
+
+    def step(self, max_wait: float = 1.0):
+        """One scheduling round: fill free slots, poll due jobs, then wait for any call to finish."""
+        deferred, blocked = [], {}  # blocked: pool -> earliest time one of its keys frees up
+        self._release_delayed(time.time())
+        while (self._pending and len(self._inflight) < self._cap(self._pending[0].priority)
+               and not self.scheduler.paused and not self.breaker.blocked()):
+            job = self._pending.popleft()
+            if job.pool in blocked:
+                deferred.append(job); continue
+            job.started_at = time.time()
+            if self._reuse(job): continue
+            model = job.params.get("model")
+            kid = self.keys.acquire(job.pool, model)
+            if kid is None:
+                if not self.keys.can_serve(job.pool, model):
+                    self._inflight[job.id] = job
+                    self._finish(job, ERROR, f"Tidak ada API key di pool yang boleh memakai model {model}.", MODEL)
+                    continue
+                blocked[job.pool] = self.keys.next_ready(job.pool, model)
+                deferred.append(job); continue
+            job.key_id = kid; self._holding[job.id] = kid
+            if job.id not in self._requeues:
+                METRICS.observe("renderx_queue_wait_seconds", max(0.0, time.time() - job.created_at), model=model)
+            job.status = STARTING
+            self._leaders[job.cache_key] = job
+            self._inflight[job.id] = job
+            logger.info(f"=== JOB {job.index} START ===", extra=tags(job, "kickoff"))
+            if self.breaker.begin(): self._probe = job.id
+            self._call(job, "kickoff", self._kickoff, job)
+            self._notify(job)
+        self._pending.extendleft(reversed(deferred))
+
+        now = time.time()
+        for key in self.scheduler.due(now):
+            job = self._inflight.get(key)
+            if not job or job.id in self._busy: continue
+            self._call(job, "poll", api.fetch_operation, self._key(job), job.operation)
+
+        wake = self.scheduler.next_wakeup()
+        timeout = max_wait if wake is None else max(0.0, min(max_wait, wake - time.time()))
+        if self.scheduler.paused and self._pending:
+            timeout = max(0.0, min(max_wait, self.scheduler.paused_until - time.time()))
+        ready = [t for t in blocked.values() if t is not None]
+        if self._pending and self.breaker.retry_at: ready.append(self.breaker.retry_at)
+        if self._delayed: ready.append(self._delayed[0][0])
+        if ready and len(self._inflight) < self._cap(HIGH):  # waiting on key quota / backoff, not on the API
+            timeout = max(0.0, min(timeout, min(ready) - time.time()))
+        if not self._futures:
+            if self._inflight or self._pending or self._delayed:  # only waiting for a poll / pause / retry
+                time.sleep(timeout)
+            return
+        done, _ = wait(list(self._futures), timeout=timeout, return_when=FIRST_COMPLETED)
+        for fut in done:
+            job, phase, t0 = self._futures.pop(fut)
+            self._busy.discard(job.id)
+            try:
+                result = fut.result()
+            except Exception as e:
+                logger.exception(f"Job {job.index} {phase} EXCEPTION: {e}", extra=tags(job, phase))
+                result = (0, f"Exception: {e}", {}) if phase == "poll" else (False, str(e))
+            self._measure(job, phase, result, time.time() - t0)
+            self._advance(job, phase, result)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        LIVE_OWNERS.discard(self.owner)
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    # ---------- internals ----------
+    def _cap(self, priority: int) -> int:
+        return self.concurrency + (self.reserve if priority >= HIGH else 0)
+
+    def _enqueue(self, job: Job):
+        """Append behind every pending job of the same or higher priority."""
+        i = len(self._pending)
+        while i and self._pending[i - 1].priority < job.priority: i -= 1
+        self._pending.insert(i, job)
+
+    def _take(self, job_id: str) -> Job | None:
+        """Remove a job that isn't running from the pending line, the retry heap or a leader's waiters."""
+        for job in self._pending:
+            if job.id == job_id:
+                self._pending.remove(job); break
+        else:
+            hit = next((d for d in self._delayed if d[2].id == job_id and d[3] == "kickoff"), None)
+            if hit:
+                self._delayed.remove(hit); heapq.heapify(self._delayed); job = hit[2]
+            else:
+                job = next((f for fs in self._followers.values() for f in fs if f.id == job_id), None)
+                if not job: return None
+                for lid, fs in list(self._followers.items()):
+                    if job in fs:
+                        fs.remove(job)
+                        if not fs: del self._followers[lid]
+                return job
+        self._hand_over(job)  # a requeued leader: its duplicates must not wait on it any more
+        return job
+
+    def _hand_over(self, job: Job):
+        if self._leaders.get(job.cache_key) is job: del self._leaders[job.cache_key]
+        for f in self._followers.pop(job.id, []):
+            self._enqueue(f)  # the first one to kick off becomes the new leader
+
+    def _abort(self, job: Job, phase: str = ""):
+        """Cancel an in-flight job with no call outstanding (or whose call just returned)."""
+        self._cancelling.discard(job.id); self._hand_over(job)
+        if any(d[2] is job for d in self._delayed):  # a download waiting out its retry backoff
+            self._delayed = [d for d in self._delayed if d[2] is not job]; heapq.heapify(self._delayed)
+        if phase == "download" or job.status == DOWNLOADING:  # rendered already; drop what was written
+            for p in (job.path, job.path + ".part"):
+                if p and os.path.exists(p):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+            job.path = job.fname = ""
+        elif job.operation and phase != "cancel":
+            self.scheduler.remove(job.id)
+            return self._call(job, "cancel", api.cancel_operation, self._key(job), job.operation)
+        self._finish(job, CANCELLED, "Dibatalkan.")
+
+    def _call(self, job: Job, phase: str, fn, *args):
+        self._busy.add(job.id)
+        fut = self._pool.submit(self._tagged, job.id, job.operation, phase, fn, *args)
+        self._futures[fut] = (job, phase, time.time())
+
+    @staticmethod
+    def _tagged(job_id: str, operation: str, phase: str, fn, *args):
+        with log_context(job=job_id, op=operation, phase=phase):  # api/download log lines carry the job
+            return fn(*args)
+
+    def _reuse(self, job: Job) -> bool:
+        """Serve `job` without a render: cache hit, or wait on an identical in-flight job."""
+        if self.cache is not None and not job.force:
+            path = self.cache.get(job.cache_key)
+            if path:
+                logger.info(f"=== JOB {job.index} CACHE HIT {os.path.basename(path)} ===", extra=tags(job, "cache"))
+                job.path = path; job.fname = os.path.basename(path); job.cached = True
+                self._finish(job, OK); return True
+        leader = self._leaders.get(job.cache_key)
+        if leader is not None and leader is not job:
+            logger.info(f"=== JOB {job.index} DUPLICATE of job {leader.index}, waiting for its result ===",
+                        extra=tags(job, "cache"))
+            self._followers.setdefault(leader.id, []).append(job)
+            self._notify(job); return True
+        return False
+
+    def _key(self, job: Job) -> str:
+        return self.keys.key(job.key_id) or ""
+
+    def _release(self, job: Job):
+        kid = self._holding.pop(job.id, None)
+        if kid: self.keys.release(kid)
+
+    def _requeue(self, job: Job, why: str, delay: float = 0.0) -> bool:
+        """Put a bounced job back in line (after `delay`), on any key. False once it bounced too often."""
+        n = self._requeues[job.id] = self._requeues.get(job.id, 0) + 1
+        if n > self.MAX_REQUEUES: return False
+        logger.info(f"=== JOB {job.index} REQUEUE ({why}) ===", extra=tags(job, "kickoff"))
+        self._release(job); self._inflight.pop(job.id, None)  # stays leader of its duplicates
+        self.scheduler.remove(job.id); self._op_started.pop(job.id, None)
+        job.status = QUEUED; job.key_id = ""; job.operation = ""; job.uri = ""
+        if delay: self._delay(job, "kickoff", delay)
+        else: self._pending.appendleft(job)
+        self._notify(job)
+        return True
+
+    def _retry(self, job: Job, cls: str, phase: str, retry_after: float | None = None) -> bool:
+        """Schedule another attempt of `phase` if the class' retry budget allows it."""
+        limit = self.retry[cls][0]
+        if job.attempts >= limit: return False
+        job.attempts += 1
+        delay = backoff(cls, job.attempts, retry_after, policy=self.retry)
+        METRICS.inc("renderx_retries_total", phase=phase, error_class=cls)
+        logger.warning(f"=== JOB {job.index} RETRY {job.attempts}/{limit} {phase} in {delay:.0f}s ({cls}) ===",
+                       extra=tags(job, phase))
+        if phase == "download":  # same operation and URI; the .part is resumed
+            self._delay(job, phase, delay); self._notify(job)
+            return True
+        return self._requeue(job, f"{cls} retry", delay)  # kickoff again (new operation)
+
+    def _delay(self, job: Job, phase: str, delay: float):
+        self._seq += 1
+        heapq.heappush(self._delayed, (time.time() + delay, self._seq, job, phase))
+
+    def _release_delayed(self, now: float):
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, job, phase = heapq.heappop(self._delayed)
+            if phase == "download":
+                self._call(job, "download", api.download_video_by_uri, self._key(job), job.uri, job.path)
+            else:
+                self._pending.appendleft(job)
+
+    def _breaker_record(self, job: Job, ok: bool):
+        probe = self._probe == job.id
+        if probe: self._probe = None
+        self.breaker.record(ok, probe=probe)
+
+    def _kickoff(self, job: Job) -> tuple[bool, str]:
+        return api.start_generation(api_key=self._key(job), prompt=job.prompt, **job.params)
+
+    def _advance(self, job: Job, phase: str, result: tuple):
+        if job.id in self._cancelling or phase == "cancel":
+            if phase == "kickoff":
+                self._breaker_record(job, result[0] or classify(result[1])[0] not in BREAKER_FAILURES)
+                if result[0]: job.operation = result[1]
+            elif phase == "cancel" and not result[0]:
+                logger.warning(f"Job {job.index} remote cancel failed: {result[1]}", extra=tags(job, phase))
+            return self._abort(job, phase)
+        if phase == "kickoff":
+            ok, value = result
+            if not ok:
+                cls, retry_after = classify(value)
+                self._breaker_record(job, cls not in BREAKER_FAILURES)
+                if cls == RATE_LIMIT:
+                    self.keys.throttled(job.key_id, retry_after)
+                    if self._requeue(job, "key throttled"): return
+                elif cls == MODEL:
+                    self.keys.reject_model(job.key_id, job.params.get("model"))
+                    if self.keys.can_serve(job.pool, job.params.get("model")) and self._requeue(job, "model rejected by key"):
+                        return
+                elif cls in self.retry and not maybe_accepted(value):  # a timed-out kickoff may have billed already
+                    if self._retry(job, cls, "kickoff", retry_after): return
+                return self._finish(job, ERROR, f"Kickoff gagal: {value}", cls)
+            self._breaker_record(job, True)
+            self.keys.succeeded(job.key_id)
+            job.operation = value; job.status = RUNNING; self._op_started[job.id] = time.time()
+            self.scheduler.add(job.id, job.params.get("model"), started_at=time.time())
+        elif phase == "poll":
+            code, value, headers = result
+            job.polls += 1
+            retry_after = parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+            if code == 429 or (code == 503 and retry_after is not None):
+                self.breaker.record(False)
+                self.scheduler.throttle(retry_after); self.scheduler.record(job.id)
+                if code == 429: self.keys.throttled(job.key_id, retry_after)  # no new kickoffs on a hot key
+                return self._notify(job)
+            if code != 200:
+                cls, _ = classify(value)
+                self.breaker.record(cls not in BREAKER_FAILURES)
+                fails = self._poll_failures[job.id] = self._poll_failures.get(job.id, 0) + 1
+                if cls == TRANSIENT and fails < POLL_FAILURES:  # the operation is fine, the GET wasn't
+                    self.scheduler.record(job.id)
+                    return self._notify(job)
+                return self._finish(job, ERROR, f"Gagal polling: {value}", cls)
+            self._poll_failures.pop(job.id, None); self.breaker.record(True)
+            self.scheduler.ok()
+            if not value.get("done"):
+                if job.elapsed > self.timeout:
+                    logger.error(f"Poll TIMEOUT job={job.index}", extra=tags(job, "poll"))
+                    return self._finish(job, ERROR, "Timeout polling operation.", TRANSIENT)
+                self.scheduler.record(job.id)
+                logger.debug(f"Poll running… job={job.index} elapsed={int(job.elapsed)}s", extra=tags(job, "poll"))
+                return self._notify(job)
+            logger.info(f"Poll DONE job={job.index}", extra=tags(job, "poll"))
+            self.scheduler.remove(job.id); self._release(job)  # operation over: frees the key's slot
+            model = job.params.get("model") or ""
+            METRICS.observe("renderx_polls_per_job", job.polls, model=model)
+            if job.id in self._op_started:  # unknown for reattached operations
+                METRICS.observe("renderx_render_seconds", time.time() - self._op_started.pop(job.id), model=model)
+            uri = None if value.get("error") else api.extract_video_uri(value)
+            if not uri and was_cancelled(value):  # cancelled outside this engine (another client, console)
+                return self._finish(job, CANCELLED, "Operation dibatalkan di server.")
+            if not uri:  # finished without a video (safety filter, internal error, …)
+                cls, msg = classify_operation(value)
+                if cls == RATE_LIMIT:
+                    self.keys.throttled(job.key_id, None)
+                    if self._requeue(job, "operation out of quota"): return
+                elif cls in self.retry and self._retry(job, cls, "render"): return
+                return self._finish(job, ERROR, f"Operation gagal: {msg}" if value.get("error") else msg, cls)
+            job.uri = uri
+            if not job.path:  # a resumed job keeps its path so the existing .part is continued
+                ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+                job.fname = f"veo_{job.index}_{ts}.mp4"
+                job.path = os.path.join(self.output_folder, job.fname)
+            job.status = DOWNLOADING
+            self._call(job, "download", api.download_video_by_uri, self._key(job), uri, job.path)
+        elif phase == "download":
+            ok, value = result
+            if not ok:  # path kept: "<path>.part" can be resumed by a later attempt
+                cls, _ = classify(value)
+                cls = TRANSIENT if cls == UNKNOWN else cls  # local I/O, short read, …: resumable
+                if cls in self.retry and self._retry(job, cls, "download"): return
+                return self._finish(job, ERROR, f"Download gagal: {value}", cls)
+            return self._finish(job, OK)
+        self._notify(job)
+
+    def _finish(self, job: Job, status: str, error: str = "", error_class: str = ""):
+        job.status = status; job.error = error; job.finished_at = time.time()
+        job.error_class = error_class if status == ERROR else ""
+        self._inflight.pop(job.id, None); self.scheduler.remove(job.id); self._poll_failures.pop(job.id, None)
+        self._release(job); self._requeues.pop(job.id, None); self._op_started.pop(job.id, None)
+        model = job.params.get("model") or ""
+        METRICS.inc("renderx_jobs_total", model=model, status=status)
+        METRICS.observe("renderx_job_seconds", job.elapsed, model=model, status=status)
+        if job.cached and status == OK: METRICS.inc("renderx_cache_hits_total", model=model)
+        logger.info(f"=== JOB {job.index} END ({status.lower()}) ===" + (f": {error}" if error else ""),
+                    extra=tags(job, "finish"))
+        self._notify(job)
+        if self._leaders.get(job.cache_key) is job:
+            del self._leaders[job.cache_key]
+            if status == OK and not job.cached and self.cache is not None:
+                self.cache.put(job.cache_key, job.path)
+            for f in self._followers.pop(job.id, []):
+                f.uri, f.path, f.fname, f.cached = job.uri, job.path, job.fname, status == OK
+                self._finish(f, status, error, error_class)
+
+    def _measure(self, job: Job, phase: str, result: tuple, dt: float):
+        model = job.params.get("model") or ""
+        if phase == "cancel": return
+        if phase == "poll":
+            METRICS.observe("renderx_poll_seconds", dt, model=model)
+            if result[0] != 200: METRICS.inc("renderx_api_errors_total", phase=phase, code=result[0], model=model)
+            return
+        ok, value = result
+        METRICS.observe(f"renderx_{phase}_seconds", dt, model=model)
+        if not ok:
+            METRICS.inc("renderx_api_errors_total", phase=phase, code=http_status(value), model=model)
+        elif phase == "download":
+            try:
+                size = os.path.getsize(job.path)
+            except OSError:
+                return
+            METRICS.inc("renderx_download_bytes_total", size, model=model)
+            METRICS.observe("renderx_download_bytes_per_second", size / max(dt, 1e-6), model=model)
+
+    def _gauges(self):
+        phases = {STARTING: 0, RUNNING: 0, DOWNLOADING: 0}
+        for job in self._inflight.values():
+            if job.status in phases: phases[job.status] += 1
+        for status, n in phases.items():
+            METRICS.set("renderx_jobs_inflight", n, phase=status.lower())
+        METRICS.set("renderx_jobs_pending", len(self._pending) + len(self._delayed))
+        METRICS.set("renderx_breaker_open", int(self.breaker.state != "closed"))
+
+    def _notify(self, job: Job):
+        self._gauges()
+        if self.store is not None:
+            try:
+                self.store.save(job)
+            except Exception as e:
+                logger.exception(f"Job journal write failed: {e}")
+        try:
+            self.on_update(job)
+        except Exception as e:
+            logger.exception(f"on_update callback failed: {e}")
@@ -0,0 +1,148 @@
+# renderx/errors.py
+# Failure taxonomy for Veo API calls and finished operations, and the retry policy per class:
+# - transient: network errors, 5xx, operations that ended INTERNAL/UNAVAILABLE → retried with backoff
+# - rate_limit: 429 / RESOURCE_EXHAUSTED → the key is benched (renderx.keypool) and the job tries again
+# - model: key/project may not use the model → another key of the pool, else final
+# - policy: safety / responsible-AI rejection of the prompt or the output → final
+# - auth: bad or unauthorized API key → final
+# - invalid: any other 4xx (bad request, operation not found) → final
+# - unknown: unclassified → one retry
+# CircuitBreaker stops new kickoffs while the API's error rate spikes (transient + rate-limit
+# failures over a sliding window), then lets a single probe through before closing again.
+
+import re, time, random, logging, threading
+from collections import deque
+
+logger = logging.getLogger("veo_gemini_adv")
+
+TRANSIENT, RATE_LIMIT, MODEL, POLICY, AUTH, INVALID, UNKNOWN = (
+    "transient", "rate_limit", "model", "policy", "auth", "invalid", "unknown")
+CLASSES = (TRANSIENT, RATE_LIMIT, MODEL, POLICY, AUTH, INVALID, UNKNOWN)
+
+# class -> (retries, first delay s, max delay s). rate_limit / model bounces are paced by the key
+# pool instead (bench, other key) and bounded by BatchEngine.MAX_REQUEUES
+RETRY = {TRANSIENT: (4, 15.0, 300.0), UNKNOWN: (1, 30.0, 30.0)}
+POLL_FAILURES = 6        # consecutive failed polls of one operation before the job gives up
+RETRYABLE = (TRANSIENT, RATE_LIMIT, UNKNOWN)  # what "resubmit failed" puts back in the queue
+BREAKER_FAILURES = (TRANSIENT, RATE_LIMIT)     # what counts towards tripping the breaker
+
+_STATUS = re.compile(r"^\s*(\d{3})(?::|\s+(?:Client|Server) Error)")
+_RETRY_DELAY = re.compile(r'"retryDelay"\s*:\s*"(\d+(?:\.\d+)?)s"')
+_MODEL_HINTS = ("not allowed", "not supported for", "is not found for api version", "does not have access",
+                "not available in your", "allowlist")
+_POLICY_HINTS = ("safety", "responsible ai", "raifiltered", "rai_filtered", "blocked", "prohibited",
+                 "violat", "sensitive", "usage guidelines", "filtered")
+_AUTH_HINTS = ("api key not valid", "api_key_invalid", "permission_denied", "unauthenticated",
+               "api key expired", "billing")
+_NETWORK_HINTS = ("exception", "timed out", "timeout", "connection", "reset by peer", "temporarily",
+                  "remotedisconnected", "max retries", "eof occurred")
+# gRPC codes in a finished operation's "error"
+_GRPC = {4: TRANSIENT, 8: RATE_LIMIT, 10: TRANSIENT, 13: TRANSIENT, 14: TRANSIENT, 3: INVALID, 7: AUTH, 16: AUTH}
+
+def status_of(error: str) -> int:
+    """'503: {...}' or '403 Client Error: …' → 503 / 403; 0 when there is no HTTP status."""
+    m = _STATUS.match(error or "")
+    return int(m.group(1)) if m else 0
+
+def classify(error: str) -> tuple[str, float | None]:
+    """API error text → (class, retry-after seconds or None)."""
+    low = (error or "").lower(); code = status_of(error)
+    if code == 429 or "resource_exhausted" in low:
+        m = _RETRY_DELAY.search(error)
+        return RATE_LIMIT, float(m.group(1)) if m else None
+    if code in (400, 403, 404) and "model" in low and any(h in low for h in _MODEL_HINTS):
+        return MODEL, None
+    if code >= 500: return TRANSIENT, None
+    if any(h in low for h in _AUTH_HINTS) or code == 401: return AUTH, None
+    if any(h in low for h in _POLICY_HINTS): return POLICY, None
+    if code == 403: return AUTH, None
+    if 400 <= code < 500: return INVALID, None
+    if code == 0 and any(h in low for h in _NETWORK_HINTS): return TRANSIENT, None
+    return UNKNOWN, None
+
+def classify_operation(response: dict) -> tuple[str, str]:
+    """A done operation without a usable video → (class, message)."""
+    err = response.get("error")
+    if err:
+        msg = err.get("message", str(err)) if isinstance(err, dict) else str(err)
+        code = err.get("code") if isinstance(err, dict) else None
+        if any(h in msg.lower() for h in _POLICY_HINTS): return POLICY, msg
+        return _GRPC.get(code) or classify(msg)[0], msg
+    gen = (response.get("response") or {}).get("generateVideoResponse") or {}
+    reasons = gen.get("raiMediaFilteredReasons")
+    if reasons or gen.get("raiMediaFilteredCount"):
+        return POLICY, "; ".join(map(str, reasons or ())) or "Video difilter oleh safety filter."
+    return UNKNOWN, "Respon selesai tapi tidak ada URI video yang bisa diunduh."
+
+def was_cancelled(response: dict) -> bool:
+    """A done operation that was cancelled (gRPC code 1) rather than failed."""
+    err = response.get("error")
+    return isinstance(err, dict) and err.get("code") == 1
+
+def maybe_accepted(error: str) -> bool:
+    """A failed kickoff that may still have created an operation (retrying could bill twice)."""
+    low = (error or "").lower()
+    return status_of(error) == 0 and ("read timed out" in low or "remotedisconnected" in low or "aborted" in low)
+
+def backoff(cls: str, attempt: int, retry_after: float | None = None, rng=random, policy: dict | None = None) -> float:
+    """Delay before retry number `attempt` (1-based): exponential with full jitter, at least retry_after.
+    `policy` replaces RETRY (same shape), e.g. with scaled delays in renderx.bench."""
+    _, base, cap = (RETRY if policy is None else policy).get(cls, (0, 0.0, 0.0))
+    delay = min(cap, base * 2 ** (attempt - 1))
+    delay = delay / 2 + rng.random() * delay / 2
+    return max(delay, retry_after or 0.0)
+
+class CircuitBreaker:
+    """closed → (error rate ≥ threshold over `window` s, at least `min_calls`) → open for `cooldown`
+    → half-open: one probe kickoff; success closes, failure re-opens with a doubled cooldown."""
+    def __init__(self, window: float = 120.0, min_calls: int = 10, threshold: float = 0.5,
+                 cooldown: float = 60.0, max_cooldown: float = 900.0, clock=time.time):
+        self.window, self.min_calls, self.threshold = window, min_calls, threshold
+        self.base_cooldown, self.max_cooldown, self.clock = cooldown, max_cooldown, clock
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.probing = False
+        self._calls: deque[tuple[float, bool]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if not self.open_until: return "closed"
+        return "open" if self.clock() < self.open_until and not self.probing else "half-open"
+
+    def blocked(self) -> bool:
+        """No kickoff may go out now (open, or half-open with the probe still in flight)."""
+        return self.probing or self.clock() < self.open_until
+
+    def begin(self) -> bool:
+        """A kickoff is going out; True when it is the half-open probe (report it with probe=True)."""
+        with self._lock:
+            if not self.open_until or self.probing: return False
+            self.probing = True
+            return True
+
+    def record(self, ok: bool, probe: bool = False):
+        now = self.clock()
+        with self._lock:
+            if probe and self.probing:
+                self.probing = False
+                if ok:
+                    self.open_until = 0.0; self.cooldown = self.base_cooldown; self._calls.clear()
+                    logger.info("Circuit breaker closed (probe succeeded)")
+                else:
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2); self.open_until = now + self.cooldown
+                    logger.warning(f"Circuit breaker re-opened for {self.cooldown:.0f}s (probe failed)")
+                return
+            self._calls.append((now, ok))
+            while self._calls and self._calls[0][0] < now - self.window: self._calls.popleft()
+            if self.open_until or self.probing or len(self._calls) < self.min_calls: return
+            failed = sum(not c for _, c in self._calls)
+            if failed / len(self._calls) >= self.threshold:
+                self.open_until = now + self.cooldown
+                logger.warning(f"Circuit breaker open for {self.cooldown:.0f}s: "
+                               f"{failed}/{len(self._calls)} calls failed in {self.window:.0f}s")
+
+    @property
+    def retry_at(self) -> float | None:
+        """When a blocked kickoff can be tried again (None while closed or probing)."""
+        return self.open_until if self.open_until and not self.probing else None
@@ -0,0 +1,95 @@
+# renderx/export.py
+# Streaming ZIP export of results with flat memory, whatever the batch size:
+# - entries are copied in chunks (never a whole file in RAM), no BytesIO for the archive
+# - ZIP_STORED for already-compressed media (MP4 etc.), DEFLATED only for text-like files
+# - ZIP64 always on, so multi-GB batches / >65535 entries are fine
+# - iter_zip() yields the archive chunk by chunk for HTTP streaming (non-seekable sink,
+#   data descriptors); write_zip() writes it to disk via .part + os.replace()
+
+import os, zipfile, logging
+
+logger = logging.getLogger("veo_gemini_adv")
+
+CHUNK = 1024 * 1024
+STORED_EXT = {".mp4", ".mov", ".webm", ".mkv", ".m4a", ".mp3", ".jpg", ".jpeg", ".png", ".webp",
+              ".gif", ".zip", ".gz", ".7z"}
+
+def compression_for(name: str) -> int:
+    return zipfile.ZIP_STORED if os.path.splitext(name)[1].lower() in STORED_EXT else zipfile.ZIP_DEFLATED
+
+def entries(paths, check: bool = True) -> list[tuple[str, str]]:
+    """(path, arcname) for existing files; duplicate paths dropped, clashing names suffixed.
+    check=False trusts the caller (e.g. paths from renderx.fileindex) and skips the per-file stat."""
+    seen_paths, names, out = set(), set(), []
+    for p in paths:
+        ap = os.path.abspath(p)
+        if ap in seen_paths or (check and not os.path.isfile(ap)): continue
+        seen_paths.add(ap)
+        name = os.path.basename(ap); stem, ext = os.path.splitext(name); n = 1
+        while name in names:
+            n += 1; name = f"{stem}_{n}{ext}"
+        names.add(name); out.append((ap, name))
+    return out
+
+def _info(path: str, arcname: str) -> zipfile.ZipInfo:
+    zi = zipfile.ZipInfo.from_file(path, arcname)
+    zi.compress_type = compression_for(arcname)
+    return zi
+
+def _copy(zf: zipfile.ZipFile, zi: zipfile.ZipInfo, path: str):
+    """Copy one file into the archive CHUNK by CHUNK (zipfile keeps CRC and sizes); yields after
+    every chunk so a streaming caller can drain its sink."""
+    with open(path, "rb") as src, zf.open(zi, "w", force_zip64=True) as dst:
+        while True:
+            buf = src.read(CHUNK)
+            if not buf: return
+            dst.write(buf)
+            yield
+
+def _add(zf: zipfile.ZipFile, path: str, arcname: str):
+    for _ in _copy(zf, _info(path, arcname), path): pass
+
+class _Sink:
+    """Write-only, non-seekable buffer that iter_zip drains as it fills."""
+    def __init__(self):
+        self.parts: list[bytes] = []; self.pos = 0; self.buffered = 0
+    def write(self, b) -> int:
+        self.parts.append(bytes(b)); self.pos += len(b); self.buffered += len(b); return len(b)
+    def tell(self) -> int:
+        return self.pos
+    def flush(self):
+        pass
+    def drain(self) -> bytes:
+        out = b"".join(self.parts); self.parts.clear(); self.buffered = 0; return out
+
+def iter_zip(files):
+    """Yield a ZIP of `files` ([(path, arcname)], see entries()) in chunks of about CHUNK bytes."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+        for path, arcname in files:
+            try:
+                zi = _info(path, arcname)
+            except OSError as e:  # removed since the listing: leave it out, keep the stream valid
+                logger.warning(f"ZIP export: skipping {path}: {e}"); continue
+            for _ in _copy(zf, zi, path):
+                if sink.buffered >= CHUNK: yield sink.drain()
+            if sink.buffered: yield sink.drain()
+    if sink.buffered: yield sink.drain()  # central directory
+
+def write_zip(paths, out_path: str) -> tuple[bool, str]:
+    """Write a ZIP of `paths` to out_path. Returns (ok, out_path or error)."""
+    files = entries(paths)
+    if not files: return False, "Tidak ada file untuk di-ZIP."
+    part = out_path + ".part"
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    try:
+        with zipfile.ZipFile(part, mode="w", allowZip64=True) as zf:
+            for path, arcname in files:
+                _add(zf, path, arcname)
+        os.replace(part, out_path)
+        logger.info(f"ZIP export: {len(files)} file(s) → {out_path} ({os.path.getsize(out_path)} bytes)")
+        return True, out_path
+    except Exception as e:
+        logger.exception(f"ZIP export FAIL: {e}")
+        if os.path.exists(part): os.remove(part)
+        return False, str(e)
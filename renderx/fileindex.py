@@ -0,0 +1,256 @@
+# renderx/fileindex.py
+# Index of rendered files in the output folder (size, mtime, sha256, source prompt, and what the
+# MP4 container says: duration, resolution, codec, audio), in the job journal's SQLite file. The UI and exports read it instead of probing the disk
+# on every rerun (expensive on network mounts with thousands of MP4s).
+# - new OK jobs are indexed incrementally (LEFT JOIN jobs ↔ files, at most BATCH per pass)
+# - the folder's own mtime is the change signal: only when it moves is the folder listed
+#   (files added/removed outside RenderX); otherwise a pass costs one stat
+# - a bounded number of entries older than RECHECK_AFTER are re-stat'ed per pass; a changed
+#   size/mtime re-hashes the file, a missing file is flagged (present=0), never deleted
+# - every indexed file also gets a poster (renderx.poster: ffmpeg frame or SVG placeholder);
+#   files indexed before that existed are probed in bounded batches (probed_at=0)
+# - a daemon sweeper runs passes every `interval` seconds or when notify() is called; the app
+#   calls notify() when jobs finish, so this is the post-download stage of the pipeline
+# - pinned / last_access / evicted_at / archived_to belong to renderx.retention (LRU eviction);
+#   last_access starts at the file's mtime
+# Results not indexed yet count as present, so a fresh render shows up before its first pass.
+
+import os, time, hashlib, logging, threading
+
+from . import mp4, poster
+from .engine import OK
+
+logger = logging.getLogger("veo_gemini_adv")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path       TEXT PRIMARY KEY,
+    job_id     TEXT NOT NULL DEFAULT '',
+    prompt     TEXT NOT NULL DEFAULT '',
+    size       INTEGER NOT NULL,
+    mtime      REAL NOT NULL,
+    sha256     TEXT NOT NULL DEFAULT '',
+    duration   REAL,
+    present    INTEGER NOT NULL DEFAULT 1,
+    indexed_at REAL NOT NULL,
+    checked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_files_check ON files(present, checked_at);
+CREATE INDEX IF NOT EXISTS ix_files_job ON files(job_id);
+"""
+# Columns added after the first release: name -> DDL (ALTER TABLE when missing)
+ADDED_COLUMNS = {
+    "width": "INTEGER NOT NULL DEFAULT 0",
+    "height": "INTEGER NOT NULL DEFAULT 0",
+    "codec": "TEXT NOT NULL DEFAULT ''",
+    "audio": "INTEGER NOT NULL DEFAULT 0",
+    "poster": "TEXT NOT NULL DEFAULT ''",
+    "probed_at": "REAL NOT NULL DEFAULT 0",
+    "pinned": "INTEGER NOT NULL DEFAULT 0",
+    "last_access": "REAL NOT NULL DEFAULT 0",
+    "evicted_at": "REAL NOT NULL DEFAULT 0",
+    "archived_to": "TEXT NOT NULL DEFAULT ''",
+}
+ADDED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_files_unprobed ON files(path) WHERE probed_at=0 AND present=1",
+    "CREATE INDEX IF NOT EXISTS ix_files_lru ON files(present, pinned, last_access)",
+)
+# data fixups for rows written before a column existed: column -> statements (run once, when added)
+BACKFILLS = {
+    "last_access": ("UPDATE files SET last_access=mtime",),
+}
+
+MEDIA_EXT = (".mp4",)
+BATCH = 200                 # new files indexed per pass
+RECHECK_BATCH = 100         # known files re-stat'ed per pass
+RECHECK_AFTER = 15 * 60     # seconds before a known file is re-stat'ed
+CHUNK = 1024 * 1024
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            buf = f.read(CHUNK)
+            if not buf: break
+            h.update(buf)
+    return h.hexdigest()
+
+class FileIndex:
+    def __init__(self, store):
+        self.store = store  # JobStore: shares its SQLite file and per-thread connections
+        with self.store.conn() as c:
+            c.executescript(SCHEMA)
+            have = {r["name"] for r in c.execute("PRAGMA table_info(files)")}
+            for name, ddl in ADDED_COLUMNS.items():
+                if name not in have:
+                    c.execute(f"ALTER TABLE files ADD COLUMN {name} {ddl}")
+                    for sql in BACKFILLS.get(name, ()): c.execute(sql)
+            for ddl in ADDED_INDEXES:
+                c.execute(ddl)
+        self._folder_mtime: dict[str, float] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ---------- indexing ----------
+    def _probe(self, path: str) -> dict:
+        """Container facts + poster (columns of `files`)."""
+        meta = mp4.probe(path)
+        m = meta or {}
+        return {"duration": m.get("duration"), "width": m.get("width", 0), "height": m.get("height", 0),
+                "codec": m.get("codec", ""), "audio": int(m.get("audio", False)),
+                "poster": poster.make(path, meta) or "", "probed_at": time.time()}
+
+    def _describe(self, path: str, st: os.stat_result) -> dict:
+        return {"size": st.st_size, "mtime": st.st_mtime, "sha256": sha256_file(path), **self._probe(path)}
+
+    def _upsert(self, path: str, st: os.stat_result, job_id: str = "", prompt: str = ""):
+        d = self._describe(path, st); now = time.time()
+        with self.store.conn() as c:
+            c.execute("INSERT INTO files (path, job_id, prompt, size, mtime, sha256, duration, width, height, codec, "
+                      "audio, poster, probed_at, last_access, present, indexed_at, checked_at) "
+                      "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                      "job_id=CASE WHEN excluded.job_id != '' THEN excluded.job_id ELSE files.job_id END, "
+                      "prompt=CASE WHEN excluded.prompt != '' THEN excluded.prompt ELSE files.prompt END, "
+                      "size=excluded.size, mtime=excluded.mtime, sha256=excluded.sha256, duration=excluded.duration, "
+                      "width=excluded.width, height=excluded.height, codec=excluded.codec, audio=excluded.audio, "
+                      "poster=excluded.poster, probed_at=excluded.probed_at, "
+                      "last_access=MAX(files.last_access, excluded.last_access), evicted_at=0, "
+                      "present=1, indexed_at=excluded.indexed_at, checked_at=excluded.checked_at",
+                      (path, job_id, prompt, d["size"], d["mtime"], d["sha256"], d["duration"], d["width"], d["height"],
+                       d["codec"], d["audio"], d["poster"], d["probed_at"], d["mtime"], now, now))
+
+    def _missing(self, paths):
+        with self.store.conn() as c:
+            c.executemany("UPDATE files SET present=0, checked_at=? WHERE path=?", [(time.time(), p) for p in paths])
+
+    def _index_new(self) -> int:
+        """OK jobs whose file isn't indexed yet."""
+        rows = self.store.conn().execute(
+            "SELECT j.id, j.path, j.prompt FROM jobs j LEFT JOIN files f ON f.path=j.path "
+            "WHERE j.status=? AND j.path != '' AND f.path IS NULL ORDER BY j.finished_at LIMIT ?",
+            (OK, BATCH)).fetchall()
+        gone = []
+        for r in rows:
+            try:
+                self._upsert(r["path"], os.stat(r["path"]), r["id"], r["prompt"])
+            except OSError:
+                gone.append(r["path"])
+        if gone:  # remember them as missing so the next pass doesn't stat them again
+            now = time.time()
+            with self.store.conn() as c:
+                c.executemany("INSERT OR IGNORE INTO files (path, size, mtime, present, indexed_at, checked_at) "
+                              "VALUES (?, 0, 0, 0, ?, ?)", [(p, now, now) for p in gone])
+        return len(rows)
+
+    def _enrich(self) -> int:
+        """Probe + poster for present files indexed before those columns existed."""
+        rows = self.store.conn().execute(
+            "SELECT path FROM files WHERE probed_at=0 AND present=1 LIMIT ?", (BATCH,)).fetchall()
+        for r in rows:
+            d = self._probe(r["path"])
+            with self.store.conn() as c:
+                c.execute("UPDATE files SET duration=?, width=?, height=?, codec=?, audio=?, poster=?, probed_at=? "
+                          "WHERE path=?", (d["duration"], d["width"], d["height"], d["codec"], d["audio"],
+                                           d["poster"], d["probed_at"], r["path"]))
+        return len(rows)
+
+    def _recheck(self) -> int:
+        rows = self.store.conn().execute(
+            "SELECT path, size, mtime FROM files WHERE present=1 AND checked_at < ? ORDER BY checked_at LIMIT ?",
+            (time.time() - RECHECK_AFTER, RECHECK_BATCH)).fetchall()
+        gone, same = [], []
+        for r in rows:
+            try:
+                st = os.stat(r["path"])
+            except OSError:
+                gone.append(r["path"]); continue
+            if st.st_size == r["size"] and st.st_mtime == r["mtime"]:
+                same.append(r["path"])
+            else:
+                self._upsert(r["path"], st)
+        if gone: self._missing(gone)
+        if same:
+            with self.store.conn() as c:
+                c.executemany("UPDATE files SET checked_at=? WHERE path=?", [(time.time(), p) for p in same])
+        return len(rows)
+
+    def _scan(self, folder: str) -> int:
+        """List `folder` only when its mtime moved (a file was added, removed or renamed)."""
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            return 0
+        if self._folder_mtime.get(folder) == mtime: return 0
+        self._folder_mtime[folder] = mtime
+        root = folder.rstrip(os.sep) + os.sep  # same spelling the engine joins result paths with
+        # range on the primary key = every path under root
+        known = {r[0]: r[1] for r in self.store.conn().execute(
+            "SELECT path, present FROM files WHERE path >= ? AND path < ?", (root, root[:-1] + chr(ord(os.sep) + 1)))}
+        seen, added = set(), 0
+        with os.scandir(folder) as it:
+            for e in it:
+                if not e.name.lower().endswith(MEDIA_EXT) or not e.is_file(): continue
+                p = os.path.join(root, e.name); seen.add(p)
+                if known.get(p) == 1: continue
+                try:
+                    self._upsert(p, e.stat()); added += 1
+                except OSError:
+                    pass
+        gone = [p for p, present in known.items() if present and p not in seen and os.path.dirname(p) + os.sep == root]
+        if gone: self._missing(gone)
+        return added + len(gone)
+
+    def sync(self, folder: str | None = None) -> int:
+        """One pass: index new results, rescan `folder` if it changed, probe older entries, re-stat stale ones."""
+        n = self._index_new()
+        if folder: n += self._scan(folder)
+        return n + self._enrich() + self._recheck()
+
+    # ---------- sweeper ----------
+    def start(self, folder: str, interval: float = 30.0) -> "FileIndex":
+        if self._thread and self._thread.is_alive(): return self
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    while self.sync(folder) and not self._stop.is_set():
+                        pass  # keep going while there is backlog
+                except Exception as e:
+                    logger.warning(f"File index pass failed: {e}")
+                self._wake.wait(interval); self._wake.clear()
+        self._thread = threading.Thread(target=loop, name="renderx-fileindex", daemon=True)
+        self._thread.start()
+        return self
+
+    def notify(self):
+        """Something finished: run a pass now instead of at the next interval."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+
+    # ---------- reads ----------
+    def lookup(self, paths) -> dict[str, dict]:
+        paths = [p for p in paths if p]
+        if not paths: return {}
+        marks = ", ".join("?" * len(paths))
+        rows = self.store.conn().execute(f"SELECT * FROM files WHERE path IN ({marks})", paths).fetchall()
+        return {r["path"]: dict(r) for r in rows}
+
+    def present(self, path: str) -> bool:
+        r = self.store.conn().execute("SELECT present FROM files WHERE path=?", (path,)).fetchone()
+        return bool(r["present"]) if r else bool(path)
+
+    def result_paths(self) -> list[str]:
+        """Visible OK results whose file is present (or not indexed yet), newest first."""
+        rows = self.store.conn().execute(
+            "SELECT j.path FROM jobs j LEFT JOIN files f ON f.path=j.path WHERE j.status=? AND j.hidden=0 "
+            "AND j.path != '' AND COALESCE(f.present, 1)=1 ORDER BY j.finished_at DESC", (OK,)).fetchall()
+        return list(dict.fromkeys(r[0] for r in rows))
+
+    def stats(self) -> dict:
+        r = self.store.conn().execute(
+            "SELECT COALESCE(SUM(present), 0) AS n, COALESCE(SUM(CASE WHEN present THEN size END), 0) AS bytes, "
+            "COALESCE(SUM(CASE WHEN present THEN duration END), 0) AS seconds, "
+            "COALESCE(SUM(present=0 AND evicted_at=0), 0) AS missing FROM files").fetchone()  # evicted ≠ missing
+        return {k: r[k] for k in ("n", "bytes", "seconds", "missing")}
@@ -0,0 +1,231 @@
+# renderx/fileserver.py
+# Tiny static file server for rendered videos, so the browser streams MP4s by URL
+# (HTTP Range, caching headers) instead of Streamlit pushing file bytes / base64 data
+# URLs through the websocket on every rerun.
+# - only registered roots are served, and only through HMAC-signed URLs
+#   (/f/<root-id>/<relpath>?exp=…&sig=…); expiry is bucketed per day so a URL stays
+#   identical across reruns and the browser/video element can reuse it
+# - ?dl=1 adds Content-Disposition: attachment (cross-origin <a download> is ignored)
+# - /z/<token>/<name>.zip streams a ZIP of a registered file list (chunked, see export.py)
+# - /metrics serves renderx.metrics in Prometheus text format, unauthenticated, so it is opt-in
+#   (RENDERX_FILES_METRICS=1)
+#
+# The browser only gets these URLs when it can actually load them (base_for): through
+# RENDERX_FILES_URL, or over plain http on the same host. Behind HTTPS or a proxy without
+# RENDERX_FILES_URL the app falls back to loading media through Streamlit on click.
+#
+# Env: RENDERX_FILES_HOST (bind, default 127.0.0.1; 0.0.0.0 to serve LAN browsers directly),
+#      RENDERX_FILES_PORT (default 8502),
+#      RENDERX_FILES_URL (public base URL if the browser reaches it through a proxy/forward),
+#      RENDERX_FILES_METRICS (default 0)
+
+import os, hmac, time, hashlib, secrets, mimetypes, threading, logging
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import quote, unquote, urlsplit, parse_qs
+from email.utils import formatdate
+
+from . import export
+from .metrics import METRICS
+
+logger = logging.getLogger("veo_gemini_adv")
+
+DAY = 86400
+MAX_EXPORTS = 16  # remembered ZIP export links (oldest dropped)
+COPY_CHUNK = 256 * 1024
+LOOPBACK = ("localhost", "127.0.0.1", "::1")
+
+def _root_id(root: str) -> str:
+    return hashlib.sha256(os.path.abspath(root).encode("utf-8")).hexdigest()[:12]
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Single 'bytes=' range → (start, end) inclusive; None = whole file; ValueError = unsatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    a, _, b = header[6:].strip().partition("-")
+    if a == "":  # suffix: last N bytes
+        n = int(b)
+        if n <= 0: raise ValueError("empty suffix range")
+        return max(0, size - n), size - 1
+    start = int(a); end = int(b) if b else size - 1
+    if start >= size or end < start: raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+class FileServer:
+    def __init__(self, host: str | None = None, port: int | None = None, public_url: str | None = None):
+        self.host = host or os.environ.get("RENDERX_FILES_HOST", "127.0.0.1")
+        self.port = int(port if port is not None else os.environ.get("RENDERX_FILES_PORT", 8502))
+        self.public_url = (public_url or os.environ.get("RENDERX_FILES_URL", "")).rstrip("/")
+        self.metrics = os.environ.get("RENDERX_FILES_METRICS", "0") == "1"
+        self.roots: dict[str, str] = {}
+        self.exports: OrderedDict[str, tuple[float, list]] = OrderedDict()  # token -> (expiry, entries)
+        self.error = ""
+        self._secret = secrets.token_bytes(32)
+        self._httpd: ThreadingHTTPServer | None = None
+
+    # ---------- lifecycle ----------
+    def start(self) -> "FileServer":
+        if self._httpd: return self
+        server = self
+        class Handler(_Handler):
+            files = server
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            self.error = f"File server tidak bisa listen di {self.host}:{self.port}: {e}"
+            logger.warning(self.error)
+            return self
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, name="renderx-files", daemon=True).start()
+        logger.info(f"File server on {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown(); self._httpd.server_close(); self._httpd = None
+
+    @property
+    def ok(self) -> bool:
+        return self._httpd is not None
+
+    # ---------- URLs ----------
+    def base_for(self, host: str | None, scheme: str = "http") -> str | None:
+        """Base URL for a browser that opened the app at `scheme`://`host`, or None when it can't use
+        this server (not running, https page → mixed content, loopback-only bind seen from elsewhere)."""
+        if not self.ok: return None
+        if self.public_url: return self.public_url
+        if not host or scheme != "http": return None
+        if host not in LOOPBACK and self.host in LOOPBACK: return None
+        return f"http://{'[' + host + ']' if ':' in host else host}:{self.port}"
+
+    def allow(self, root: str) -> str:
+        rid = _root_id(root); self.roots[rid] = os.path.abspath(root)
+        return rid
+
+    def _sign(self, rid: str, rel: str, exp: int) -> str:
+        msg = f"{rid}/{rel}|{exp}".encode("utf-8")
+        return hmac.new(self._secret, msg, hashlib.sha256).hexdigest()[:32]
+
+    def url(self, path: str, download: bool = False, base: str | None = None) -> str | None:
+        """Signed URL for a file under a registered root (None if not servable)."""
+        ap = os.path.abspath(path)
+        for rid, root in self.roots.items():
+            if ap.startswith(root + os.sep):
+                rel = os.path.relpath(ap, root).replace(os.sep, "/")
+                exp = (int(time.time()) // DAY + 2) * DAY  # valid 1–2 days, stable within a day
+                q = f"exp={exp}&sig={self._sign(rid, rel, exp)}" + ("&dl=1" if download else "")
+                base = (self.public_url or base or f"http://localhost:{self.port}").rstrip("/")
+                return f"{base}/f/{rid}/{quote(rel)}?{q}"
+        return None
+
+    def zip_url(self, paths, name: str, base: str | None = None, ttl: float = DAY, check: bool = True) -> str | None:
+        """One-off link streaming a ZIP of `paths` (files outside registered roots are skipped)."""
+        roots = tuple(r + os.sep for r in self.roots.values())
+        files = export.entries((p for p in paths if os.path.abspath(p).startswith(roots)), check=check)
+        if not files: return None
+        token = secrets.token_urlsafe(18)
+        self.exports[token] = (time.time() + ttl, files)
+        while len(self.exports) > MAX_EXPORTS: self.exports.popitem(last=False)
+        base = (self.public_url or base or f"http://localhost:{self.port}").rstrip("/")
+        return f"{base}/z/{token}/{quote(name)}"
+
+    def resolve(self, raw_path: str) -> tuple[str | None, dict]:
+        """Request path → (file path or None, query). Checks signature, expiry and containment."""
+        parts = urlsplit(raw_path)
+        q = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        segs = parts.path.split("/", 3)  # ['', 'f', rid, rel]
+        if len(segs) != 4 or segs[1] != "f": return None, q
+        rid, rel = segs[2], unquote(segs[3])
+        root = self.roots.get(rid)
+        try:
+            exp = int(q.get("exp", "0"))
+        except ValueError:
+            return None, q
+        if not root or exp < time.time() or not hmac.compare_digest(q.get("sig", ""), self._sign(rid, rel, exp)):
+            return None, q
+        full = os.path.abspath(os.path.join(root, rel))
+        if not full.startswith(root + os.sep) or not os.path.isfile(full): return None, q
+        return full, q
+
+class _Handler(BaseHTTPRequestHandler):
+    files: FileServer
+    protocol_version = "HTTP/1.1"
+    server_version = "renderx-files"
+
+    def log_message(self, fmt, *args):
+        logger.debug("files: " + fmt % args)
+
+    def do_HEAD(self): self._serve(head=True)
+    def do_GET(self): self._serve(head=False)
+
+    def _serve(self, head: bool):
+        if self.path.startswith("/z/"):
+            return self._serve_zip(head)
+        if self.path == "/metrics" and self.files.metrics:
+            return self._plain(200, METRICS.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        path, q = self.files.resolve(self.path)
+        if not path:
+            return self._plain(404, "not found")
+        st = os.stat(path); size = st.st_size
+        etag = f'"{int(st.st_mtime)}-{size}"'
+        try:
+            rng = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416); self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0"); self.end_headers(); return
+        if rng and self.headers.get("If-Range") not in (None, etag):
+            rng = None  # file changed since the client's partial copy
+        start, end = rng or (0, size - 1)
+        length = max(0, end - start + 1)
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(st.st_mtime, usegmt=True))
+        self.send_header("Cache-Control", "private, max-age=86400")
+        if rng: self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        if q.get("dl"):
+            name = os.path.basename(path)
+            self.send_header("Content-Disposition", f"attachment; filename=\"{name}\"; filename*=UTF-8''{quote(name)}")
+        self.end_headers()
+        if head or not length: return
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                left = length
+                while left > 0:
+                    buf = f.read(min(COPY_CHUNK, left))
+                    if not buf: break
+                    self.wfile.write(buf); left -= len(buf)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # player seeked / closed the tab
+
+    def _serve_zip(self, head: bool):
+        token, _, name = urlsplit(self.path).path[3:].partition("/")
+        exp, files = self.files.exports.get(token, (0, None))
+        if not files or exp < time.time():
+            return self._plain(404, "not found")
+        name = unquote(name) or "export.zip"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", f"attachment; filename=\"{name}\"; filename*=UTF-8''{quote(name)}")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Transfer-Encoding", "chunked")  # size unknown up front: stream, never buffer
+        self.end_headers()
+        if head: return
+        try:
+            for data in export.iter_zip(files):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as e:
+            logger.exception(f"ZIP stream FAIL: {e}"); self.close_connection = True
+
+    def _plain(self, code: int, text: str, ctype: str = "text/plain; charset=utf-8"):
+        body = text.encode("utf-8")
+        self.send_response(code); self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body))); self.end_headers()
+        if self.command != "HEAD": self.wfile.write(body)
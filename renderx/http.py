@@ -0,0 +1,61 @@
+# renderx/http.py
+# Shared, connection-pooled HTTP client for kickoff, poll and download.
+# - one HTTPAdapter (urllib3 pool, keep-alive) shared by every thread
+# - a requests.Session per thread on top of it (Session itself isn't thread-safe)
+# - retries only for idempotent GET/HEAD on connect errors and 5xx; POST kickoffs
+#   are never replayed (a replay could start and bill a second render)
+
+import threading, logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("veo_gemini_adv")
+
+DEFAULTS = {"pool_connections": 4, "pool_maxsize": 32, "retries": 3, "backoff_factor": 0.5}
+
+_lock = threading.Lock()
+_local = threading.local()
+_config = dict(DEFAULTS)
+_adapter: HTTPAdapter | None = None
+_generation = 0  # bumped by configure() so thread-local sessions remount the new adapter
+
+def _build_adapter(cfg: dict) -> HTTPAdapter:
+    retry = Retry(
+        total=cfg["retries"], connect=cfg["retries"], read=cfg["retries"], status=cfg["retries"],
+        backoff_factor=cfg["backoff_factor"],
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=cfg["pool_connections"], pool_maxsize=cfg["pool_maxsize"],
+                       max_retries=retry, pool_block=False)
+
+def configure(**kwargs) -> dict:
+    """Change pool/retry settings (keys as in DEFAULTS). No-op if nothing changed."""
+    global _adapter, _generation
+    unknown = set(kwargs) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown HTTP option(s): {', '.join(sorted(unknown))}")
+    with _lock:
+        new = {**_config, **{k: v for k, v in kwargs.items() if v is not None}}
+        if new != _config or _adapter is None:
+            # the old adapter isn't closed: other threads may still be mid-request on it
+            _config.update(new); _adapter = _build_adapter(_config); _generation += 1
+            logger.debug(f"HTTP pool configured: {_config}")
+        return dict(_config)
+
+def session() -> requests.Session:
+    """Thread-local Session mounted on the shared pooled adapter."""
+    if _adapter is None:
+        configure()
+    s = getattr(_local, "session", None)
+    if s is None or getattr(_local, "generation", -1) != _generation:
+        s = requests.Session()
+        with _lock:
+            s.mount("https://", _adapter); s.mount("http://", _adapter)
+            _local.generation = _generation
+        _local.session = s
+    return s
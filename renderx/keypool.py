@@ -0,0 +1,165 @@
+# renderx/keypool.py
+# Pool of Gemini API keys/projects with a quota-aware kickoff scheduler.
+# - a "pool" is the set of keys one submitter gave (pool id = key id for a single key,
+#   so journals written before pools existed keep working); jobs may start on any key of their pool
+# - per key: token bucket on predictLongRunning kickoffs (per minute) + cap on operations in flight
+# - 429 / RESOURCE_EXHAUSTED benches the key (retryDelay, else exponential backoff); "model not
+#   allowed"-style rejections bench the key for that model only (classes from renderx.errors)
+# - once an operation exists it stays on its key: polls and downloads use Job.key_id
+# Keys live in memory only; the journal stores key ids (sha256 prefix).
+
+import re, time, hashlib, threading, logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("veo_gemini_adv")
+
+DEFAULTS = {
+    "rate_per_min": 10.0,    # kickoffs per key per minute (token refill)
+    "burst": 4,              # kickoffs a rested key may send back to back
+    "max_inflight": 10,      # operations running per key (Veo concurrent-operation limit)
+    "bench_base": 30.0,      # first 429 without a retry hint benches for this long, doubling per strike
+    "bench_max": 900.0,
+    "model_ban": 3600.0,     # how long a key stays excluded for a model it rejected
+}
+
+def key_id(api_key: str) -> str:
+    """Stable, non-reversible id for an API key (what the journal stores instead of the key)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def split_keys(raw: str) -> list[str]:
+    """'k1, k2\\nk3' → ['k1', 'k2', 'k3'] (order kept, duplicates dropped)."""
+    return list(dict.fromkeys(k.strip() for k in re.split(r"[,\s]+", raw or "") if k.strip()))
+
+@dataclass
+class KeyState:
+    kid: str
+    tokens: float
+    last: float
+    inflight: int = 0
+    benched_until: float = 0.0
+    strikes: int = 0
+    banned: dict = field(default_factory=dict)  # model -> until
+    used_at: float = 0.0
+    kickoffs: int = 0
+    throttles: int = 0
+
+class KeyPool:
+    def __init__(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown key pool option(s): {', '.join(sorted(unknown))}")
+        self.settings = {**DEFAULTS, **settings}
+        self._keys: dict[str, str] = {}
+        self._state: dict[str, KeyState] = {}
+        self.pools: dict[str, tuple[str, ...]] = {}  # pool id -> key ids
+        self._lock = threading.Lock()
+
+    # ---------- setup ----------
+    def configure(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown key pool option(s): {', '.join(sorted(unknown))}")
+        with self._lock:
+            self.settings.update({k: v for k, v in settings.items() if v is not None})
+
+    def add(self, api_keys) -> str:
+        """Register keys (str or list) as one pool. Returns the pool id."""
+        keys = split_keys(api_keys) if isinstance(api_keys, str) else [k for k in api_keys if k]
+        if not keys: return ""
+        kids = tuple(key_id(k) for k in keys)
+        pid = kids[0] if len(kids) == 1 else "pool-" + hashlib.sha256(",".join(sorted(kids)).encode()).hexdigest()[:16]
+        with self._lock:
+            for kid, k in zip(kids, keys):
+                self._keys[kid] = k
+                if kid not in self._state:
+                    self._state[kid] = KeyState(kid, tokens=float(self.settings["burst"]), last=time.time())
+            self.pools[pid] = kids
+        return pid
+
+    def key(self, kid: str) -> str | None:
+        return self._keys.get(kid)
+
+    def __contains__(self, kid: str) -> bool:
+        return kid in self._keys
+
+    # ---------- scheduling ----------
+    def _refill(self, s: KeyState, now: float):
+        rate = self.settings["rate_per_min"] / 60.0
+        s.tokens = min(float(self.settings["burst"]), s.tokens + (now - s.last) * rate); s.last = now
+
+    def _usable(self, s: KeyState, model: str | None, now: float) -> bool:
+        return (s.benched_until <= now and s.banned.get(model, 0) <= now
+                and s.inflight < self.settings["max_inflight"] and s.tokens >= 1.0)
+
+    def acquire(self, pool: str, model: str | None, now: float | None = None) -> str | None:
+        """Key id to kick off the next job of `pool` with (token taken, slot held), or None."""
+        now = now or time.time()
+        with self._lock:
+            kids = self.pools.get(pool, ())
+            for s in (self._state[k] for k in kids): self._refill(s, now)
+            ready = [self._state[k] for k in kids if self._usable(self._state[k], model, now)]
+            if not ready: return None
+            # most headroom first, least recently used among equals, so keys are used evenly
+            best = max(ready, key=lambda s: (-s.inflight, s.tokens, -s.used_at))
+            best.tokens -= 1.0; best.inflight += 1; best.kickoffs += 1; best.used_at = now
+            return best.kid
+
+    def hold(self, kid: str):
+        """Count an operation that already runs on `kid` (reattached after a restart)."""
+        with self._lock:
+            if kid in self._state: self._state[kid].inflight += 1
+
+    def release(self, kid: str):
+        with self._lock:
+            s = self._state.get(kid)
+            if s and s.inflight: s.inflight -= 1
+
+    def succeeded(self, kid: str):
+        with self._lock:
+            if kid in self._state: self._state[kid].strikes = 0
+
+    def throttled(self, kid: str, retry_after: float | None = None):
+        with self._lock:
+            s = self._state.get(kid)
+            if not s: return
+            s.strikes += 1; s.throttles += 1
+            wait = retry_after if retry_after is not None else min(
+                self.settings["bench_max"], self.settings["bench_base"] * 2 ** (s.strikes - 1))
+            s.benched_until = max(s.benched_until, time.time() + wait); s.tokens = min(s.tokens, 0.0)
+        logger.warning(f"Key {kid[:8]}… throttled: benched {wait:.0f}s")
+
+    def reject_model(self, kid: str, model: str):
+        with self._lock:
+            s = self._state.get(kid)
+            if s: s.banned[model] = time.time() + self.settings["model_ban"]
+        logger.warning(f"Key {kid[:8]}… rejected model {model}: benched for it {self.settings['model_ban']:.0f}s")
+
+    def can_serve(self, pool: str, model: str | None, now: float | None = None) -> bool:
+        """False when no key of the pool is allowed to use `model` at all right now."""
+        now = now or time.time()
+        with self._lock:
+            return any(self._state[k].banned.get(model, 0) <= now for k in self.pools.get(pool, ()))
+
+    def next_ready(self, pool: str, model: str | None = None, now: float | None = None) -> float | None:
+        """Earliest time a key of `pool` could accept a kickoff (None if only a release can free one)."""
+        now = now or time.time()
+        rate = self.settings["rate_per_min"] / 60.0
+        with self._lock:
+            times = []
+            for k in self.pools.get(pool, ()):
+                s = self._state[k]
+                if s.inflight >= self.settings["max_inflight"]: continue
+                t = max(s.benched_until, s.banned.get(model, 0), now)
+                if s.tokens < 1.0 and rate: t = max(t, s.last + (1.0 - s.tokens) / rate)
+                times.append(t)
+            return min(times) if times else None
+
+    def snapshot(self) -> list[dict]:
+        now = time.time()
+        with self._lock:
+            for s in self._state.values(): self._refill(s, now)
+            return [{"key": kid[:8] + "…", "inflight": s.inflight, "tokens": round(s.tokens, 1),
+                     "kickoffs": s.kickoffs, "throttled": s.throttles,
+                     "benched_s": max(0, round(s.benched_until - now)),
+                     "models_blocked": ", ".join(m for m, t in s.banned.items() if t > now)}
+                    for kid, s in self._state.items()]
@@ -0,0 +1,164 @@
+# renderx/logs.py
+# Logger setup shared by the app, the worker and the CLI (logger "veo_gemini_adv").
+# - non-blocking: the logger only enqueues (QueueHandler); one QueueListener thread formats
+#   and writes, so poll/download threads never wait on the console or the disk
+# - the file is JSON lines: ts, time, level, msg + job / op (operation) / phase tags. Tags come
+#   from `extra=tags(job, phase)` or from context() around a pool call (thread-local)
+# - search() filters by job, level, time range and text over the rotated files. Lines are in time
+#   order, so a time window is found by binary search on byte offsets, and a job's window comes
+#   from the journal (created_at … finished_at). Finding one job never reads the whole history
+
+import os, json, queue, atexit, logging, threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+LOGGER_NAME = "veo_gemini_adv"
+FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+TAGS = ("job", "op", "phase")
+MAX_BYTES, BACKUPS = 2_000_000, 3
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+_ctx = threading.local()
+_listener: QueueListener | None = None
+
+# ---------- tagging ----------
+def tags(job, phase: str = "") -> dict:
+    """`extra=` for a log call about `job` (renderx.engine.Job)."""
+    return {"job": job.id, "op": job.operation, "phase": phase}
+
+@contextmanager
+def context(**values):
+    """Tag every record logged by this thread inside the block (e.g. api calls run for a job)."""
+    old = {k: getattr(_ctx, k, "") for k in TAGS}
+    for k in TAGS:
+        if k in values: setattr(_ctx, k, values[k] or "")
+    try:
+        yield
+    finally:
+        for k, v in old.items(): setattr(_ctx, k, v)
+
+class ContextFilter(logging.Filter):
+    """Runs in the logging thread (before the queue), so it sees that thread's context()."""
+    def filter(self, record):
+        for k in TAGS:
+            if not getattr(record, k, ""): setattr(record, k, getattr(_ctx, k, ""))
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {"ts": round(record.created, 3), "time": self.formatTime(record), "level": record.levelname,
+               "msg": record.getMessage()}
+        for k in TAGS:
+            if getattr(record, k, ""): out[k] = getattr(record, k)
+        if record.exc_info: out["msg"] += "\n" + self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False)
+
+# ---------- setup ----------
+def setup_logger(log_path: str | None, level=logging.INFO, stream=None) -> logging.Logger:
+    """Console (stderr by default) + optional rotating JSON-lines file (2 MB × 3), written by a
+    background listener. Handlers are added once; later calls only change the level."""
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level); logger.propagate = False
+    if logger.handlers: return logger
+    ch = logging.StreamHandler(stream); ch.setFormatter(logging.Formatter(FORMAT))
+    handlers, error = [ch], None
+    if log_path:
+        try:
+            fh = RotatingFileHandler(log_path, maxBytes=MAX_BYTES, backupCount=BACKUPS, encoding="utf-8")
+            fh.setFormatter(JsonFormatter()); handlers.append(fh)
+        except Exception as e:
+            error = e
+    q = queue.SimpleQueue()
+    qh = QueueHandler(q); qh.addFilter(ContextFilter()); logger.addHandler(qh)
+    _listener = QueueListener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # flushes what is still queued
+    if error: logger.warning(f"Log file gagal dibuat: {error}")
+    return logger
+
+def has_file_handler(logger: logging.Logger) -> bool:
+    return bool(_listener) and any(isinstance(h, RotatingFileHandler) for h in _listener.handlers)
+
+# ---------- search ----------
+def rotated_files(path: str) -> list[str]:
+    """Oldest first: path.3, path.2, path.1, path (those that exist)."""
+    names = [f"{path}.{i}" for i in range(BACKUPS, 0, -1)] + [path]
+    return [p for p in names if os.path.exists(p)]
+
+def parse_line(line: str) -> dict | None:
+    """JSON line, or a line in the older text FORMAT; None if neither."""
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+    parts = line.split(" | ", 2)
+    if len(parts) == 3:
+        try:
+            return {"ts": datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S,%f").timestamp(), "time": parts[0],
+                    "level": parts[1], "msg": parts[2]}
+        except ValueError:
+            return None
+    return None  # traceback continuation of a text line
+
+def _line_ts(f, limit: int = 16) -> tuple[float | None, int]:
+    """ts of the first parseable line from the current position, and the offset after it."""
+    for _ in range(limit):
+        raw = f.readline()
+        if not raw: break
+        rec = parse_line(raw.decode("utf-8", errors="ignore"))
+        if rec and "ts" in rec: return rec["ts"], f.tell()
+    return None, f.tell()
+
+def seek_time(f, t: float) -> int:
+    """Byte offset of a line start at or before the first line with ts >= t (binary search)."""
+    f.seek(0, os.SEEK_END); lo, hi = 0, f.tell()
+    while lo < hi:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        if mid: f.readline()  # finish the partial line
+        ts, after = _line_ts(f)
+        if ts is not None and ts < t and after <= hi:
+            lo = after
+        else:
+            hi = mid
+    return lo
+
+def search(path: str, job: str = "", level: str = "", since: float | None = None, until: float | None = None,
+           text: str = "", limit: int = 500) -> list[dict]:
+    """Newest-first records matching every given filter (job id, minimum level, [since, until], text)."""
+    min_level = LEVELS.index(level) if level in LEVELS else 0
+    out = deque(maxlen=limit)
+    for p in rotated_files(path):
+        try:
+            if since is not None and os.path.getmtime(p) < since: continue  # last write before the window
+            with open(p, "rb") as f:
+                if until is not None:
+                    first, _ = _line_ts(f)
+                    if first is not None and first > until: break  # this and newer files are after it
+                end = seek_time(f, until) if until is not None else float("inf")  # past it: check every ts
+                pos = seek_time(f, since) if since is not None else 0
+                f.seek(pos)
+                for raw in f:
+                    pos += len(raw)
+                    line = raw.decode("utf-8", errors="ignore")
+                    if pos > end:
+                        rec = parse_line(line)
+                        if rec and rec.get("ts", 0) > until: break
+                    if (job and job not in line) or (text and text.lower() not in line.lower()): continue
+                    rec = parse_line(line)
+                    if not rec: continue
+                    ts = rec.get("ts", 0)
+                    if since is not None and ts < since: continue
+                    if until is not None and ts > until: break
+                    if job and rec.get("job") != job: continue
+                    lv = rec.get("level")
+                    if min_level and (lv not in LEVELS or LEVELS.index(lv) < min_level): continue
+                    out.append(rec)
+        except OSError:
+            continue  # rotated away while reading
+    return list(reversed(out))
@@ -0,0 +1,149 @@
+# renderx/metrics.py
+# In-process metrics for the render pipeline (no external dependency):
+# - counters, gauges and histograms with labels, declared once in DEFS
+# - histograms keep Prometheus buckets (cumulative, for scraping) plus the last RESERVOIR
+#   samples per series for the in-app percentiles (p50/p90/p95/p99)
+# - exposed as Prometheus text: /metrics on the file server, or a textfile
+#   (write_textfile, atomic) for the CLI / standalone worker
+# The engine records per-phase timings; everything here is thread-safe and cheap.
+
+import os, math, time, bisect, threading
+from collections import deque
+
+RESERVOIR = 2048
+
+SECONDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+RENDER_SECONDS = (10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 450, 600, 900)
+BYTES_PER_SECOND = tuple(x * 1024 ** 2 for x in (0.5, 1, 2, 5, 10, 20, 50, 100, 200))
+COUNTS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# name -> (type, help, buckets)
+DEFS = {
+    "renderx_queue_wait_seconds": ("histogram", "Time from enqueue to kickoff request", SECONDS + (1800, 3600)),
+    "renderx_kickoff_seconds": ("histogram", "predictLongRunning request latency", SECONDS),
+    "renderx_render_seconds": ("histogram", "Server render time (kickoff accepted to operation done)", RENDER_SECONDS),
+    "renderx_poll_seconds": ("histogram", "Operation GET latency", SECONDS),
+    "renderx_polls_per_job": ("histogram", "Operation GETs per finished render", COUNTS),
+    "renderx_download_seconds": ("histogram", "Video download duration", SECONDS),
+    "renderx_download_bytes_per_second": ("histogram", "Video download throughput", BYTES_PER_SECOND),
+    "renderx_job_seconds": ("histogram", "Job wall time from start to final status", RENDER_SECONDS + (1800,)),
+    "renderx_download_bytes_total": ("counter", "Bytes of video downloaded", None),
+    "renderx_jobs_total": ("counter", "Jobs finished, by model and status", None),
+    "renderx_cache_hits_total": ("counter", "Jobs served from the render cache or an identical job", None),
+    "renderx_api_errors_total": ("counter", "Failed API calls by phase, HTTP status (0 = no response) and model", None),
+    "renderx_retries_total": ("counter", "Automatic retries by phase and error class", None),
+    "renderx_breaker_open": ("gauge", "1 while the circuit breaker holds new kickoffs", None),
+    "renderx_jobs_inflight": ("gauge", "Jobs currently in a phase", None),
+    "renderx_jobs_pending": ("gauge", "Jobs waiting in the engine for a slot or key quota", None),
+}
+
+def _series(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(series: tuple, extra: tuple = ()) -> str:
+    items = series + extra
+    if not items: return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+def _fmt_num(x: float) -> str:
+    return "+Inf" if x == float("inf") else repr(float(x)) if not float(x).is_integer() else str(int(x))
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values: return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+class _Hist:
+    __slots__ = ("buckets", "counts", "sum", "count", "recent")
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets); self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0; self.count = 0; self.recent = deque(maxlen=RESERVOIR)
+
+class Metrics:
+    def __init__(self, defs: dict | None = None):
+        self.defs = defs or DEFS
+        self._lock = threading.Lock()
+        self._values: dict[str, dict[tuple, float | _Hist]] = {name: {} for name in self.defs}
+        self.started_at = time.time()
+
+    def _check(self, name: str, kind: str):
+        if self.defs.get(name, (None,))[0] != kind:
+            raise KeyError(f"{name} is not a declared {kind}")
+
+    # ---------- recording ----------
+    def inc(self, name: str, value: float = 1, **labels):
+        self._check(name, "counter"); s = _series(labels)
+        with self._lock:
+            self._values[name][s] = self._values[name].get(s, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self._check(name, "gauge")
+        with self._lock:
+            self._values[name][_series(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        self._check(name, "histogram"); s = _series(labels)
+        with self._lock:
+            h = self._values[name].get(s)
+            if h is None: h = self._values[name][s] = _Hist(self.defs[name][2])
+            h.counts[bisect.bisect_left(h.buckets, value)] += 1
+            h.sum += value; h.count += 1; h.recent.append(value)
+
+    def reset(self):
+        with self._lock:
+            self._values = {name: {} for name in self.defs}; self.started_at = time.time()
+
+    # ---------- reading ----------
+    def value(self, name: str, **labels) -> float:
+        v = self._values.get(name, {}).get(_series(labels), 0)
+        return v.count if isinstance(v, _Hist) else v
+
+    def scalars(self, kind: str) -> list[dict]:
+        """Counters or gauges as rows: {"metric", labels..., "value"}."""
+        with self._lock:
+            return [{"metric": name, **dict(s), "value": v}
+                    for name, (k, _, _) in self.defs.items() if k == kind
+                    for s, v in sorted(self._values[name].items())]
+
+    def summary(self) -> list[dict]:
+        """Histogram series with count, mean and percentiles over the recent samples."""
+        rows = []
+        with self._lock:
+            snap = [(name, s, h.count, h.sum, sorted(h.recent)) for name, (k, _, _) in self.defs.items()
+                    if k == "histogram" for s, h in sorted(self._values[name].items())]
+        for name, s, count, total, vals in snap:
+            rows.append({"metric": name, **dict(s), "count": count, "mean": round(total / count, 3) if count else 0.0,
+                         **{f"p{q}": round(percentile(vals, q), 3) for q in (50, 90, 95, 99)},
+                         "max": round(vals[-1], 3) if vals else 0.0})
+        return rows
+
+    def render_prometheus(self) -> str:
+        out = []
+        with self._lock:
+            for name, (kind, help_text, _) in self.defs.items():
+                out.append(f"# HELP {name} {help_text}"); out.append(f"# TYPE {name} {kind}")
+                for s, v in sorted(self._values[name].items()):
+                    if kind != "histogram":
+                        out.append(f"{name}{_fmt_labels(s)} {_fmt_num(v)}"); continue
+                    acc = 0
+                    for le, n in zip(v.buckets + (float("inf"),), v.counts):
+                        acc += n; out.append(f"{name}_bucket{_fmt_labels(s, (('le', _fmt_num(le)),))} {acc}")
+                    out.append(f"{name}_sum{_fmt_labels(s)} {_fmt_num(v.sum)}")
+                    out.append(f"{name}_count{_fmt_labels(s)} {v.count}")
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: str):
+        """Atomic write (node_exporter textfile collector style)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+METRICS = Metrics()
+
+def http_status(error: str) -> str:
+    """'429: {...}' (api error text) → '429'; anything else → '0'."""
+    head = (error or "").split(":", 1)[0].strip()
+    return head if head.isdigit() else "0"
@@ -0,0 +1,289 @@
+# renderx/mockserver.py
+# Offline stand-in for the Gemini Veo REST API, for tests and benchmarks without a key or cost.
+# Implements what renderx.api talks to:
+#   POST /v1beta/models/<model>:predictLongRunning     → {"name": "models/<model>/operations/<id>"}
+#   GET  /v1beta/models/<model>/operations/<id>        → {"done": false} … then the finished operation
+#   POST /v1beta/models/<model>/operations/<id>:cancel → {} (the operation ends with code 1 CANCELLED)
+#   GET  /v1beta/files/<id>:download?alt=media&key=…   → MP4 bytes (Range, Accept-Ranges)
+#   GET  /_stats  (call counters as JSON) • POST /_stats/reset
+# Behaviour is configurable: render-time distribution per model, failure rate, 429 rates for
+# kickoffs and polls (RESOURCE_EXHAUSTED + retryDelay), models a key may not use, response shape
+# ("generatedVideos", "generateVideoResponse.generatedSamples" or "mixed") and video size.
+# Point the app / CLI / worker at it with RENDERX_API_BASE=http://127.0.0.1:8600/v1beta.
+#
+#   python -m renderx.mockserver --port 8600 --render lognormal:45:0.3 --fail-rate 0.02 --kickoff-429 0.05
+
+import re, sys, json, math, time, uuid, random, argparse, threading, logging
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from .fileserver import parse_range
+
+logger = logging.getLogger("veo_gemini_adv")
+
+SHAPES = ("generatedVideos", "generatedSamples", "mixed")
+
+def parse_dist(spec: str):
+    """'fixed:30' | 'uniform:20:60' | 'lognormal:<median>:<sigma>' → callable(rng) -> seconds."""
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "fixed" and len(vals) == 1:
+        return lambda rng: vals[0]
+    if kind == "uniform" and len(vals) == 2:
+        return lambda rng: rng.uniform(vals[0], vals[1])
+    if kind == "lognormal" and len(vals) == 2:
+        mu = math.log(max(vals[0], 1e-6))
+        return lambda rng: rng.lognormvariate(mu, vals[1])
+    raise ValueError(f"Distribusi tidak dikenal: {spec!r}")
+
+def fake_mp4(size: int, seed: str) -> bytes:
+    """`size` bytes that start like an MP4 (ftyp box) and are unique per seed."""
+    head = b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2"
+    fill = (seed.encode() * (size // max(len(seed), 1) + 1))
+    return (head + fill)[:max(size, len(head))]
+
+@dataclass
+class MockConfig:
+    render: dict = field(default_factory=lambda: {"": "lognormal:45:0.3"})  # model prefix -> dist spec
+    time_scale: float = 1.0        # multiply every render time / retryDelay (0.01 = 100× faster)
+    fail_rate: float = 0.0         # finished operations that carry an error instead of a video
+    kickoff_429: float = 0.0       # probability a kickoff is rejected with RESOURCE_EXHAUSTED
+    poll_429: float = 0.0          # probability an operation GET is throttled
+    retry_delay: float = 30.0      # seconds suggested in 429 bodies (scaled)
+    kickoff_latency: float = 0.0   # seconds added to every kickoff (scaled)
+    denied: dict = field(default_factory=dict)  # api key -> [model prefixes it may not use]
+    shape: str = "mixed"
+    video_bytes: int = 256 * 1024
+    seed: int | None = None
+
+class MockVeo:
+    def __init__(self, config: MockConfig | None = None, host: str = "127.0.0.1", port: int = 8600):
+        self.config = config or MockConfig()
+        if self.config.shape not in SHAPES:
+            raise ValueError(f"shape harus salah satu dari {SHAPES}")
+        self.host, self.port = host, port
+        self._dists = {p: parse_dist(s) for p, s in self.config.render.items()}
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.ops: dict[str, dict] = {}
+        self.stats: dict[str, int] = {}
+        self._httpd: ThreadingHTTPServer | None = None
+
+    # ---------- lifecycle ----------
+    def start(self) -> "MockVeo":
+        server = self
+        class Handler(_Handler):
+            mock = server
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, name="renderx-mock", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown(); self._httpd.server_close(); self._httpd = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1beta"
+
+    # ---------- behaviour ----------
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def _chance(self, p: float) -> bool:
+        if p <= 0: return False
+        with self._lock:
+            return self._rng.random() < p
+
+    def _render_time(self, model: str) -> float:
+        best = max((p for p in self._dists if model.startswith(p)), key=len, default=None)
+        dist = self._dists.get(best) or parse_dist("lognormal:45:0.3")
+        with self._lock:
+            return max(0.0, dist(self._rng)) * self.config.time_scale
+
+    def kickoff(self, model: str, api_key: str, body: dict) -> tuple[int, dict]:
+        self.count("kickoff")
+        if not api_key:
+            return 403, {"error": {"code": 403, "message": "Method doesn't allow unregistered callers.",
+                                   "status": "PERMISSION_DENIED"}}
+        if any(model.startswith(p) for p in self.config.denied.get(api_key, ())):
+            self.count("kickoff_denied")
+            return 403, {"error": {"code": 403, "message": f"Model {model} is not allowed for this project.",
+                                   "status": "PERMISSION_DENIED"}}
+        if self._chance(self.config.kickoff_429):
+            self.count("kickoff_429"); return 429, self._exhausted()
+        if not (body.get("instances") or [{}])[0].get("prompt"):
+            return 400, {"error": {"code": 400, "message": "prompt is required", "status": "INVALID_ARGUMENT"}}
+        if self.config.kickoff_latency: time.sleep(self.config.kickoff_latency * self.config.time_scale)
+        op_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            failed = self._rng.random() < self.config.fail_rate
+            shape = self.config.shape if self.config.shape != "mixed" else self._rng.choice(SHAPES[:2])
+        self.ops[op_id] = {"model": model, "done_at": time.time() + self._render_time(model),
+                           "failed": failed, "shape": shape, "key": api_key}
+        return 200, {"name": f"models/{model}/operations/{op_id}"}
+
+    def operation(self, model: str, op_id: str, base: str) -> tuple[int, dict]:
+        self.count("poll")
+        op = self.ops.get(op_id)
+        if not op:
+            return 404, {"error": {"code": 404, "message": "Operation not found.", "status": "NOT_FOUND"}}
+        if self._chance(self.config.poll_429):
+            self.count("poll_429"); return 429, self._exhausted()
+        name = f"models/{model}/operations/{op_id}"
+        if op.get("cancelled"):
+            return 200, {"name": name, "done": True, "error": {"code": 1, "message": "Operation cancelled."}}
+        if time.time() < op["done_at"]:
+            return 200, {"name": name}
+        if op["failed"]:
+            return 200, {"name": name, "done": True,
+                         "error": {"code": 13, "message": "Video generation failed (mock)."}}
+        video = {"video": {"uri": f"{base}/v1beta/files/{op_id}:download?alt=media"}}
+        if op["shape"] == "generatedVideos":
+            response = {"@type": "type.googleapis.com/google.ai.generativelanguage.v1beta.PredictLongRunningResponse",
+                        "generatedVideos": [video]}
+        else:
+            response = {"generateVideoResponse": {"generatedSamples": [video]}}
+        return 200, {"name": name, "done": True, "response": response}
+
+    def cancel(self, op_id: str) -> tuple[int, dict]:
+        self.count("cancel")
+        op = self.ops.get(op_id)
+        if not op:
+            return 404, {"error": {"code": 404, "message": "Operation not found.", "status": "NOT_FOUND"}}
+        if time.time() < op["done_at"]: op["cancelled"] = True  # a finished operation stays finished
+        return 200, {}
+
+    def _exhausted(self) -> dict:
+        delay = self.config.retry_delay * self.config.time_scale
+        return {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                          "status": "RESOURCE_EXHAUSTED",
+                          "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo",
+                                       "retryDelay": f"{delay:.3f}s"}]}}
+
+_KICKOFF = re.compile(r"^/v1beta/models/([^/:]+):predictLongRunning$")
+_OPERATION = re.compile(r"^/v1beta/models/([^/]+)/operations/([^/]+)$")
+_CANCEL = re.compile(r"^/v1beta/models/([^/]+)/operations/([^/:]+):cancel$")
+_FILE = re.compile(r"^/v1beta/files/([^/:]+):download$")
+
+class _Handler(BaseHTTPRequestHandler):
+    mock: MockVeo
+    protocol_version = "HTTP/1.1"
+    server_version = "renderx-mock"
+
+    def log_message(self, fmt, *args):
+        logger.debug("mock: " + fmt % args)
+
+    def _json(self, code: int, obj: dict):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(code); self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body))); self.end_headers()
+        if self.command != "HEAD": self.wfile.write(body)
+
+    def _key(self, q: dict) -> str:
+        return self.headers.get("x-goog-api-key") or (q.get("key") or [""])[0]
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if parts.path == "/_stats/reset":
+            with self.mock._lock: self.mock.stats.clear()
+            return self._json(200, {})
+        m = _CANCEL.match(parts.path)
+        if m: return self._json(*self.mock.cancel(m.group(2)))
+        m = _KICKOFF.match(parts.path)
+        if not m: return self._json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self._json(400, {"error": {"code": 400, "message": "Invalid JSON payload", "status": "INVALID_ARGUMENT"}})
+        self._json(*self.mock.kickoff(m.group(1), self._key(parse_qs(parts.query)), payload))
+
+    def do_GET(self):
+        parts = urlsplit(self.path); q = parse_qs(parts.query)
+        if parts.path == "/_stats":
+            with self.mock._lock: return self._json(200, dict(self.mock.stats))
+        m = _OPERATION.match(parts.path)
+        if m:
+            if not self._key(q): return self._json(403, {"error": {"code": 403, "status": "PERMISSION_DENIED"}})
+            return self._json(*self.mock.operation(m.group(1), m.group(2), f"http://{self.headers.get('Host')}"))
+        m = _FILE.match(parts.path)
+        if m: return self._file(m.group(1), q)
+        self._json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def _file(self, op_id: str, q: dict):
+        self.mock.count("download")
+        op = self.mock.ops.get(op_id)
+        if not op or op["failed"] or time.time() < op["done_at"]:
+            return self._json(404, {"error": {"code": 404, "message": "File not found", "status": "NOT_FOUND"}})
+        if self._key(q) != op["key"]:
+            return self._json(403, {"error": {"code": 403, "message": "File belongs to another project",
+                                              "status": "PERMISSION_DENIED"}})
+        data = fake_mp4(self.mock.config.video_bytes, op_id); size = len(data)
+        try:
+            rng = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416); self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0"); self.end_headers(); return
+        start, end = rng or (0, size - 1)
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-Type", "video/mp4"); self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if rng: self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        try:
+            self.wfile.write(data[start:end + 1])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m renderx.mockserver", description="Offline mock of the Veo REST API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    ap.add_argument("--render", action="append", default=[], metavar="[PREFIX=]DIST",
+                    help="render time, e.g. lognormal:45:0.3 or veo-2.0=uniform:40:90 (repeatable)")
+    ap.add_argument("--time-scale", type=float, default=1.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--kickoff-429", type=float, default=0.0)
+    ap.add_argument("--poll-429", type=float, default=0.0)
+    ap.add_argument("--retry-delay", type=float, default=30.0)
+    ap.add_argument("--kickoff-latency", type=float, default=0.0)
+    ap.add_argument("--deny", action="append", default=[], metavar="KEY=MODEL_PREFIX",
+                    help="reject a model for one API key with 'not allowed' (repeatable)")
+    ap.add_argument("--shape", default="mixed", choices=SHAPES)
+    ap.add_argument("--video-kb", type=int, default=256)
+    ap.add_argument("--seed", type=int, default=None)
+    return ap
+
+def config_from_args(args) -> MockConfig:
+    render = {}
+    for spec in args.render or ["lognormal:45:0.3"]:
+        prefix, _, dist = spec.rpartition("=")
+        parse_dist(dist); render[prefix] = dist
+    denied = {}
+    for d in args.deny:
+        k, _, m = d.partition("="); denied.setdefault(k, []).append(m)
+    return MockConfig(render=render, time_scale=args.time_scale, fail_rate=args.fail_rate,
+                      kickoff_429=args.kickoff_429, poll_429=args.poll_429, retry_delay=args.retry_delay,
+                      kickoff_latency=args.kickoff_latency, denied=denied, shape=args.shape,
+                      video_bytes=args.video_kb * 1024, seed=args.seed)
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        mock = MockVeo(config_from_args(args), host=args.host, port=args.port).start()
+    except (ValueError, OSError) as e:
+        print(f"Mock server gagal: {e}"); return 2
+    print(f"Mock Veo API on {mock.base_url}  (RENDERX_API_BASE={mock.base_url})", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        mock.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
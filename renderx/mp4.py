@@ -0,0 +1,99 @@
+# renderx/mp4.py
+# Minimal ISO-BMFF (MP4) box reader: walks box headers with seeks, never reads media data.
+# - duration(): movie duration from moov/mvhd (v0 32-bit or v1 64-bit fields)
+# - probe(): duration + per-track facts: resolution (tkhd, else the visual sample entry),
+#   codec fourcc (stsd: avc1, hvc1, mp4a, …) and whether there is an audio track (hdlr 'soun')
+# Veo writes moov after mdat, so the walk skips mdat by its size instead of reading it.
+
+import struct
+
+CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"udta"}
+
+def boxes(f, end: int):
+    """Yield (type, payload_offset, payload_size) for the boxes between f.tell() and `end`."""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        head = f.read(8)
+        if len(head) < 8: return
+        size, kind = struct.unpack(">I4s", head)
+        hdr = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]; hdr = 16
+        elif size == 0:
+            size = end - start  # box runs to the end of its parent
+        if size < hdr or start + size > end: return  # truncated / not an MP4
+        yield kind, start + hdr, size - hdr
+        f.seek(start + size)
+
+def find(f, path: tuple[bytes, ...], end: int) -> tuple[int, int] | None:
+    """(offset, size) of the payload at `path` (e.g. (b"moov", b"mvhd")), or None."""
+    for kind, off, size in boxes(f, end):
+        if kind != path[0]: continue
+        if len(path) == 1: return off, size
+        if kind not in CONTAINERS: return None
+        f.seek(off)
+        return find(f, path[1:], off + size)
+    return None
+
+def _mvhd(f, off: int) -> float | None:
+    f.seek(off)
+    version = f.read(4)[0]
+    if version == 1:
+        _, _, scale, dur = struct.unpack(">QQIQ", f.read(28))
+    else:
+        _, _, scale, dur = struct.unpack(">IIII", f.read(16))
+    return round(dur / scale, 3) if scale else None
+
+def _tkhd_size(f, off: int) -> tuple[int, int]:
+    """Presentation width/height (16.16 fixed point after the matrix)."""
+    f.seek(off)
+    version = f.read(4)[0]
+    f.seek(off + (88 if version == 1 else 76))  # version/flags, times + ids (32 or 20), 16 reserved/layer/volume, 36 matrix
+    w, h = struct.unpack(">II", f.read(8))
+    return w >> 16, h >> 16
+
+def _track(f, off: int, size: int) -> dict:
+    """kind ('vide', 'soun', …), codec fourcc and size of one trak."""
+    out = {"kind": "", "codec": "", "width": 0, "height": 0}
+    end = off + size
+    f.seek(off); hit = find(f, (b"tkhd",), end)
+    if hit: out["width"], out["height"] = _tkhd_size(f, hit[0])
+    f.seek(off); hit = find(f, (b"mdia", b"hdlr"), end)
+    if hit:
+        f.seek(hit[0] + 8); out["kind"] = f.read(4).decode("latin-1")
+    f.seek(off); hit = find(f, (b"mdia", b"minf", b"stbl", b"stsd"), end)
+    if hit and hit[1] >= 16:
+        f.seek(hit[0] + 8)  # version/flags, entry count → first sample entry
+        entry_size, fourcc = struct.unpack(">I4s", f.read(8))
+        out["codec"] = fourcc.decode("latin-1").strip()
+        if out["kind"] == "vide" and not out["width"] and entry_size >= 36:
+            f.seek(hit[0] + 8 + 32)  # VisualSampleEntry: 6 reserved, data ref, 16 pre-defined, then w/h
+            out["width"], out["height"] = struct.unpack(">HH", f.read(4))
+    return out
+
+def probe(path: str) -> dict | None:
+    """{duration, width, height, codec, audio, audio_codec}, or None if the file isn't a readable MP4."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2); end = f.tell(); f.seek(0)
+            moov = find(f, (b"moov",), end)
+            if not moov: return None
+            off, size = moov
+            f.seek(off); hit = find(f, (b"mvhd",), off + size)
+            info = {"duration": _mvhd(f, hit[0]) if hit else None, "width": 0, "height": 0, "codec": "",
+                    "audio": False, "audio_codec": ""}
+            f.seek(off)
+            traks = [(o, s) for kind, o, s in boxes(f, off + size) if kind == b"trak"]
+            for o, s in traks:
+                t = _track(f, o, s)
+                if t["kind"] == "vide" and not info["codec"]:
+                    info.update(width=t["width"], height=t["height"], codec=t["codec"])
+                elif t["kind"] == "soun":
+                    info["audio"] = True; info["audio_codec"] = info["audio_codec"] or t["codec"]
+            return info
+    except (OSError, struct.error, IndexError, UnicodeDecodeError):
+        return None
+
+def duration(path: str) -> float | None:
+    """Movie duration in seconds, or None if the file isn't a readable MP4."""
+    return (probe(path) or {}).get("duration")
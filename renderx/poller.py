@@ -0,0 +1,121 @@
+# renderx/poller.py
+# Shared poll scheduler for every pending long-running operation.
+# - per-job adaptive interval: exponential backoff early, tight polling around the
+#   expected render time of the model, backoff again once a job is overdue
+# - jitter so many jobs started together don't poll in lockstep
+# - global pause on 429 / Retry-After so throttling stops all polls at once
+
+import time, random, logging
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger("veo_gemini_adv")
+
+# Typical server-side render time (seconds) per model prefix; longest prefix wins.
+EXPECTED_RENDER = {
+    "veo-3.0-fast": 45.0,
+    "veo-3.0": 75.0,
+    "veo-2.0": 60.0,
+}
+DEFAULT_EXPECTED = 60.0
+
+def expected_render_time(model: str | None) -> float:
+    best = ""
+    for prefix in EXPECTED_RENDER:
+        if model and model.startswith(prefix) and len(prefix) > len(best):
+            best = prefix
+    return EXPECTED_RENDER[best] if best else DEFAULT_EXPECTED
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After is either delta-seconds or an HTTP-date."""
+    if not value: return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+class PollScheduler:
+    def __init__(self, min_interval: float = 2.0, max_interval: float = 20.0, growth: float = 1.6,
+                 near_interval: float = 2.5, window: tuple[float, float] = (0.8, 1.5),
+                 jitter: float = 0.15, throttle_base: float = 5.0, throttle_max: float = 120.0,
+                 seed: int | None = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.growth = growth
+        self.near_interval = near_interval
+        self.window = window
+        self.jitter = jitter
+        self.throttle_base = throttle_base
+        self.throttle_max = throttle_max
+        self.paused_until = 0.0
+        self._strikes = 0  # consecutive throttles without a successful poll
+        self._rng = random.Random(seed)
+        self._jobs: dict[str, dict] = {}  # key -> {"started", "expected", "polls", "next"}
+
+    # ---------- tracking ----------
+    def add(self, key: str, model: str | None = None, started_at: float | None = None):
+        started = started_at or time.time()
+        entry = {"started": started, "expected": expected_render_time(model), "polls": 0, "next": started}
+        entry["next"] = started + self._interval(entry, started)
+        self._jobs[key] = entry
+
+    def remove(self, key: str):
+        self._jobs.pop(key, None)
+
+    def __contains__(self, key): return key in self._jobs
+    def __len__(self): return len(self._jobs)
+
+    # ---------- scheduling ----------
+    def due(self, now: float | None = None) -> list[str]:
+        now = now or time.time()
+        if now < self.paused_until: return []
+        return [k for k, e in self._jobs.items() if e["next"] <= now]
+
+    def record(self, key: str, now: float | None = None):
+        """A poll for `key` completed (not done yet): schedule the next one."""
+        e = self._jobs.get(key)
+        if not e: return
+        now = now or time.time()
+        e["polls"] += 1
+        e["next"] = now + self._interval(e, now)
+
+    def next_wakeup(self) -> float | None:
+        if not self._jobs: return None
+        return max(self.paused_until, min(e["next"] for e in self._jobs.values()))
+
+    @property
+    def paused(self) -> bool:
+        return time.time() < self.paused_until
+
+    # ---------- throttling ----------
+    def throttle(self, retry_after: float | None = None):
+        """Pause every poll (and kickoff) until Retry-After, or an exponential default."""
+        self._strikes += 1
+        if retry_after is None:
+            retry_after = min(self.throttle_max, self.throttle_base * 2 ** (self._strikes - 1))
+        retry_after *= 1 + self._rng.uniform(0, self.jitter)
+        until = time.time() + retry_after
+        if until > self.paused_until:
+            self.paused_until = until
+            logger.warning(f"Throttled by API, pausing polls for {retry_after:.1f}s")
+
+    def ok(self):
+        self._strikes = 0
+
+    # ---------- internals ----------
+    def _interval(self, e: dict, now: float) -> float:
+        age = now - e["started"]
+        lo, hi = e["expected"] * self.window[0], e["expected"] * self.window[1]
+        if age < lo:
+            # early: exponential backoff, but don't sleep past the start of the completion window
+            base = min(self.min_interval * self.growth ** e["polls"], self.max_interval)
+            base = max(min(base, lo - age), self.min_interval)
+        elif age <= hi:
+            base = self.near_interval
+        else:
+            overdue = (age - hi) / max(e["expected"], 1.0)
+            base = min(self.near_interval * self.growth ** (1 + 4 * overdue), self.max_interval)
+        return base * (1 + self._rng.uniform(-self.jitter, self.jitter))
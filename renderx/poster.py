@@ -0,0 +1,86 @@
+# renderx/poster.py
+# Poster images for rendered MP4s, cached in a ".posters" folder next to the videos, so the
+# results viewer can show a light thumbnail grid and only load a player for the clip opened.
+# - a real frame (JPEG, WIDTH px wide) when ffmpeg is on PATH (optional, nothing to install)
+# - otherwise an SVG placeholder in the clip's aspect ratio with duration / resolution / codec
+# A poster newer than its video is reused; renderx.fileindex makes them in its sweeper pass.
+
+import os, shutil, hashlib, subprocess, logging
+from xml.sax.saxutils import escape
+
+logger = logging.getLogger("veo_gemini_adv")
+
+POSTER_DIR = ".posters"
+WIDTH = 320
+FFMPEG_TIMEOUT = 30
+
+def ffmpeg() -> str | None:
+    return shutil.which(os.environ.get("RENDERX_FFMPEG", "ffmpeg"))
+
+def cached(path: str) -> str | None:
+    """Existing poster of `path` that is at least as new as the video."""
+    for p in (target(path, ".jpg"), target(path, ".svg")):
+        try:
+            if os.path.getmtime(p) >= os.path.getmtime(path): return p
+        except OSError:
+            continue
+    return None
+
+def target(path: str, ext: str) -> str:
+    folder, name = os.path.split(path)
+    return os.path.join(folder, POSTER_DIR, name + ext)
+
+def make(path: str, meta: dict | None = None) -> str | None:
+    """Poster for the video at `path` (cached); `meta` is renderx.mp4.probe() output."""
+    hit = cached(path)
+    if hit: return hit
+    meta = meta or {}
+    try:
+        os.makedirs(os.path.join(os.path.dirname(path), POSTER_DIR), exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Poster folder gagal dibuat: {e}"); return None
+    exe = ffmpeg()
+    if exe and meta.get("codec"):
+        out = frame(exe, path, target(path, ".jpg"), min(1.0, (meta.get("duration") or 0) / 2))
+        if out: return out
+    return placeholder(path, target(path, ".svg"), meta)
+
+def frame(exe: str, path: str, out: str, at: float) -> str | None:
+    tmp = out + ".tmp.jpg"
+    cmd = [exe, "-v", "error", "-y", "-ss", f"{at:.2f}", "-i", path, "-frames:v", "1",
+           "-vf", f"scale={WIDTH}:-2", "-q:v", "5", tmp]
+    try:
+        subprocess.run(cmd, check=True, timeout=FFMPEG_TIMEOUT, stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        os.replace(tmp, out)
+        return out
+    except (OSError, subprocess.SubprocessError) as e:
+        err = getattr(e, "stderr", b"") or b""
+        logger.warning(f"Poster frame gagal untuk {os.path.basename(path)}: {err.decode(errors='ignore')[:200] or e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return None
+
+def placeholder(path: str, out: str, meta: dict) -> str | None:
+    w, h = meta.get("width") or 16, meta.get("height") or 9
+    height = max(1, round(WIDTH * h / w))
+    hue = int(hashlib.sha1(os.path.basename(path).encode("utf-8")).hexdigest()[:4], 16) % 360
+    dur = meta.get("duration")
+    lines = [f"{dur:.1f} s" if dur else "", f"{meta['width']}×{meta['height']}" if meta.get("width") else "",
+             " • ".join(x for x in (meta.get("codec"), "audio" if meta.get("audio") else "tanpa audio") if x)
+             if meta else "bukan MP4 yang terbaca"]
+    text = "".join(f'<text x="50%" y="{56 + 14 * i}%" text-anchor="middle">{escape(t)}</text>'
+                   for i, t in enumerate(t for t in lines if t))
+    svg = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+           f'viewBox="0 0 {WIDTH} {height}" font-family="sans-serif" font-size="13" fill="#fff">'
+           f'<rect width="100%" height="100%" fill="hsl({hue},35%,28%)"/>'
+           f'<polygon points="{WIDTH / 2 - 12},{height * .38 - 14} {WIDTH / 2 - 12},{height * .38 + 14} '
+           f'{WIDTH / 2 + 14},{height * .38}" fill="#fff" fill-opacity=".8"/>{text}</svg>')
+    try:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(svg)
+        return out
+    except OSError as e:
+        logger.warning(f"Poster gagal ditulis: {e}"); return None
@@ -0,0 +1,212 @@
+# renderx/prompts.py
+# Prompt store for large prompt lists (10k+), in the job journal's SQLite file.
+# - indexed by id, by (user, seq) for paging, by (user, status) and by tag (prompt_tags)
+# - pages are LIMIT/OFFSET queries, so the editor's cost follows the page size, not the list size
+# - bulk operations (delete / tag / untag) run as single statements over ids or a filter
+# - ingestion streams line by line (plain text or JSONL with tags/params) in batches of BATCH
+# - status mirrors the latest job rendered from the prompt (NEW until it's queued once)
+
+import io, json, time, uuid, logging
+
+logger = logging.getLogger("veo_gemini_adv")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    id         TEXT PRIMARY KEY,
+    user       TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    text       TEXT NOT NULL,
+    params     TEXT NOT NULL DEFAULT '{}',
+    status     TEXT NOT NULL DEFAULT 'NEW',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_prompts_page ON prompts(user, seq);
+CREATE INDEX IF NOT EXISTS ix_prompts_status ON prompts(user, status, seq);
+CREATE INDEX IF NOT EXISTS ix_prompts_stale ON prompts(updated_at);
+CREATE TABLE IF NOT EXISTS prompt_tags (
+    prompt_id TEXT NOT NULL,
+    tag       TEXT NOT NULL,
+    PRIMARY KEY (prompt_id, tag)
+);
+CREATE INDEX IF NOT EXISTS ix_prompt_tags_tag ON prompt_tags(tag, prompt_id);
+"""
+
+NEW = "NEW"
+ACTIVE = ("QUEUED", "STARTING", "RUNNING", "DOWNLOADING")
+# filter name in the UI -> statuses
+STATUS_GROUPS = {"baru": (NEW,), "aktif": ACTIVE, "OK": ("OK",), "ERROR": ("ERROR",), "batal": ("CANCELLED",)}
+BATCH = 1000
+STALE_AFTER = 30 * 24 * 3600  # lists of sessions untouched this long are purged
+
+# accepted per-prompt param spellings in JSONL (same as the CLI)
+PARAM_ALIASES = {
+    "model": "model",
+    "aspect_ratio": "aspect_ratio", "aspectRatio": "aspect_ratio",
+    "negative_prompt": "negative_prompt", "negativePrompt": "negative_prompt",
+    "person_generation": "person_generation", "personGeneration": "person_generation",
+    "duration_seconds": "duration_seconds", "durationSeconds": "duration_seconds",
+}
+
+def split_tags(raw) -> list[str]:
+    items = raw if isinstance(raw, (list, tuple)) else str(raw or "").split(",")
+    return list(dict.fromkeys(t.strip().lower() for t in items if str(t).strip()))
+
+def parse_line(line: str) -> tuple[str, list[str], dict] | None:
+    """One input line → (text, tags, params) or None for blank/invalid lines."""
+    line = line.strip()
+    if not line: return None
+    if not line.startswith("{"):
+        return line, [], {}
+    try:
+        obj = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    text = str(obj.get("prompt") or "").strip()
+    if not text: return None
+    params = {PARAM_ALIASES[k]: v for k, v in obj.items() if k in PARAM_ALIASES}
+    return text, split_tags(obj.get("tags")), params
+
+class PromptStore:
+    def __init__(self, store):
+        self.store = store  # JobStore: shares its SQLite file and per-thread connections
+        with self.store.conn() as c:
+            c.executescript(SCHEMA)
+            c.execute("DELETE FROM prompt_tags WHERE prompt_id IN (SELECT id FROM prompts WHERE updated_at < ?)",
+                      (time.time() - STALE_AFTER,))
+            c.execute("DELETE FROM prompts WHERE updated_at < ?", (time.time() - STALE_AFTER,))
+
+    # ---------- ingestion ----------
+    def add(self, user: str, items) -> int:
+        """items: iterable of text or (text, tags, params). Inserted in batches; returns the count."""
+        c = self.store.conn()
+        seq = c.execute("SELECT COALESCE(MAX(seq), 0) FROM prompts WHERE user=?", (user,)).fetchone()[0]
+        added, rows, tags = 0, [], []
+        def flush():
+            with c:
+                c.executemany("INSERT INTO prompts (id, user, seq, text, params, created_at, updated_at) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                c.executemany("INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) VALUES (?, ?)", tags)
+            rows.clear(); tags.clear()
+        now = time.time()
+        for item in items:
+            text, item_tags, params = (item, [], {}) if isinstance(item, str) else item
+            if not text.strip(): continue
+            seq += 1; added += 1; pid = uuid.uuid4().hex
+            rows.append((pid, user, seq, text.strip(), json.dumps(params, sort_keys=True), now, now))
+            tags.extend((pid, t) for t in item_tags)
+            if len(rows) >= BATCH: flush()
+        if rows: flush()
+        return added
+
+    def ingest(self, user: str, binary, tags=()) -> tuple[int, int]:
+        """Stream a .txt / .jsonl file object line by line. Returns (added, skipped)."""
+        extra, skipped = split_tags(tags), [0]
+        def items():
+            for line in io.TextIOWrapper(binary, encoding="utf-8", errors="ignore", newline=None):
+                parsed = parse_line(line)
+                if parsed is None:
+                    if line.strip(): skipped[0] += 1
+                    continue
+                text, t, params = parsed
+                yield text, list(dict.fromkeys(t + extra)), params
+        added = self.add(user, items())
+        logger.info(f"Prompt ingest: {added} added, {skipped[0]} skipped")
+        return added, skipped[0]
+
+    # ---------- queries ----------
+    def _where(self, user: str, search: str = "", tag: str = "", status: str = "") -> tuple[str, list]:
+        sql, args = ["p.user=?"], [user]
+        if status:
+            group = STATUS_GROUPS.get(status, (status,))
+            sql.append(f"p.status IN ({', '.join('?' * len(group))})"); args.extend(group)
+        if tag:
+            sql.append("p.id IN (SELECT prompt_id FROM prompt_tags WHERE tag=?)"); args.append(tag.lower())
+        if search:
+            sql.append("p.text LIKE ? ESCAPE '\\'")
+            args.append("%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        return " AND ".join(sql), args
+
+    def count(self, user: str, **flt) -> int:
+        where, args = self._where(user, **flt)
+        return self.store.conn().execute(f"SELECT COUNT(*) FROM prompts p WHERE {where}", args).fetchone()[0]
+
+    def page(self, user: str, limit: int = 50, offset: int = 0, **flt) -> list[dict]:
+        where, args = self._where(user, **flt)
+        rows = self.store.conn().execute(
+            f"SELECT p.id, p.seq, p.text, p.status, p.params, "
+            f"(SELECT group_concat(tag, ', ') FROM prompt_tags t WHERE t.prompt_id=p.id) AS tags "
+            f"FROM prompts p WHERE {where} ORDER BY p.seq LIMIT ? OFFSET ?", (*args, limit, offset)).fetchall()
+        return [{"id": r["id"], "seq": r["seq"], "text": r["text"], "tags": r["tags"] or "",
+                 "status": r["status"], "params": json.loads(r["params"])} for r in rows]
+
+    def iter(self, user: str, **flt):
+        """All matching prompts in order, fetched in chunks (for building a batch)."""
+        offset = 0
+        while True:
+            chunk = self.page(user, limit=BATCH, offset=offset, **flt)
+            yield from chunk
+            if len(chunk) < BATCH: return
+            offset += BATCH
+
+    def tags(self, user: str) -> list[str]:
+        rows = self.store.conn().execute("SELECT DISTINCT t.tag FROM prompt_tags t JOIN prompts p ON p.id=t.prompt_id "
+                                         "WHERE p.user=? ORDER BY t.tag", (user,)).fetchall()
+        return [r[0] for r in rows]
+
+    # ---------- edits ----------
+    def update(self, pid: str, text: str | None = None, tags=None):
+        with self.store.conn() as c:
+            if text is not None and text.strip():
+                c.execute("UPDATE prompts SET text=?, updated_at=? WHERE id=?", (text.strip(), time.time(), pid))
+            if tags is not None:
+                c.execute("DELETE FROM prompt_tags WHERE prompt_id=?", (pid,))
+                c.executemany("INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) VALUES (?, ?)",
+                              [(pid, t) for t in split_tags(tags)])
+
+    def _target(self, user: str, ids=None, **flt) -> tuple[str, list]:
+        """SQL selecting prompt ids: explicit `ids`, or everything matching the filter."""
+        if ids is not None:
+            return "SELECT value FROM json_each(?)", [json.dumps(list(ids))]
+        where, args = self._where(user, **flt)
+        return f"SELECT p.id FROM prompts p WHERE {where}", args
+
+    def delete(self, user: str, ids=None, **flt) -> int:
+        sel, args = self._target(user, ids, **flt)
+        with self.store.conn() as c:
+            c.execute(f"DELETE FROM prompt_tags WHERE prompt_id IN ({sel})", args)
+            return c.execute(f"DELETE FROM prompts WHERE user=? AND id IN ({sel})", (user, *args)).rowcount
+
+    def tag(self, user: str, tag: str, ids=None, **flt) -> int:
+        sel, args = self._target(user, ids, **flt)
+        with self.store.conn() as c:
+            n = 0
+            for t in split_tags(tag):
+                n += c.execute(f"INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) "
+                               f"SELECT id, ? FROM prompts WHERE user=? AND id IN ({sel})", (t, user, *args)).rowcount
+            return n
+
+    def untag(self, user: str, tag: str, ids=None, **flt) -> int:
+        sel, args = self._target(user, ids, **flt)
+        with self.store.conn() as c:
+            return c.execute(f"DELETE FROM prompt_tags WHERE tag=? AND prompt_id IN ({sel})",
+                             (tag.strip().lower(), *args)).rowcount
+
+    def clear(self, user: str) -> int:
+        return self.delete(user)
+
+    # ---------- status ----------
+    def mark(self, ids, status: str):
+        with self.store.conn() as c:
+            c.execute("UPDATE prompts SET status=?, updated_at=? WHERE id IN (SELECT value FROM json_each(?))",
+                      (status, time.time(), json.dumps(list(ids))))
+
+    def refresh(self, user: str) -> int:
+        """Copy the latest job status onto prompts that have jobs in flight or just finished."""
+        marks = ", ".join("?" * len(ACTIVE))
+        with self.store.conn() as c:
+            return c.execute(
+                "UPDATE prompts SET status=(SELECT j.status FROM jobs j WHERE j.prompt_id=prompts.id "
+                "ORDER BY j.created_at DESC LIMIT 1) "
+                f"WHERE user=? AND status IN ({marks}) AND EXISTS (SELECT 1 FROM jobs j WHERE j.prompt_id=prompts.id)",
+                (user, *ACTIVE)).rowcount
@@ -0,0 +1,220 @@
+# renderx/retention.py
+# Disk retention for the output folder: a byte quota and a maximum idle age, enforced off the file
+# index (renderx.fileindex), so a pass is a few indexed queries and never a walk of the folder.
+# - least-recently-used first: last_access starts at the file's mtime and moves when a clip is
+#   opened or downloaded in the app (touch)
+# - pinned clips (⭐ in the viewer) are never evicted; they still count towards the quota
+# - files younger than GRACE are kept even over quota (a fresh render nobody has seen yet)
+# - an evicted file is moved to archive_dir when one is set (rename, or copy + delete across
+#   disks), else deleted; its poster goes too. The index row stays (present=0, evicted_at,
+#   archived_to), the jobs pointing at it leave the results list and the render cache forgets it
+# - limits: configure() (the app's sidebar) or RENDERX_RETENTION_GB / RENDERX_RETENTION_DAYS /
+#   RENDERX_ARCHIVE_DIR; 0 / empty = no limit / no archive
+# - a daemon sweeper runs passes every `interval` seconds or when notify() is called
+
+import os, time, errno, shutil, logging, argparse, threading
+
+from .engine import OK
+
+logger = logging.getLogger("veo_gemini_adv")
+
+def _env_float(name: str) -> float:
+    try:
+        return float(os.environ.get(name, "") or 0)
+    except ValueError:
+        return 0.0
+
+DEFAULTS = {
+    "max_bytes": int(_env_float("RENDERX_RETENTION_GB") * 1024 ** 3),   # 0 = no quota
+    "max_age": _env_float("RENDERX_RETENTION_DAYS") * 24 * 3600,       # seconds since last access, 0 = keep
+    "archive_dir": os.environ.get("RENDERX_ARCHIVE_DIR", ""),           # "" = delete evicted files
+}
+GRACE = 15 * 60   # seconds a new file is safe from the byte quota
+BATCH = 200       # files evicted per pass
+
+# command-line limits shared by `python -m renderx retention` and `python -m renderx.worker`
+def add_retention_args(p: argparse.ArgumentParser):
+    p.add_argument("--max-gb", type=float, default=None, help="byte quota of the output folder (0 = none; "
+                   "default RENDERX_RETENTION_GB)")
+    p.add_argument("--max-days", type=float, default=None, help="evict clips not opened for this long (0 = keep; "
+                   "default RENDERX_RETENTION_DAYS)")
+    p.add_argument("--archive-dir", default=None, help="move evicted files here instead of deleting them "
+                   "(default RENDERX_ARCHIVE_DIR)")
+
+def retention_settings(args) -> dict:
+    """Parsed add_retention_args() options → Retention settings (None = keep the env default)."""
+    return {"max_bytes": None if args.max_gb is None else int(args.max_gb * 1024 ** 3),
+            "max_age": None if args.max_days is None else args.max_days * 86400, "archive_dir": args.archive_dir}
+
+class Retention:
+    def __init__(self, index, cache=None, **settings):
+        self.index = index          # FileIndex: owns the `files` table (pinned / last_access columns)
+        self.store = index.store
+        self.cache = cache          # RenderCache or None: entries of evicted files are dropped
+        self.settings = dict(DEFAULTS)
+        self.last: dict = {}        # result of the latest sweep (n, bytes, at)
+        self._lock = threading.Lock()  # one sweep at a time (sweeper thread vs "run now")
+        self._over = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.configure(**settings)
+
+    def configure(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown retention option(s): {', '.join(sorted(unknown))}")
+        self.settings.update({k: v for k, v in settings.items() if v is not None})
+
+    @property
+    def active(self) -> bool:
+        return bool(self.settings["max_bytes"] or self.settings["max_age"])
+
+    # ---------- clips ----------
+    def touch(self, paths):
+        """The clips were opened / downloaded: most recently used now."""
+        with self.store.conn() as c:
+            c.executemany("UPDATE files SET last_access=? WHERE path=?", [(time.time(), p) for p in paths if p])
+
+    def pin(self, path: str, pinned: bool = True):
+        with self.store.conn() as c:
+            c.execute("UPDATE files SET pinned=? WHERE path=?", (int(pinned), path))
+
+    # ---------- policy ----------
+    def used(self) -> int:
+        return self.store.conn().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM files WHERE present=1").fetchone()[0]
+
+    def plan(self, now: float | None = None) -> list[dict]:
+        """Next files to evict (at most BATCH), least recently used first, with the reason."""
+        now = now or time.time()
+        max_bytes, max_age = self.settings["max_bytes"], self.settings["max_age"]
+        if not (max_bytes or max_age): return []
+        used = self.used() if max_bytes else 0
+        over = bool(max_bytes) and used > max_bytes
+        if not over and not max_age: return []
+        # oldest first over ix_files_lru; stop at the first file that breaks neither limit
+        newest = now - GRACE if over else now - max_age
+        out = []
+        for r in self.store.conn().execute(
+                "SELECT path, size, poster, last_access FROM files WHERE present=1 AND pinned=0 AND last_access < ? "
+                "ORDER BY last_access LIMIT ?", (newest, BATCH)):
+            if max_age and r["last_access"] < now - max_age:
+                reason = "age"
+            elif max_bytes and used > max_bytes:
+                reason = "quota"
+            else:
+                break
+            out.append({**dict(r), "reason": reason}); used -= r["size"]
+        return out
+
+    def evict(self, rows) -> list[str]:
+        """Archive or delete the files of `rows` (plan() output). Returns the paths evicted."""
+        archive_dir, done = self.settings["archive_dir"], []
+        for r in rows:
+            path = r["path"]
+            try:
+                dest = self._archive(path, archive_dir) if archive_dir else os.remove(path) or ""
+            except FileNotFoundError:
+                dest = ""  # gone already: only the index is behind
+            except OSError as e:
+                logger.warning(f"Retention: {os.path.basename(path)} gagal di-{'arsip' if archive_dir else 'hapus'}: {e}")
+                continue
+            if r.get("poster"):
+                try:
+                    os.remove(r["poster"])
+                except OSError:
+                    pass
+            done.append((path, dest))
+            logger.info(f"Retention: {os.path.basename(path)} ({r['size'] / 1024**2:.1f} MB, {r.get('reason', '')}) "
+                        + (f"→ {dest}" if dest else "dihapus"))
+        if not done: return []
+        now = time.time(); paths = [p for p, _ in done]
+        with self.store.conn() as c:
+            c.executemany("UPDATE files SET present=0, evicted_at=?, archived_to=?, checked_at=? WHERE path=?",
+                          [(now, dest, now, p) for p, dest in done])
+            marks = ", ".join("?" * len(paths))
+            c.execute(f"UPDATE jobs SET hidden=1 WHERE status=? AND path IN ({marks})", (OK, *paths))
+        if self.cache: self.cache.forget(paths)
+        return paths
+
+    def discard(self, paths) -> list[str]:
+        """Evict these files now (cleared from the results list), pinned ones excepted."""
+        rows = [{**r, "reason": "cleared"} for r in self.index.lookup(paths).values() if r["present"] and not r["pinned"]]
+        with self._lock:
+            return self.evict(rows)
+
+    @staticmethod
+    def _archive(path: str, archive_dir: str) -> str:
+        if os.path.realpath(os.path.dirname(path)) == os.path.realpath(archive_dir):
+            raise OSError("folder arsip sama dengan folder output")
+        os.makedirs(archive_dir, exist_ok=True)
+        stem, ext = os.path.splitext(os.path.basename(path))
+        dest, n = os.path.join(archive_dir, stem + ext), 1
+        while os.path.exists(dest):
+            dest = os.path.join(archive_dir, f"{stem}_{n}{ext}"); n += 1
+        try:
+            os.rename(path, dest)
+        except OSError as e:
+            if e.errno != errno.EXDEV: raise
+            tmp = dest + ".part"  # other disk: never leave a half-copied file under the final name
+            try:
+                shutil.copy2(path, tmp); os.replace(tmp, dest)
+            except OSError:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                raise
+            os.remove(path)
+        return dest
+
+    def sweep(self) -> dict:
+        """Evict until both limits hold (or only pinned / GRACE files are left)."""
+        n = size = 0
+        with self._lock:
+            while True:
+                rows = self.plan()
+                evicted = set(self.evict(rows))
+                n += len(evicted); size += sum(r["size"] for r in rows if r["path"] in evicted)
+                if len(rows) < BATCH or not evicted: break
+            self.last = {"n": n, "bytes": size, "at": time.time()}
+        if n:
+            logger.info(f"Retention: {n} file dievict ({size / 1024**3:.2f} GB)")
+        max_bytes = self.settings["max_bytes"]
+        over = bool(max_bytes) and self.used() > max_bytes
+        if over and not self._over:  # once per episode, not every pass
+            logger.warning("Retention: kuota masih terlampaui (sisa file di-pin atau baru dirender)")
+        self._over = over
+        return self.last
+
+    # ---------- sweeper ----------
+    def start(self, interval: float = 300.0) -> "Retention":
+        if self._thread and self._thread.is_alive(): return self
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    if self.active: self.sweep()
+                except Exception as e:
+                    logger.warning(f"Retention pass failed: {e}")
+                self._wake.wait(interval); self._wake.clear()
+        self._thread = threading.Thread(target=loop, name="renderx-retention", daemon=True)
+        self._thread.start()
+        return self
+
+    def notify(self):
+        """New files or new limits: run a pass now instead of at the next interval."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+
+    # ---------- reads ----------
+    def stats(self) -> dict:
+        r = self.store.conn().execute(
+            "SELECT COALESCE(SUM(CASE WHEN present THEN size END), 0) AS bytes, "
+            "COALESCE(SUM(CASE WHEN present AND pinned THEN 1 END), 0) AS pinned, "
+            "COALESCE(SUM(CASE WHEN present AND pinned THEN size END), 0) AS pinned_bytes, "
+            "COALESCE(SUM(evicted_at > 0 AND present=0), 0) AS evicted, "
+            "COALESCE(SUM(evicted_at > 0 AND present=0 AND archived_to != ''), 0) AS archived FROM files").fetchone()
+        return {**{k: r[k] for k in ("bytes", "pinned", "pinned_bytes", "evicted", "archived")}, **self.settings}
@@ -0,0 +1,389 @@
+# renderx/store.py
+# Durable job journal (SQLite, WAL) under the output folder.
+# Every engine state change is written here, so a rerun, refresh or server restart
+# can reattach to operations that are still rendering instead of paying for them twice.
+# - one connection per thread (sqlite3 objects aren't shareable), WAL = readers never block the writer
+# - indexed by (status, hidden, finished_at) for the results viewer, operation and batch for lookups
+# - `owner` = host:pid:engine-token of the engine driving a job; jobs whose owner is gone are orphans
+# - QUEUED rows with no owner are the work queue: workers claim them atomically (compare-and-set
+#   on owner), one user at a time round-robin, so any number of UI sessions/processes can share it
+# - claims take the highest priority first; a paused job (paused=1) is skipped until resumed
+# - cancel / paused are requests to whichever engine owns a row; they are never written by save(),
+#   so a journal write from the engine can't clear them (renderx.worker acts on them)
+
+import os, json, time, socket, sqlite3, threading, logging
+
+from .engine import Job, QUEUED, STARTING, RUNNING, DOWNLOADING, OK, ERROR, CANCELLED, NORMAL
+from .errors import RETRYABLE
+
+logger = logging.getLogger("veo_gemini_adv")
+
+DB_NAME = "renderx_jobs.sqlite3"
+ACTIVE = (QUEUED, STARTING, RUNNING, DOWNLOADING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    batch_id    TEXT NOT NULL DEFAULT '',
+    idx         INTEGER NOT NULL,
+    prompt      TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    model       TEXT,
+    status      TEXT NOT NULL,
+    operation   TEXT NOT NULL DEFAULT '',
+    uri         TEXT NOT NULL DEFAULT '',
+    path        TEXT NOT NULL DEFAULT '',
+    fname       TEXT NOT NULL DEFAULT '',
+    error       TEXT NOT NULL DEFAULT '',
+    polls       INTEGER NOT NULL DEFAULT 0,
+    owner       TEXT NOT NULL DEFAULT '',
+    hidden      INTEGER NOT NULL DEFAULT 0,
+    auto_done   INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    started_at  REAL NOT NULL DEFAULT 0,
+    finished_at REAL NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_viewer ON jobs(status, hidden, finished_at DESC);
+CREATE INDEX IF NOT EXISTS ix_jobs_operation ON jobs(operation);
+CREATE INDEX IF NOT EXISTS ix_jobs_batch ON jobs(batch_id, idx);
+"""
+
+# Columns added after the first release: name -> DDL. Applied with ALTER TABLE when missing.
+ADDED_COLUMNS = {
+    "cache_key": "TEXT NOT NULL DEFAULT ''",
+    "cached": "INTEGER NOT NULL DEFAULT 0",
+    "user": "TEXT NOT NULL DEFAULT ''",
+    "key_id": "TEXT NOT NULL DEFAULT ''",
+    "pool": "TEXT NOT NULL DEFAULT ''",
+    "prompt_id": "TEXT NOT NULL DEFAULT ''",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "error_class": "TEXT NOT NULL DEFAULT ''",
+    "priority": f"INTEGER NOT NULL DEFAULT {NORMAL}",
+    "cancel": "INTEGER NOT NULL DEFAULT 0",
+    "paused": "INTEGER NOT NULL DEFAULT 0",
+}
+ADDED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_jobs_queue ON jobs(status, owner, user, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_prompt ON jobs(prompt_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs(status, owner, user, priority DESC, created_at, idx)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_control ON jobs(owner) WHERE cancel=1 OR paused=1",
+)
+# data fixups for rows written before a column existed (idempotent)
+BACKFILLS = (
+    "UPDATE jobs SET pool=key_id WHERE pool='' AND key_id != ''",  # single-key pool id == key id
+)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.conn() as c:
+            c.executescript(SCHEMA)
+            have = {r["name"] for r in c.execute("PRAGMA table_info(jobs)")}
+            for name, ddl in ADDED_COLUMNS.items():
+                if name not in have:
+                    c.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl}")
+            for ddl in ADDED_INDEXES:
+                c.execute(ddl)
+            if "pool" not in have:
+                for sql in BACKFILLS: c.execute(sql)
+
+    @classmethod
+    def in_folder(cls, output_folder: str) -> "JobStore":
+        return cls(os.path.join(output_folder, DB_NAME))
+
+    def conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.path, timeout=30)
+            c.row_factory = sqlite3.Row
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+    # ---------- writes ----------
+    def save(self, job: Job):
+        """Upsert the job's current state (called on every engine update)."""
+        self.save_many([job])
+
+    def save_many(self, jobs):
+        rows = [self._to_row(j) for j in jobs]
+        if not rows: return
+        cols = ", ".join(rows[0]); marks = ", ".join(f":{k}" for k in rows[0])
+        # auto_done is a UI flag: set on insert, only a status change re-arms it
+        updates = ", ".join(f"{k}=excluded.{k}" for k in rows[0] if k not in ("id", "created_at", "auto_done"))
+        updates += ", auto_done=CASE WHEN jobs.status != excluded.status THEN excluded.auto_done ELSE jobs.auto_done END"
+        with self.conn() as c:
+            c.executemany(f"INSERT INTO jobs ({cols}) VALUES ({marks}) ON CONFLICT(id) DO UPDATE SET {updates}", rows)
+
+    # ---------- queue ----------
+    def enqueue(self, jobs):
+        """Add jobs as unclaimed QUEUED rows (any worker may pick them up)."""
+        for job in jobs:
+            job.status = QUEUED; job.owner = ""
+        self.save_many(jobs)
+
+    def queued_users(self, pools) -> list[tuple[str, int]]:
+        """(user, highest priority waiting) for users with unclaimed work that can run on one of `pools`
+        (key pool ids): highest priority first, then oldest waiting."""
+        if not pools: return []
+        marks = ", ".join("?" * len(pools))
+        rows = self.conn().execute(
+            f"SELECT user, MAX(priority) AS priority, MIN(created_at) AS since FROM jobs WHERE status=? AND owner='' "
+            f"AND paused=0 AND pool IN ({marks}) GROUP BY user ORDER BY priority DESC, since", (QUEUED, *pools)).fetchall()
+        return [(r["user"], r["priority"]) for r in rows]
+
+    def claim_next(self, user: str, pools, owner: str) -> Job | None:
+        """Atomically take the highest-priority, oldest unclaimed job of `user` for engine `owner`."""
+        marks = ", ".join("?" * len(pools))
+        c = self.conn()
+        for _ in range(5):  # lost races against other workers → try the next row
+            r = c.execute(f"SELECT * FROM jobs WHERE status=? AND owner='' AND user=? AND paused=0 AND pool IN ({marks}) "
+                          "ORDER BY priority DESC, created_at, idx LIMIT 1", (QUEUED, user, *pools)).fetchone()
+            if not r: return None
+            with c:  # status / paused re-checked: a cancel or pause may have landed since the SELECT
+                won = c.execute("UPDATE jobs SET owner=?, updated_at=? WHERE id=? AND owner='' AND status=? AND paused=0",
+                                (owner, time.time(), r["id"], QUEUED)).rowcount
+            if won:
+                job = self._to_job(r); job.owner = owner
+                return job
+        return None
+
+    def adopt(self, job: Job, owner: str) -> bool:
+        """Take over an orphan (compare-and-set on its previous owner)."""
+        with self.conn() as c:
+            won = c.execute("UPDATE jobs SET owner=?, updated_at=? WHERE id=? AND owner=?",
+                            (owner, time.time(), job.id, job.owner)).rowcount
+        if won: job.owner = owner
+        return bool(won)
+
+    def release(self, job: Job):
+        """Put an orphaned, never-started job back in the queue."""
+        with self.conn() as c:
+            c.execute("UPDATE jobs SET owner='', status=? WHERE id=? AND owner=?", (QUEUED, job.id, job.owner))
+
+    # ---------- control (cancel / pause / priority) ----------
+    @staticmethod
+    def _selected(job_ids=None, batch_ids=None) -> tuple[str, list]:
+        if job_ids is not None: return f"id IN ({', '.join('?' * len(job_ids))})", list(job_ids)
+        return f"batch_id IN ({', '.join('?' * len(batch_ids))})", list(batch_ids)
+
+    def cancel(self, job_ids=None, batch_ids=None) -> int:
+        """Cancel unfinished jobs: unclaimed ones right here, claimed ones by flagging them for their
+        engine (which also cancels the remote operation). Returns how many were affected."""
+        if not (job_ids or batch_ids): return 0
+        where, args = self._selected(job_ids, batch_ids); now = time.time()
+        marks = ", ".join("?" * len(ACTIVE))
+        with self.conn() as c:
+            n = c.execute(f"UPDATE jobs SET status=?, error='Dibatalkan.', finished_at=?, updated_at=? "
+                          f"WHERE {where} AND status=? AND owner=''", (CANCELLED, now, now, *args, QUEUED)).rowcount
+            n += c.execute(f"UPDATE jobs SET cancel=1, updated_at=? WHERE {where} AND status IN ({marks}) "
+                           "AND owner != '' AND cancel=0", (now, *args, *ACTIVE)).rowcount
+        if n: logger.info(f"Cancel requested for {n} job(s)")
+        return n
+
+    def pause(self, batch_ids, paused: bool = True) -> int:
+        """Hold (or release) the queued jobs of whole batches. Operations already rendering finish."""
+        if not batch_ids: return 0
+        where, args = self._selected(batch_ids=batch_ids)
+        with self.conn() as c:
+            return c.execute(f"UPDATE jobs SET paused=?, updated_at=? WHERE {where} AND status=? AND paused=?",
+                             (int(paused), time.time(), *args, QUEUED, int(not paused))).rowcount
+
+    def paused_batches(self, batch_ids) -> set[str]:
+        if not batch_ids: return set()
+        where, args = self._selected(batch_ids=batch_ids)
+        rows = self.conn().execute(f"SELECT DISTINCT batch_id FROM jobs WHERE {where} AND status=? AND paused=1",
+                                   (*args, QUEUED)).fetchall()
+        return {r[0] for r in rows}
+
+    def set_priority(self, priority: int, job_ids=None, batch_ids=None) -> int:
+        """Re-prioritize jobs that are still waiting in the queue."""
+        if not (job_ids or batch_ids): return 0
+        where, args = self._selected(job_ids, batch_ids)
+        with self.conn() as c:
+            return c.execute(f"UPDATE jobs SET priority=?, updated_at=? WHERE {where} AND status=? AND priority != ?",
+                             (priority, time.time(), *args, QUEUED, priority)).rowcount
+
+    def requests(self, owner: str) -> list[sqlite3.Row]:
+        """(id, cancel, paused) of unfinished jobs of engine `owner` that were flagged since it claimed them."""
+        marks = ", ".join("?" * len(ACTIVE))
+        return self.conn().execute(f"SELECT id, cancel, paused FROM jobs WHERE owner=? AND (cancel=1 OR paused=1) "
+                                   f"AND status IN ({marks}) AND (cancel=1 OR status=?)",
+                                   (owner, *ACTIVE, QUEUED)).fetchall()  # paused only matters before kickoff
+
+    def finish_cancelled(self, job_id: str):
+        """A flagged job its owner no longer has in memory (e.g. lost in a crash before it started)."""
+        now = time.time()
+        with self.conn() as c:
+            c.execute(f"UPDATE jobs SET status=?, error='Dibatalkan.', finished_at=?, updated_at=? WHERE id=? "
+                      f"AND status IN ({', '.join('?' * len(ACTIVE))})", (CANCELLED, now, now, job_id, *ACTIVE))
+
+    def _retryable(self, batch_ids=None) -> tuple[str, list]:
+        sql = f"status=? AND error_class IN ({', '.join('?' * len(RETRYABLE))})"; args = [ERROR, *RETRYABLE]
+        if batch_ids is not None:
+            sql += f" AND batch_id IN ({', '.join('?' * len(batch_ids))})"; args += list(batch_ids)
+        return sql, args
+
+    def count_retryable(self, batch_ids=None) -> int:
+        if batch_ids is not None and not batch_ids: return 0
+        sql, args = self._retryable(batch_ids)
+        return self.conn().execute(f"SELECT COUNT(*) FROM jobs WHERE {sql}", args).fetchone()[0]
+
+    def resubmit(self, batch_ids=None, owner: str = "") -> list[Job]:
+        """Put retryable ERROR jobs back in the queue (claimed by `owner` right away if given).
+        Operation, URI and path are kept: a finished render is downloaded again, not re-rendered."""
+        if batch_ids is not None and not batch_ids: return []
+        sql, args = self._retryable(batch_ids)
+        c = self.conn()
+        with c:
+            rows = c.execute(f"SELECT * FROM jobs WHERE {sql} ORDER BY created_at, idx", args).fetchall()
+            c.executemany("UPDATE jobs SET status=?, owner=?, error='', error_class='', attempts=0, polls=0, "
+                          "started_at=0, finished_at=0, hidden=0, auto_done=1, cancel=0, paused=0, updated_at=? "
+                          "WHERE id=? AND status=?",
+                          [(QUEUED, owner, time.time(), r["id"], ERROR) for r in rows])
+        jobs = [self._to_job(r) for r in rows]
+        for j in jobs:
+            j.status = QUEUED; j.owner = owner; j.error = j.error_class = ""; j.attempts = j.polls = 0
+            j.started_at = j.finished_at = 0.0
+        if jobs: logger.info(f"Resubmitted {len(jobs)} failed job(s)")
+        return jobs
+
+    def batch(self, batch_id: str) -> list[Job]:
+        rows = self.conn().execute("SELECT * FROM jobs WHERE batch_id=? ORDER BY idx", (batch_id,)).fetchall()
+        return [self._to_job(r) for r in rows]
+
+    def jobs(self, batch_ids, only=None, exclude=None, limit: int = 50) -> list[Job]:
+        """Jobs of the given batches, filtered by status, oldest first (bounded by `limit`)."""
+        if not batch_ids: return []
+        sql = f"SELECT * FROM jobs WHERE batch_id IN ({', '.join('?' * len(batch_ids))})"
+        args = list(batch_ids)
+        if only:
+            sql += f" AND status IN ({', '.join('?' * len(only))})"; args += list(only)
+        if exclude:
+            sql += f" AND status NOT IN ({', '.join('?' * len(exclude))})"; args += list(exclude)
+        rows = self.conn().execute(sql + " ORDER BY created_at, idx LIMIT ?", (*args, limit)).fetchall()
+        return [self._to_job(r) for r in rows]
+
+    def status_counts(self, batch_ids=None) -> dict[str, int]:
+        if batch_ids is not None:
+            if not batch_ids: return {}
+            marks = ", ".join("?" * len(batch_ids))
+            rows = self.conn().execute(f"SELECT status, COUNT(*) AS n FROM jobs WHERE batch_id IN ({marks}) "
+                                       "GROUP BY status", tuple(batch_ids)).fetchall()
+        else:
+            marks = ", ".join("?" * len(ACTIVE))
+            rows = self.conn().execute(f"SELECT status, COUNT(*) AS n FROM jobs WHERE status IN ({marks}) "
+                                       "GROUP BY status", ACTIVE).fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def active_batches(self) -> list[dict]:
+        """Batches with unfinished jobs, oldest first: batch_id, user, active jobs, created_at, prompt."""
+        marks = ", ".join("?" * len(ACTIVE))
+        rows = self.conn().execute(
+            f"SELECT batch_id, user, COUNT(*) AS active, MIN(created_at) AS created_at, MIN(prompt) AS prompt "
+            f"FROM jobs WHERE status IN ({marks}) AND batch_id != '' GROUP BY batch_id ORDER BY created_at",
+            ACTIVE).fetchall()
+        return [dict(r) for r in rows]
+
+    def mark_auto_done(self, job_id: str):
+        with self.conn() as c:
+            c.execute("UPDATE jobs SET auto_done=1 WHERE id=?", (job_id,))
+
+    def hide(self, job_ids):
+        with self.conn() as c:
+            c.executemany("UPDATE jobs SET hidden=1 WHERE id=?", [(i,) for i in job_ids])
+
+    def hide_all(self):
+        with self.conn() as c:
+            c.execute("UPDATE jobs SET hidden=1 WHERE hidden=0 AND status IN (?, ?, ?)", (OK, ERROR, CANCELLED))
+
+    # ---------- reads ----------
+    def get(self, job_id: str) -> Job | None:
+        r = self.conn().execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return self._to_job(r) if r else None
+
+    def results(self, status: str = OK, limit: int = 20, offset: int = 0) -> list[dict]:
+        """Newest-first visible results in the dict shape the viewer uses (served from ix_jobs_viewer)."""
+        rows = self.conn().execute(
+            "SELECT * FROM jobs WHERE status=? AND hidden=0 ORDER BY finished_at DESC LIMIT ? OFFSET ?",
+            (status, limit, offset)).fetchall()
+        return [self._to_result(r) for r in rows]
+
+    def count(self, status: str = OK) -> int:
+        return self.conn().execute("SELECT COUNT(*) FROM jobs WHERE status=? AND hidden=0", (status,)).fetchone()[0]
+
+    def result_paths(self, status: str = OK) -> list[str]:
+        rows = self.conn().execute("SELECT path FROM jobs WHERE status=? AND hidden=0 AND path != '' "
+                                    "ORDER BY finished_at DESC", (status,)).fetchall()
+        return [r[0] for r in rows]
+
+    def next_auto_download(self) -> dict | None:
+        r = self.conn().execute("SELECT * FROM jobs WHERE status=? AND hidden=0 AND auto_done=0 "
+                                 "ORDER BY finished_at LIMIT 1", (OK,)).fetchone()
+        return self._to_result(r) if r else None
+
+    def active(self) -> list[Job]:
+        marks = ", ".join("?" * len(ACTIVE))
+        rows = self.conn().execute(f"SELECT * FROM jobs WHERE status IN ({marks}) ORDER BY created_at, idx",
+                                    ACTIVE).fetchall()
+        return [self._to_job(r) for r in rows]
+
+    def orphans(self, live_owners=()) -> list[Job]:
+        """Claimed active jobs whose engine is gone (other pid dead, or same pid but engine not live)."""
+        host, pid = socket.gethostname(), os.getpid()
+        out = []
+        marks = ", ".join("?" * len(ACTIVE))
+        for r in self.conn().execute(f"SELECT * FROM jobs WHERE status IN ({marks}) AND owner != '' "
+                                     "ORDER BY created_at, idx", ACTIVE):
+            owner = r["owner"]
+            if owner in live_owners: continue
+            try:
+                o_host, o_pid, _ = owner.split(":", 2)
+                if o_host == host and int(o_pid) != pid and _pid_alive(int(o_pid)): continue
+                if o_host != host and time.time() - r["updated_at"] < 600: continue  # other host, recently alive
+            except ValueError:
+                pass
+            out.append(self._to_job(r))
+        return out
+
+    # ---------- mapping ----------
+    @staticmethod
+    def _to_row(job: Job) -> dict:
+        return {"id": job.id, "batch_id": job.batch_id, "idx": job.index, "prompt": job.prompt,
+                "params": json.dumps(job.params, sort_keys=True), "model": job.params.get("model"),
+                "status": job.status, "operation": job.operation, "uri": job.uri, "path": job.path,
+                "fname": job.fname, "error": job.error, "polls": job.polls, "owner": job.owner,
+                "cache_key": job.cache_key, "cached": int(job.cached), "user": job.user, "key_id": job.key_id,
+                "pool": job.pool, "prompt_id": job.prompt_id, "attempts": job.attempts, "error_class": job.error_class,
+                "priority": job.priority,
+                "auto_done": int(job.status != OK), "created_at": job.created_at,
+                "started_at": job.started_at, "finished_at": job.finished_at, "updated_at": time.time()}
+
+    @staticmethod
+    def _to_job(r: sqlite3.Row) -> Job:
+        return Job(index=r["idx"], prompt=r["prompt"], params=json.loads(r["params"]), id=r["id"],
+                   status=r["status"], operation=r["operation"], uri=r["uri"], path=r["path"],
+                   fname=r["fname"], error=r["error"], polls=r["polls"], started_at=r["started_at"],
+                   finished_at=r["finished_at"], batch_id=r["batch_id"], created_at=r["created_at"],
+                   cache_key=r["cache_key"], cached=bool(r["cached"]), owner=r["owner"],
+                   user=r["user"], key_id=r["key_id"], pool=r["pool"],
+                   prompt_id=r["prompt_id"], attempts=r["attempts"], error_class=r["error_class"],
+                   priority=r["priority"])
+
+    @staticmethod
+    def _to_result(r: sqlite3.Row) -> dict:
+        return {"id": r["id"], "index": r["idx"], "status": r["status"], "path": r["path"],
+                "fname": r["fname"], "prompt": r["prompt"], "auto_done": bool(r["auto_done"])}
@@ -0,0 +1,208 @@
+# renderx/worker.py
+# Headless render worker: owns a BatchEngine in a daemon thread and consumes the job
+# journal's queue (unclaimed QUEUED rows). The UI only enqueues and reads status, so a
+# batch keeps running when the tab closes, and every session shares one worker pool.
+# - fair scheduling: free slots go to the highest priority waiting, round-robin across the users
+#   with work at that priority; when no slot is free, not-yet-started lower-priority jobs are
+#   handed back to the queue (preemption) — operations already rendering are never interrupted
+# - cancel / pause requests written to the journal by any process are applied every loop
+# - API keys stay in memory in a KeyPool; a job only runs once its key pool is registered,
+#   and kicks off on whichever key of the pool has quota (renderx.keypool)
+# - orphaned jobs (engine gone) are adopted and their operations polled again
+#
+# Standalone process (shares the queue with the app):
+#   GEMINI_API_KEY=AIza...,AIzb... python -m renderx.worker --output ~/Downloads/VEO_OUTPUT --concurrency 8
+# With --max-gb / --max-days (or RENDERX_RETENTION_GB / _DAYS) it also runs the file index and
+# retention sweepers, so a render host without the app open keeps its disk in check.
+
+import os, sys, time, threading, logging, argparse
+from collections import deque
+
+from .engine import BatchEngine, LIVE_OWNERS, QUEUED
+from .store import JobStore
+from .cache import RenderCache
+from .fileindex import FileIndex
+from .retention import Retention, add_retention_args, retention_settings
+from .keypool import KeyPool, split_keys
+from .metrics import METRICS
+
+logger = logging.getLogger("veo_gemini_adv")
+
+class Worker:
+    def __init__(self, store: JobStore, output_folder: str, cache: RenderCache | None = None,
+                 concurrency: int = 4, orphan_every: float = 15.0, keys: KeyPool | None = None):
+        self.store = store
+        self.output_folder = output_folder
+        self.cache = cache
+        self.concurrency = concurrency
+        self.orphan_every = orphan_every
+        self.keys = keys or KeyPool()
+        self.engine: BatchEngine | None = None
+        self._users: deque[str] = deque()  # round-robin order
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._next_orphan_scan = 0.0
+
+    # ---------- control ----------
+    def start(self) -> "Worker":
+        if self._thread and self._thread.is_alive(): return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="renderx-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True):
+        self._stop.set(); self._wake.set()
+        if wait and self._thread: self._thread.join()
+
+    @property
+    def alive(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def set_concurrency(self, n: int):
+        self.concurrency = max(1, int(n))
+        if self.engine: self.engine.concurrency = self.concurrency
+        self._wake.set()
+
+    def add_keys(self, api_keys) -> str:
+        """Register one key or a pool of keys (list, or comma/newline separated). Returns the pool id."""
+        known = set(self.keys.pools)
+        pool = self.keys.add(api_keys)
+        if pool and pool not in known:
+            self._next_orphan_scan = 0.0; self._wake.set()
+        return pool
+
+    # ---------- producer side (UI / CLI) ----------
+    def enqueue(self, jobs, user: str, api_key) -> list:
+        """Queue jobs for `user`; `api_key` is one key or a pool (see add_keys)."""
+        pool = self.add_keys(api_key)
+        for job in jobs:
+            job.user = user; job.pool = pool; job.key_id = ""
+        self.store.enqueue(jobs)
+        self._wake.set()
+        return jobs
+
+    def cancel(self, job_ids=None, batch_ids=None) -> int:
+        """Cancel jobs (or whole batches); running operations are cancelled on the server too."""
+        n = self.store.cancel(job_ids, batch_ids)
+        if n: self._wake.set()
+        return n
+
+    def pause(self, batch_ids, paused: bool = True) -> int:
+        """Hold / release the queued jobs of whole batches."""
+        n = self.store.pause(batch_ids, paused)
+        if n: self._wake.set()
+        return n
+
+    def set_priority(self, priority: int, job_ids=None, batch_ids=None) -> int:
+        n = self.store.set_priority(priority, job_ids, batch_ids)
+        if n: self._wake.set()
+        return n
+
+    def resubmit(self, batch_ids=None) -> list:
+        """Re-queue failed jobs whose error class is retryable (renderx.errors.RETRYABLE)."""
+        jobs = self.store.resubmit(batch_ids)
+        if jobs: self._wake.set()
+        return jobs
+
+    # ---------- loop ----------
+    def _run(self):
+        logger.info("Worker started")
+        with BatchEngine("", self.output_folder, concurrency=self.concurrency, store=self.store,
+                         cache=self.cache, keys=self.keys) as engine:
+            self.engine = engine
+            while not self._stop.is_set():
+                try:
+                    if time.time() >= self._next_orphan_scan:
+                        self._adopt_orphans(engine)
+                        self._next_orphan_scan = time.time() + self.orphan_every
+                    self._control(engine)
+                    self._fill(engine)
+                    if engine.idle:
+                        self._wake.wait(1.0); self._wake.clear()
+                        continue
+                    engine.step(max_wait=0.5)
+                except Exception as e:  # never let one bad row kill the shared worker
+                    logger.exception(f"Worker loop error: {e}"); time.sleep(1.0)
+        self.engine = None
+        logger.info("Worker stopped")
+
+    def _control(self, engine: BatchEngine):
+        """Apply cancel / pause requests for jobs this engine owns."""
+        for r in self.store.requests(engine.owner):
+            if r["cancel"]:
+                if not engine.cancel(r["id"]): self.store.finish_cancelled(r["id"])
+            else:
+                job = engine.withdraw(r["id"])
+                if job: self.store.release(job)
+
+    def _fill(self, engine: BatchEngine):
+        """Claim queued jobs into free slots: highest priority first, one per user per round (fair share)."""
+        pools = tuple(self.keys.pools.copy())  # the UI thread may add keys concurrently
+        while True:
+            waiting = self.store.queued_users(pools)
+            if not waiting: return
+            top = waiting[0][1]
+            if engine.slots(top) <= 0:
+                bumped = engine.preempt(top)
+                for job in bumped: self.store.release(job)
+                if engine.slots(top) <= 0: return
+            waiting = {u for u, p in waiting if p == top}
+            for u in waiting:
+                if u not in self._users: self._users.append(u)
+            for _ in range(len(self._users)):
+                u = self._users[0]; self._users.rotate(-1)
+                if u not in waiting: continue
+                job = self.store.claim_next(u, pools, engine.owner)
+                if job:  # a resubmitted job may still have its operation: poll/download it again
+                    (engine.attach if job.operation else engine.submit)(job); break
+            else:
+                return  # every candidate lost a race; retry next round
+
+    def _adopt_orphans(self, engine: BatchEngine):
+        for job in self.store.orphans(LIVE_OWNERS):
+            if job.status == QUEUED:
+                self.store.release(job); continue
+            if job.key_id and job.key_id not in self.keys: continue  # its operation's key must be known
+            if self.store.adopt(job, engine.owner):
+                engine.attach(job)
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m renderx.worker", description="RenderX headless render worker")
+    ap.add_argument("--output", default=os.path.join(os.path.expanduser("~"), "Downloads", "VEO_OUTPUT"))
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--metrics-file", default=None, help="write Prometheus text metrics here every 15 s")
+    ap.add_argument("--log-level", default="INFO")
+    add_retention_args(ap)
+    args = ap.parse_args(argv)
+    args.output = os.path.abspath(os.path.expanduser(args.output))  # paths in the shared journal must not depend on cwd
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO),
+                        format="%(asctime)s | %(levelname)s | %(message)s")
+    keys = split_keys(os.environ.get("GEMINI_API_KEY", ""))
+    if not keys:
+        print("GEMINI_API_KEY belum di-set (boleh beberapa, pisahkan dengan koma).", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    store = JobStore.in_folder(args.output)
+    cache = RenderCache(store)
+    worker = Worker(store, args.output, cache=cache, concurrency=args.concurrency)
+    retention = Retention(FileIndex(store), cache=cache, **retention_settings(args))
+    if retention.active:
+        retention.index.start(args.output); retention.start()
+    worker.add_keys(keys)
+    for k in keys: worker.add_keys(k)  # journaled single-key jobs (pool id == key id) can run too
+    worker.start()
+    try:
+        next_metrics = 0.0
+        while worker.alive:
+            if args.metrics_file and time.time() >= next_metrics:
+                METRICS.write_textfile(args.metrics_file); next_metrics = time.time() + 15
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
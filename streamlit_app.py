@@ -1,25 +1,35 @@
 # app_veo_gemini_advanced.py
 # Streamlit • Veo 2 / Veo 3 via Gemini API (API key only)
-# - Prompt manager (Add / Edit / Delete)
+# - Prompt manager (SQLite-backed: paged editor, filters, tags, bulk actions)
 # - Veo 2 vs Veo 3 controls (AR/duration for Veo2; fixed for Veo3)
-# - Batch, LRO polling, MP4 save, preview
+# - Concurrent batch (renderx.engine), LRO polling, MP4 save, preview
 # - Auto-download (JS component), per-item download, Download All (ZIP)
+# - Disk retention: byte/age quota, LRU eviction of unpinned clips, optional archive folder
 # pip install streamlit requests
 
-import os, time, json, base64, uuid, logging, io, zipfile
-from logging.handlers import RotatingFileHandler
+import os, time, base64, uuid, logging
 from datetime import datetime
-from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from urllib.parse import urlsplit
 
-import requests
 import streamlit as st
 import streamlit.components.v1 as components
 
+from renderx import http, download, export
+from renderx.logs import setup_logger, has_file_handler, search as search_logs
+from renderx.engine import Job, FINAL, OK, ERROR, CANCELLED, LOW, NORMAL, HIGH
+from renderx.store import JobStore
+from renderx.cache import RenderCache
+from renderx.worker import Worker
+from renderx.prompts import PromptStore, STATUS_GROUPS
+from renderx.fileindex import FileIndex
+from renderx.retention import Retention
+from renderx.fileserver import FileServer
+from renderx.metrics import METRICS
+
 # =========================
 # Page & Global Config
 # =========================
 st.set_page_config(page_title="RenderX Veo Gemini", layout="wide")
-BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
 
 # Compact CSS
 st.markdown("""
@@ -39,46 +49,67 @@ hr { border: 0; border-top: 1px solid rgba(127,127,127,.2); }
 
 st.title("🎬 RenderX Veo Gemini")
 
+PRIORITY_NAMES = {HIGH: "tinggi", NORMAL: "normal", LOW: "rendah"}
+
 # =========================
 # Session Defaults
 # =========================
-if "prompts" not in st.session_state:
-    st.session_state.prompts = []  # list[{"id": str, "text": str}]
-if "results" not in st.session_state:
-    # list[{"id", "index", "status", "path", "fname", "prompt", "auto_done"}]
-    st.session_state.results = []
 if "downloaded_files" not in st.session_state:
     st.session_state.downloaded_files = set()
 st.session_state.setdefault("multi_input", "")
 st.session_state.setdefault("add_msg", None)
 st.session_state.setdefault("auto_enabled", False)   # mirror toggle state across reruns
 st.session_state.setdefault("auto_last_id", None)    # prevent multiple triggers same run
+if "user_id" not in st.session_state:  # fair-share identity in the worker queue + owner of the prompt list;
+    # kept in the URL (?u=…) so a browser refresh finds its prompts and batches again
+    st.session_state["user_id"] = st.query_params.get("u") or uuid.uuid4().hex[:8]
+st.query_params["u"] = st.session_state["user_id"]
+st.session_state.setdefault("my_batches", [])       # batch ids queued from this session
+st.session_state.setdefault("seen_final", 0)
+st.session_state.setdefault("prompt_page", 1)
+st.session_state.setdefault("prompt_rev", 0)        # bumped on bulk changes → fresh editor widget
 
 # =========================
-# Logging
+# Shared resources (one per output folder, outlive reruns)
 # =========================
-def setup_logger(log_path: str | None, level=logging.INFO):
-    logger = logging.getLogger("veo_gemini_adv")
-    logger.setLevel(level); logger.propagate = False
-    if logger.handlers: return logger
-    fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-    ch = logging.StreamHandler(); ch.setFormatter(fmt); ch.setLevel(level); logger.addHandler(ch)
-    if log_path:
-        try:
-            fh = RotatingFileHandler(log_path, maxBytes=2_000_000, backupCount=3, encoding="utf-8")
-            fh.setFormatter(fmt); fh.setLevel(level); logger.addHandler(fh)
-        except Exception as e:
-            st.warning(f"⚠️ Log file gagal dibuat: {e}")
-    return logger
-
-def tail_file(path: str, max_bytes: int = 60_000) -> str:
-    try:
-        size = os.path.getsize(path)
-        with open(path, "rb") as f:
-            if size > max_bytes: f.seek(-max_bytes, os.SEEK_END)
-            return f.read().decode("utf-8", errors="ignore")
-    except Exception as e:
-        return f"(Tidak dapat membaca log: {e})"
+@st.cache_resource(show_spinner=False)
+def get_store(output_folder: str) -> JobStore:
+    # one journal per output folder, shared by every session/rerun of this server
+    return JobStore.in_folder(output_folder)
+
+@st.cache_resource(show_spinner=False)
+def get_cache(output_folder: str) -> RenderCache:
+    return RenderCache(get_store(output_folder))
+
+@st.cache_resource(show_spinner=False)
+def get_prompts(output_folder: str) -> PromptStore:
+    # prompt lists live in the journal file too: 10k+ prompts never sit in session_state
+    return PromptStore(get_store(output_folder))
+
+@st.cache_resource(show_spinner=False)
+def get_index(output_folder: str) -> FileIndex:
+    # size/mtime/hash/duration of results, kept current by a background sweeper (no disk probing per rerun)
+    return FileIndex(get_store(output_folder)).start(output_folder)
+
+@st.cache_resource(show_spinner=False)
+def get_retention(output_folder: str) -> Retention:
+    # byte/age quota over the file index, LRU eviction (pinned clips kept) by a background sweeper
+    return Retention(get_index(output_folder), cache=get_cache(output_folder)).start()
+
+@st.cache_resource(show_spinner=False)
+def get_worker(output_folder: str) -> Worker:
+    # lives outside the rerun cycle: shared by every session, survives closed tabs
+    w = Worker(get_store(output_folder), output_folder, cache=get_cache(output_folder))
+    if not os.environ.get("RENDERX_EXTERNAL_WORKER"):  # else `python -m renderx.worker` drains the queue
+        w.start()
+    return w
+
+@st.cache_resource(show_spinner=False)
+def get_file_server() -> FileServer:
+    # one per process: serves MP4s by signed URL (Range/caching) instead of via the websocket
+    return FileServer().start()
+
+files = get_file_server()
 
 # =========================
 # Top Row: API+Output | Model+Params
@@ -87,10 +118,12 @@ colL, colR = st.columns(2, gap="small")
 
 with colL:
     with st.expander("🔑 API & Output", expanded=True):
-        api_key = st.text_input("Gemini API Key (format AIza…)", type="password")
+        api_key = st.text_input("Gemini API Key (format AIza…)", type="password",
+                                help="Beberapa key/project? Pisahkan dengan koma: kickoff dibagi ke semua key sesuai kuota.")
         default_out = os.path.join(os.path.expanduser("~"), "Downloads", "VEO_OUTPUT")
         output_folder = st.text_input("Folder output (server)", value=default_out)
-        os.makedirs(output_folder, exist_ok=True)
+        if st.session_state.get("made_folder") != output_folder:  # once per folder, not every rerun
+            os.makedirs(output_folder, exist_ok=True); st.session_state["made_folder"] = output_folder
 
         auto_download = st.toggle(
             "Auto-download ke browser setelah render (eksperimen)",
@@ -100,10 +133,24 @@ with colL:
         )
         st.session_state["auto_enabled"] = auto_download
 
+        dl_limit = st.number_input("Batas bandwidth download (MB/s, 0 = tanpa batas)", min_value=0.0,
+                                   value=download.LIMITER.rate / 1024 ** 2, step=1.0,
+                                   help="Dibagi untuk semua download (semua sesi), supaya polling tetap lancar.")
+        if dl_limit * 1024 ** 2 != download.LIMITER.rate:  # process-wide limiter: only a real change applies
+            download.configure(bandwidth=dl_limit * 1024 ** 2)
+
         use_file_log = st.toggle("Aktifkan file log", value=True)
         log_level = st.selectbox("Level Log", ["INFO", "DEBUG", "WARNING", "ERROR"], index=0)
         log_file = os.path.join(output_folder, "veo_gemini_advanced.log") if use_file_log else None
         logger = setup_logger(log_file, getattr(logging, log_level))
+        if log_file and not has_file_handler(logger):
+            st.warning("⚠️ Log file gagal dibuat (lihat konsol).")
+        store = get_store(output_folder)
+        cache = get_cache(output_folder)
+        worker = get_worker(output_folder)
+        prompts = get_prompts(output_folder)
+        index = get_index(output_folder)
+        retention = get_retention(output_folder)
         st.caption("API key bisa dibuat dari Google AI Studio atau `gcloud services api-keys create`.")
 
 with colR:
@@ -140,18 +187,28 @@ with colR:
 # =========================
 # Callbacks
 # =========================
+PAGE_SIZE = 50
+
 def add_from_text_cb():
     raw = st.session_state.get("multi_input", "")
-    lines = [l.strip() for l in raw.splitlines() if l.strip()]
-    if lines:
-        st.session_state.prompts.extend([{"id": uuid.uuid4().hex, "text": l} for l in lines])
+    n = prompts.add(st.session_state["user_id"], raw.splitlines())
+    if n:
         st.session_state["multi_input"] = ""  # safe inside callback
-        st.session_state["add_msg"] = f"Ditambahkan {len(lines)} prompt."
+        st.session_state["add_msg"] = f"Ditambahkan {n} prompt."
+        st.session_state.prompt_rev += 1
+
+def prompt_filter() -> dict:
+    return {"search": st.session_state.get("pf_search", "").strip(), "tag": st.session_state.get("pf_tag") or "",
+            "status": st.session_state.get("pf_status") or ""}
+
+def reset_page_cb():
+    st.session_state.prompt_page = 1; st.session_state.prompt_rev += 1
 
 # =========================
 # Prompts (Add / Manage)
 # =========================
 with st.expander("📝 Prompts", expanded=True):
+    user = st.session_state["user_id"]
     cA, cB = st.columns([2, 1], gap="small")
     with cA:
         st.text_area(
@@ -165,155 +222,95 @@ with st.expander("📝 Prompts", expanded=True):
             st.success(st.session_state["add_msg"]); st.session_state["add_msg"] = None
 
     with cB:
-        txt = st.file_uploader("Upload .txt (1/baris)", type=["txt"])
-        if txt and st.button("📥 Tambah dari file .txt", key="btn_add_from_file"):
-            lines = txt.read().decode("utf-8", errors="ignore").splitlines()
-            lines = [l.strip() for l in lines if l.strip()]
-            if lines:
-                st.session_state.prompts.extend([{"id": uuid.uuid4().hex, "text": l} for l in lines])
-                st.success(f"Ditambahkan {len(lines)} prompt dari file.")
+        txt = st.file_uploader("Upload .txt (1/baris) atau .jsonl", type=["txt", "jsonl"],
+                               help='JSONL: {"prompt": "...", "tags": ["a", "b"], "model": "...", "aspectRatio": "9:16"}')
+        up_tags = st.text_input("Tag untuk file ini (opsional, pisahkan koma)", key="upload_tags")
+        if txt and st.button("📥 Tambah dari file", key="btn_add_from_file"):
+            added, skipped = prompts.ingest(user, txt, tags=up_tags)  # streamed line by line
+            st.session_state.prompt_rev += 1
+            st.success(f"Ditambahkan {added} prompt dari file." + (f" {skipped} baris dilewati." if skipped else ""))
 
         if st.button("🧹 Bersihkan semua prompt", key="btn_clear_all"):
-            st.session_state.prompts = []
+            prompts.clear(user); reset_page_cb()
             st.success("Prompt dibersihkan.")
 
     st.markdown("---")
-    st.caption(f"Total prompt: {len(st.session_state.prompts)}")
-    if st.session_state.prompts:
-        with st.expander("🛠️ Kelola Prompt (Edit / Delete)", expanded=False):
-            to_delete = []
-            for idx, item in enumerate(st.session_state.prompts, start=1):
-                pid = item["id"]
-                with st.container():
-                    c1, c2 = st.columns([4, 1], gap="small")
-                    with c1:
-                        new_text = st.text_area(f"{idx}.", value=item["text"], key=f"edit_{pid}", height=70)
-                    with c2:
-                        if st.button("💾 Save", key=f"save_{pid}", use_container_width=True):
-                            item["text"] = new_text; st.success("Tersimpan.")
-                        if st.button("🗑️ Delete", key=f"del_{pid}", type="secondary", use_container_width=True):
-                            to_delete.append(pid)
-                    st.markdown("<hr>", unsafe_allow_html=True)
-            if to_delete:
-                st.session_state.prompts = [p for p in st.session_state.prompts if p["id"] not in to_delete]
-                st.success(f"Dihapus {len(to_delete)} prompt.")
-
-        with st.container():
-            st.text("\n".join([f"{i+1}. {p['text']}" for i, p in enumerate(st.session_state.prompts)]))
+    total_prompts = prompts.count(user)
+    st.caption(f"Total prompt: {total_prompts}")
+    if total_prompts:
+        f1, f2, f3 = st.columns([2, 1, 1], gap="small")
+        with f1: st.text_input("Cari", key="pf_search", on_change=reset_page_cb, placeholder="kata dalam prompt")
+        with f2: st.selectbox("Tag", [""] + prompts.tags(user), key="pf_tag", on_change=reset_page_cb,
+                              format_func=lambda t: t or "(semua)")
+        with f3: st.selectbox("Status", [""] + list(STATUS_GROUPS), key="pf_status", on_change=reset_page_cb,
+                              format_func=lambda s: s or "(semua)")
+        flt = prompt_filter()
+        matched = prompts.count(user, **flt)
+        pages = max(1, -(-matched // PAGE_SIZE))
+        st.session_state.prompt_page = min(st.session_state.prompt_page, pages)
+        p1, p2 = st.columns([1, 3], gap="small")
+        with p1:
+            page = st.number_input(f"Halaman (dari {pages})", min_value=1, max_value=pages, key="prompt_page")
+        with p2:
+            st.caption(f"{matched} prompt cocok • menampilkan {PAGE_SIZE} per halaman")
+
+        # only the visible page is loaded and rendered
+        rows = prompts.page(user, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE, **flt)
+        edited = st.data_editor(
+            [{"pilih": False, "#": r["seq"], "prompt": r["text"], "tags": r["tags"], "status": r["status"]} for r in rows],
+            key=f"prompt_editor_{page}_{st.session_state.prompt_rev}", hide_index=True, width="stretch",
+            disabled=("#", "status"),
+            column_config={"pilih": st.column_config.CheckboxColumn(width="small"),
+                           "prompt": st.column_config.TextColumn(width="large")})
+        selected = []
+        for r, e in zip(rows, edited):
+            if e["pilih"]: selected.append(r["id"])
+            text = (e["prompt"] or "").strip()
+            if (text and text != r["text"]) or (e["tags"] or "") != r["tags"]:
+                prompts.update(r["id"], text=text if text != r["text"] else None,
+                               tags=e["tags"] if (e["tags"] or "") != r["tags"] else None)
+                r["text"], r["tags"] = text or r["text"], e["tags"] or ""
+
+        b1, b2, b3 = st.columns([1, 1, 2], gap="small")
+        scope = dict(ids=selected) if selected else flt
+        scope_label = f"{len(selected)} dipilih" if selected else f"{matched} hasil filter"
+        with b3:
+            bulk_tag = st.text_input("Tag (aksi massal)", key="bulk_tag", placeholder="mis. intro, draft")
+            t1, t2 = st.columns(2, gap="small")
+            with t1:
+                if st.button(f"🏷️ Tambah tag ({scope_label})", key="btn_bulk_tag", disabled=not bulk_tag.strip()):
+                    prompts.tag(user, bulk_tag, **scope); st.session_state.prompt_rev += 1; st.rerun()
+            with t2:
+                if st.button(f"✂️ Hapus tag ({scope_label})", key="btn_bulk_untag", disabled=not bulk_tag.strip()):
+                    prompts.untag(user, bulk_tag, **scope); st.session_state.prompt_rev += 1; st.rerun()
+        with b1:
+            # never "everything" by accident: a selection or an active filter is required (🧹 clears all on purpose)
+            if st.button(f"🗑️ Hapus ({scope_label})", key="btn_bulk_delete", type="secondary",
+                         disabled=not (selected or any(flt.values())),
+                         help="Pilih baris atau set filter dulu. Untuk menghapus semua: 🧹 Bersihkan semua prompt."):
+                n = prompts.delete(user, **scope); st.session_state.prompt_rev += 1
+                st.session_state["add_msg"] = f"Dihapus {n} prompt."; st.rerun()
 
 # =========================
-# Gemini REST Helpers
+# Browser helpers
 # =========================
-def start_generation(api_key: str, model: str, prompt: str,
-                     aspect_ratio: str, negative_prompt: str | None,
-                     person_generation: str | None,
-                     duration_seconds: int | None) -> tuple[bool, str]:
-    url = f"{BASE_URL}/models/{model}:predictLongRunning"
-    headers = {"x-goog-api-key": api_key, "Content-Type": "application/json"}
-    params = {"aspectRatio": aspect_ratio}
-    if model.startswith("veo-2.") and duration_seconds:
-        params["durationSeconds"] = int(duration_seconds)
-    if negative_prompt:
-        params["negativePrompt"] = negative_prompt
-    if person_generation:
-        params["personGeneration"] = person_generation
-    body = {"instances": [{"prompt": prompt}], "parameters": params}
-
-    logger.info(f"Kickoff -> model={model} aspect={aspect_ratio} dur={params.get('durationSeconds','8')} prompt='{prompt[:80]}'")
-    resp = requests.post(url, headers=headers, data=json.dumps(body), timeout=90)
-    if resp.status_code != 200:
-        logger.error(f"Kickoff FAIL {resp.status_code}: {resp.text}")
-        return False, f"{resp.status_code}: {resp.text}"
-    data = resp.json()
-    op_name = data.get("name")
-    if not op_name:
-        logger.error(f"Kickoff BAD RESPONSE: {data}")
-        return False, f"Bad response: {data}"
-    logger.info(f"Kickoff OK operation={op_name}")
-    return True, op_name
-
-def poll_operation(api_key: str, operation_name: str, timeout: int = 900, every: int = 5) -> tuple[bool, dict | str]:
-    url = f"{BASE_URL}/{operation_name}"
-    headers = {"x-goog-api-key": api_key}
-    start = time.time()
-    progress = st.progress(0, text="Menunggu hasil (polling)…")
-    while True:
-        try:
-            r = requests.get(url, headers=headers, timeout=60)
-        except Exception as e:
-            logger.error(f"Poll EXCEPTION: {e}"); progress.empty(); return False, f"Exception: {e}"
-        if r.status_code != 200:
-            logger.error(f"Poll FAIL {r.status_code}: {r.text}"); progress.empty(); return False, f"{r.status_code}: {r.text}"
-        j = r.json()
-        if j.get("done"):
-            logger.info("Poll DONE"); progress.progress(100, text="Selesai."); time.sleep(0.25); progress.empty()
-            return True, j
-        elapsed = time.time() - start
-        pct = min(int((elapsed / timeout) * 100), 99)
-        progress.progress(pct, text=f"Polling… ({pct}%)")
-        logger.debug(f"Poll running… elapsed={int(elapsed)}s")
-        if elapsed > timeout:
-            logger.error("Poll TIMEOUT"); progress.empty(); return False, "Timeout polling operation."
-        time.sleep(every)
-
-# ---------- URI helpers ----------
-def _append_key(u: str, key: str) -> str:
-    parts = list(urlparse(u))
-    q = dict(parse_qsl(parts[4])); q["key"] = key
-    parts[4] = urlencode(q); return urlunparse(parts)
-
-def extract_video_uri(op_json: dict) -> str | None:
-    r = op_json.get("response", {}) or {}
-    try:
-        v = r["generatedVideos"][0]["video"]
-        uri = v.get("uri") or v.get("fileUri")
-        if uri: return uri
-    except Exception:
-        pass
-    try:
-        v = r["generateVideoResponse"]["generatedSamples"][0]["video"]
-        uri = v.get("uri") or v.get("fileUri")
-        if uri: return uri
-    except Exception:
-        pass
-    return None
-
-def download_video_by_uri(api_key: str, uri: str, out_path: str) -> tuple[bool, str]:
-    dl_url = _append_key(uri, api_key)
-    logger.info(f"Download -> {dl_url} -> {out_path}")
-    try:
-        with requests.Session() as s:
-            r = s.get(dl_url, stream=True, allow_redirects=True, timeout=300)
-            if r.status_code != 200:
-                ct = r.headers.get("content-type", "")
-                msg = r.text if "application/json" in ct or "text" in ct else f"HTTP {r.status_code}"
-                logger.error(f"Download FAIL {r.status_code}: {msg}")
-                return False, msg
-            ct = r.headers.get("content-type", "")
-            if "video" not in ct and "octet-stream" not in ct:
-                logger.warning(f"Unexpected content-type during download: {ct}")
-            os.makedirs(os.path.dirname(out_path), exist_ok=True)
-            with open(out_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=1024 * 1024):
-                    if chunk: f.write(chunk)
-        logger.info("Download OK"); return True, out_path
-    except Exception as e:
-        logger.exception(f"Download EXCEPTION: {e}")
-        return False, str(e)
-
 # ---------- Auto-download component ----------
-def trigger_browser_download(path: str, download_name: str):
+def trigger_browser_download(path: str, download_name: str, url: str | None = None):
     """
-    Auto-trigger browser download using a data URL via a JS component.
+    Auto-trigger browser download via a JS component. With `url` (file server) the browser
+    streams the file itself; without it we fall back to a data URL (whole file, base64).
     Browser bisa memblokir auto-download; ini best-effort.
     """
     try:
-        with open(path, "rb") as f:
-            data = f.read()
-        b64 = base64.b64encode(data).decode("utf-8")
+        if url:
+            href = url
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+            href = "data:video/mp4;base64," + base64.b64encode(data).decode("utf-8")
         html = f"""
         <html><body>
-        <a id="d" href="data:video/mp4;base64,{b64}" download="{download_name}"></a>
+        <a id="d" href="{href}" download="{download_name}"></a>
         <script>
           // auto click once
           const a = document.getElementById('d');
@@ -325,89 +322,154 @@ def trigger_browser_download(path: str, download_name: str):
     except Exception as e:
         st.warning(f"Gagal auto-download: {e}")
 
+def files_base() -> str | None:
+    # file server URL this browser can load (same host over http, or RENDERX_FILES_URL); None = go through Streamlit
+    app = urlsplit(st.context.url or "")
+    host = app.hostname or urlsplit("//" + (st.context.headers.get("Host") or "")).hostname
+    scheme = st.context.headers.get("X-Forwarded-Proto") or app.scheme or "http"
+    return files.base_for(host, scheme.split(",")[0].strip().lower())
+
+# =========================
+# Live batch status (refreshes itself; the worker does the rendering)
+# =========================
+@st.fragment(run_every=2)
+def batch_status():
+    running = store.active_batches()
+    for b in running:  # this user's batches are controllable again after a reload / from another tab
+        if b["user"] == st.session_state["user_id"] and b["batch_id"] not in st.session_state.my_batches:
+            st.session_state.my_batches.append(b["batch_id"])
+    others = {b["batch_id"]: b for b in running if b["batch_id"] not in st.session_state.my_batches}
+    if others:
+        st.session_state["adopt_pick"] = [i for i in st.session_state.get("adopt_pick", []) if i in others]
+        adopt = st.multiselect(f"Batch lain yang masih jalan di server ({len(others)})", list(others), key="adopt_pick",
+                               format_func=lambda i: f"{datetime.fromtimestamp(others[i]['created_at']):%d/%m %H:%M} • "
+                                                     f"{others[i]['active']} job aktif • {others[i]['prompt'][:40]}",
+                               help="Tampilkan & kendalikan (batal / jeda / prioritas) batch dari sesi lain.")
+        if adopt and st.button("➕ Kendalikan batch terpilih", key="btn_adopt"):
+            st.session_state.my_batches.extend(adopt); st.rerun()
+    ids = st.session_state.my_batches
+    queue = store.status_counts()
+    st.caption("Worker: " + ("aktif" if worker.alive else "eksternal / tidak aktif") + " • antrian server: "
+               + (", ".join(f"{k} {v}" for k, v in sorted(queue.items())) or "kosong"))
+    pool = worker.keys.snapshot()
+    if len(pool) > 1 or any(k["benched_s"] or k["models_blocked"] for k in pool):
+        st.dataframe(pool, hide_index=True, width="stretch")
+    if not ids:
+        return
+    counts = store.status_counts(ids)
+    total = sum(counts.values()); done = sum(counts.get(s, 0) for s in FINAL)
+    st.progress(int(done / total * 100) if total else 0,
+                text=f"{done}/{total} selesai • OK {counts.get(OK, 0)} • ERROR {counts.get(ERROR, 0)}"
+                     + (f" • BATAL {counts[CANCELLED]}" if counts.get(CANCELLED) else ""))
+    active = store.jobs(ids, exclude=FINAL, limit=50)
+    if active:
+        paused = store.paused_batches(ids)
+        st.dataframe([{"#": j.index, "status": j.status + (" (dijeda)" if j.batch_id in paused and j.status == "QUEUED" else ""),
+                       "prioritas": PRIORITY_NAMES[j.priority], "detik": int(j.elapsed), "poll": j.polls,
+                       "prompt": j.prompt[:80]} for j in active], hide_index=True, width="stretch")
+        by_id = {j.id: j for j in active}
+        st.session_state["job_pick"] = [i for i in st.session_state.get("job_pick", []) if i in by_id]
+        pick = st.multiselect("Pilih job", list(by_id), key="job_pick",
+                              format_func=lambda i: f"#{by_id[i].index} {by_id[i].status} — {by_id[i].prompt[:40]}")
+        c1, c2, c3, c4 = st.columns(4, gap="small")
+        with c1:
+            if st.button("⏹️ Batalkan terpilih", key="btn_cancel_pick", disabled=not pick,
+                         help="Operasi yang sedang dirender ikut dibatalkan di server."):
+                worker.cancel(job_ids=pick); st.rerun()
+        with c2:
+            if st.button("⏫ Prioritas tinggi", key="btn_prio_pick", disabled=not pick,
+                         help="Hanya job yang masih antri; mendahului batch lain."):
+                worker.set_priority(HIGH, job_ids=pick); st.rerun()
+        with c3:
+            if paused:
+                if st.button("▶️ Lanjutkan batch", key="btn_resume"):
+                    worker.pause(ids, False); st.rerun()
+            elif st.button("⏸️ Jeda batch", key="btn_pause",
+                           help="Job yang belum mulai ditahan; yang sedang dirender tetap selesai."):
+                worker.pause(ids); st.rerun()
+        with c4:
+            if st.button("⏹️ Batalkan semua", key="btn_cancel_all"):
+                worker.cancel(batch_ids=ids); st.rerun()
+    engine = worker.engine
+    if engine and engine.breaker.state != "closed":
+        st.warning(f"Circuit breaker {engine.breaker.state}: API sedang banyak error, kickoff baru ditahan sementara.")
+    failed = store.jobs(ids, only=("ERROR",), limit=20)
+    for j in failed:
+        st.error(f"Job {j.index}" + (f" [{j.error_class}]" if j.error_class else "") + f": {j.error}")
+    retryable = store.count_retryable(ids)
+    if retryable and st.button(f"🔁 Kirim ulang {retryable} job gagal", key="btn_resubmit",
+                               help="Hanya error sementara (jaringan, 5xx, rate limit, tak dikenal). "
+                                    "Error safety / API key / request tidak dikirim ulang."):
+        again = worker.resubmit(ids)
+        prompts.mark([j.prompt_id for j in again if j.prompt_id], "QUEUED")
+        st.rerun()
+    if done != st.session_state.seen_final:
+        st.session_state.seen_final = done
+        prompts.refresh(st.session_state["user_id"])
+        index.notify(); retention.notify()
+        st.rerun()  # refresh the results viewer below
+
 # =========================
 # Run Row (Generate)
 # =========================
 with st.expander("🚀 Jalankan Batch", expanded=True):
     runL, runR = st.columns([1, 3], gap="small")
     with runL:
-        go = st.button("🎬 Generate Batch", use_container_width=True)
+        go = st.button("🎬 Generate Batch", width="stretch")
+        concurrency = st.number_input("Job paralel (maks)", min_value=1, max_value=32,
+                                      value=min(32, worker.concurrency), step=1,
+                                      help="Jumlah operasi Veo yang berjalan bersamaan di server (untuk semua sesi).")
+        force_render = st.toggle("Force re-render (abaikan cache)", value=False,
+                                 help="Prompt + parameter yang sama biasanya memakai MP4 yang sudah ada.")
+        only_filtered = st.toggle("Hanya prompt hasil filter", value=False,
+                                  help="Render hanya prompt yang cocok dengan filter cari/tag/status di atas.")
+        priority = st.selectbox("Prioritas", [HIGH, NORMAL, LOW], index=1, format_func=PRIORITY_NAMES.get,
+                                help="Tinggi: preview interaktif, mendahului antrian (boleh pakai 1 slot cadangan). "
+                                     "Rendah: backfill semalam, jalan saat slot kosong.")
+        kq1, kq2 = st.columns(2, gap="small")
+        with kq1:
+            key_rpm = st.number_input("Kickoff/menit per key", min_value=1.0, max_value=600.0,
+                                      value=float(worker.keys.settings["rate_per_min"]), step=1.0)
+        with kq2:
+            key_inflight = st.number_input("Operasi aktif per key", min_value=1, max_value=100,
+                                           value=int(worker.keys.settings["max_inflight"]), step=1)
     with runR:
         st.caption("Video akan diunduh ke folder server & ditambahkan ke daftar hasil di bawah. Lihat log jika ada error.")
+        cs = cache.stats()
+        st.caption(f"Cache render: {cs['n']} video ({cs['bytes'] / 1024**2:.0f} MB), dipakai ulang {cs['hits']}×. "
+                   "Prompt identik dalam satu batch hanya dirender sekali.")
+
+    if api_key:
+        worker.add_keys(api_key)  # in memory only; lets the worker run (or resume) this pool's jobs
+    if concurrency != worker.concurrency:  # shared by every session: only a real change applies
+        worker.set_concurrency(concurrency)
+    quotas = {"rate_per_min": key_rpm, "max_inflight": int(key_inflight)}
+    if any(worker.keys.settings[k] != v for k, v in quotas.items()):  # shared pool: only a real change applies
+        worker.keys.configure(**quotas)
 
     if go:
         if not api_key:
             st.error("Masukkan API key dulu.")
-        elif not st.session_state.prompts:
+        elif not prompts.count(user, **(prompt_filter() if only_filtered else {})):
             st.error("Tambah minimal 1 prompt.")
         else:
-            # Kosongkan hasil LAMA? → TIDAK. Biarkan persist supaya tidak hilang saat klik tombol lain.
-            # Jika ingin reset, aktifkan baris berikut:
-            # st.session_state.results = []
-
-            status = st.empty()
-            for i, item in enumerate(st.session_state.prompts, start=1):
-                prompt = item["text"]
-                status.text(f"Mulai job {i}/{len(st.session_state.prompts)} …")
-                logger.info(f"=== JOB {i} START ===")
-
-                ok, op_or_err = start_generation(
-                    api_key=api_key, model=model, prompt=prompt,
-                    aspect_ratio=aspect_ratio, negative_prompt=negative_prompt,
-                    person_generation=person_generation,
-                    duration_seconds=duration_seconds if model.startswith("veo-2.") else None
-                )
-                if not ok:
-                    st.error(f"Kickoff gagal: {op_or_err}")
-                    st.session_state.results.append({
-                        "id": uuid.uuid4().hex, "index": i, "status": "ERROR",
-                        "path": "", "fname": "", "prompt": prompt, "auto_done": True
-                    })
-                    logger.info(f"=== JOB {i} END (kickoff error) ===")
-                    continue
-
-                ok, resp = poll_operation(api_key, op_or_err, timeout=900, every=5)
-                if not ok:
-                    st.error(f"Gagal polling: {resp}")
-                    st.session_state.results.append({
-                        "id": uuid.uuid4().hex, "index": i, "status": "ERROR",
-                        "path": "", "fname": "", "prompt": prompt, "auto_done": True
-                    })
-                    logger.info(f"=== JOB {i} END (poll error) ===")
-                    continue
-
-                uri = extract_video_uri(resp)
-                if not uri:
-                    st.error("Respon selesai tapi tidak ada URI video yang bisa diunduh.")
-                    st.session_state.results.append({
-                        "id": uuid.uuid4().hex, "index": i, "status": "ERROR",
-                        "path": "", "fname": "", "prompt": prompt, "auto_done": True
-                    })
-                    logger.info(f"=== JOB {i} END (no uri) ===")
-                    continue
-
-                ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                fname = f"veo_{i}_{ts}.mp4"
-                out_path = os.path.join(output_folder, fname)
-
-                ok, msg = download_video_by_uri(api_key, uri, out_path)
-                if ok:
-                    st.success(f"✅ Video {i} tersimpan: {out_path}")
-                    # Masukkan ke daftar hasil (persisten)
-                    st.session_state.results.append({
-                        "id": uuid.uuid4().hex, "index": i, "status": "OK",
-                        "path": out_path, "fname": fname, "prompt": prompt, "auto_done": False
-                    })
-                else:
-                    st.error(f"Download gagal: {msg}")
-                    st.session_state.results.append({
-                        "id": uuid.uuid4().hex, "index": i, "status": "ERROR",
-                        "path": "", "fname": "", "prompt": prompt, "auto_done": True
-                    })
-
-                logger.info(f"=== JOB {i} END ===")
-
-            status.empty()
+            params = dict(model=model, aspect_ratio=aspect_ratio, negative_prompt=negative_prompt,
+                          person_generation=person_generation,
+                          duration_seconds=duration_seconds if model.startswith("veo-2.") else None)
+            batch_id = uuid.uuid4().hex
+            # per-prompt params from JSONL uploads override the panel's
+            jobs = [Job(index=i, prompt=item["text"], params={**params, **item["params"]}, batch_id=batch_id,
+                        force=force_render, prompt_id=item["id"], priority=priority)
+                    for i, item in enumerate(prompts.iter(user, **(prompt_filter() if only_filtered else {})), start=1)]
+            prompts.mark([j.prompt_id for j in jobs], "QUEUED")
+            # one pooled keep-alive connection per in-flight job (+ headroom for downloads/redirects)
+            http.configure(pool_maxsize=max(http.DEFAULTS["pool_maxsize"], 2 * int(concurrency)))
+            cache.evict()
+            worker.enqueue(jobs, user=st.session_state["user_id"], api_key=api_key)
+            st.session_state.my_batches.append(batch_id)
+            st.success(f"{len(jobs)} job masuk antrian worker. Tab boleh ditutup; proses tetap berjalan di server.")
+
+    batch_status()
 
 # =========================
 # Persistent Results Viewer (doesn't disappear on rerun)
@@ -415,56 +477,141 @@ with st.expander("🚀 Jalankan Batch", expanded=True):
 st.markdown("---")
 st.subheader("📼 Rendered Videos (persist)")
 
+GRID_PAGE_SIZE = 12
+GRID_COLS = 4
+n_ok = store.count(OK)
+files.allow(output_folder); fbase = files_base()
+use_files = fbase is not None  # else media goes through Streamlit (loaded on click)
+if not files.ok:
+    st.caption(f"⚠️ {files.error} — preview/download lewat Streamlit (klik untuk memuat).")
+elif not use_files:
+    st.caption("ℹ️ Browser ini tidak bisa memakai file server (HTTPS / proxy / port tertutup) — preview/download lewat "
+               "Streamlit (klik untuk memuat). Set RENDERX_FILES_URL untuk streaming langsung.")
+ist = index.stats()
+st.caption(f"Index file: {ist['n']} video • {ist['bytes'] / 1024**3:.2f} GB • {ist['seconds'] / 60:.0f} menit"
+           + (f" • {ist['missing']} hilang dari disk" if ist["missing"] else ""))
+
+with st.expander("🧹 Retensi disk", expanded=False):
+    rs = retention.settings
+    rq1, rq2, rq3 = st.columns([1, 1, 2], gap="small")
+    with rq1:
+        max_gb = st.number_input("Kuota (GB, 0 = tanpa batas)", min_value=0.0, value=rs["max_bytes"] / 1024 ** 3,
+                                 step=10.0, help="Jika terlampaui, video yang paling lama tidak dibuka dihapus/diarsip dulu.")
+    with rq2:
+        max_days = st.number_input("Umur maks (hari, 0 = simpan)", min_value=0.0, value=rs["max_age"] / 86400,
+                                   step=1.0, help="Video yang tidak dibuka selama ini ikut dihapus/diarsip.")
+    with rq3:
+        archive_dir = st.text_input("Folder arsip (kosong = hapus)", value=rs["archive_dir"],
+                                    help="File yang dievict dipindah ke sini, misalnya disk lain atau NAS.").strip()
+    wanted = {"max_bytes": int(max_gb * 1024 ** 3), "max_age": max_days * 86400, "archive_dir": archive_dir}
+    if any(rs[k] != v for k, v in wanted.items()):  # shared by every session: only a real change wakes the sweeper
+        retention.configure(**wanted); retention.notify()
+    rst = retention.stats()
+    st.caption(f"Terpakai {rst['bytes'] / 1024**3:.2f} GB"
+               + (f" dari {rst['max_bytes'] / 1024**3:.0f} GB" if rst["max_bytes"] else "")
+               + f" • ⭐ {rst['pinned']} video di-pin ({rst['pinned_bytes'] / 1024**3:.2f} GB, tidak pernah dievict)"
+               + f" • {rst['evicted']} dievict, {rst['archived']} di antaranya diarsip"
+               + (f" • sweep terakhir {datetime.fromtimestamp(retention.last['at']):%H:%M}: {retention.last['n']} file"
+                  if retention.last else ""))
+    if st.button("🧹 Jalankan sekarang", key="btn_sweep", disabled=not retention.active):
+        res = retention.sweep()
+        st.success(f"{res['n']} file dievict ({res['bytes'] / 1024**3:.2f} GB).")
+
 # Controls
 cL, cR = st.columns([1, 3], gap="small")
 with cL:
+    clear_files = st.checkbox("Hapus juga file-nya", value=False,
+                              help="File video ikut dihapus (atau dipindah ke folder arsip retensi). Video ⭐ tetap disimpan.")
     if st.button("🗑️ Clear All Results"):
-        st.session_state.results = []
-        st.success("Daftar hasil dikosongkan.")
+        if clear_files:  # results finished since the sweeper's last pass aren't indexed yet: discard() skips those
+            while index.sync(output_folder): pass
+        gone = retention.discard(index.result_paths()) if clear_files else []
+        store.hide_all(); n_ok = 0
+        st.success("Daftar hasil dikosongkan." + (f" {len(gone)} file dihapus/diarsip." if gone else ""))
 with cR:
-    # Download all (ZIP)
-    ok_paths = [r["path"] for r in st.session_state.results if r["status"] == "OK" and r["path"] and os.path.exists(r["path"])]
-    if ok_paths:
+    # Download all (ZIP): streamed (ZIP_STORED, ZIP64), never assembled in memory
+    if n_ok:
         if st.button("⬇️ Download All (ZIP)"):
-            mem = io.BytesIO()
-            with zipfile.ZipFile(mem, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for p in ok_paths:
-                    zf.write(p, arcname=os.path.basename(p))
-            mem.seek(0)
             tszip = datetime.now().strftime("%Y%m%d_%H%M%S")
-            st.download_button("Save ZIP file", mem, file_name=f"veo_batch_{tszip}.zip", mime="application/zip", key=f"zip_{tszip}")
-
-# List items
-remove_ids = []
-for r in st.session_state.results:
-    if r["status"] != "OK":  # tampilkan hanya yang sukses
-        continue
-    vid_id = r["id"]; path = r["path"]; fname = r["fname"]; prompt = r["prompt"]
-
-    with st.container():
-        st.markdown(f"**{fname}**  \n*{prompt[:120]}{'…' if len(prompt)>120 else ''}*")
-        if path and os.path.exists(path):
-            st.video(path)
-            c1, c2, c3 = st.columns([1,1,1], gap="small")
-            with c1:
-                # per-item download button (stable key)
-                try:
-                    with open(path, "rb") as f:
-                        st.download_button("⬇️ Download MP4", f, file_name=fname, mime="video/mp4", key=f"dl_{vid_id}")
-                except Exception as e:
-                    st.warning(f"Gagal membuat tombol download: {e}")
-            with c2:
-                if st.button("🗑️ Remove from list", key=f"rm_{vid_id}"):
-                    remove_ids.append(vid_id)
-            with c3:
-                st.caption(path)
-        else:
-            st.error("File tidak ditemukan di server.")
-        st.markdown("<hr>", unsafe_allow_html=True)
-
-# Apply removals
+            paths = index.result_paths()  # present files only, from the index
+            zurl = files.zip_url(paths, f"veo_batch_{tszip}.zip", base=fbase, check=False) if use_files else None
+            if zurl:
+                st.link_button("Save ZIP file", zurl)
+            else:
+                ok, res = export.write_zip(paths, os.path.join(output_folder, "exports", f"veo_batch_{tszip}.zip"))
+                (st.success if ok else st.error)(f"ZIP disimpan: {res}" if ok else f"ZIP gagal: {res}")
+
+# Thumbnail grid (one page, straight from the job journal index); the player loads only in the dialog
+def clip_facts(meta: dict | None) -> str:
+    if not meta: return "belum diindeks"
+    facts = [f"{meta['size'] / 1024**2:.1f} MB"]
+    if meta["duration"]: facts.append(f"{meta['duration']:.1f} s")
+    if meta["width"]: facts.append(f"{meta['width']}×{meta['height']}")
+    if meta["codec"]: facts.append(meta["codec"] + (" + audio" if meta["audio"] else " • tanpa audio"))
+    return " • ".join(facts)
+
+@st.dialog("🎬 Video", width="large")
+def open_clip(r: dict, meta: dict | None):
+    path, fname, vid_id = r["path"], r["fname"], r["id"]
+    # by reference: the browser streams from the file server (Range), nothing goes through the websocket
+    vurl = files.url(path, base=fbase) if use_files else None
+    st.video(vurl or path, autoplay=True)
+    retention.touch([path])  # opened: most recently used for LRU eviction
+    st.markdown(f"**{fname}**  \n{r['prompt']}")
+    st.caption(f"{path} • {clip_facts(meta)}")
+    c1, c2 = st.columns(2, gap="small")
+    with c1:
+        if vurl:
+            st.link_button("⬇️ Download MP4", files.url(path, download=True, base=fbase))
+        elif st.button("⬇️ Siapkan download", key=f"prep_{vid_id}"):
+            # lazy handle: the file is only read when asked for
+            try:
+                with open(path, "rb") as f:
+                    st.download_button("⬇️ Download MP4", f, file_name=fname, mime="video/mp4",
+                                       key=f"dl_{vid_id}", on_click="ignore")
+            except Exception as e:
+                st.warning(f"Gagal membuat tombol download: {e}")
+    with c2:
+        if st.button("🗑️ Remove from list", key=f"rm_{vid_id}"):
+            store.hide([vid_id]); st.rerun()
+
+pages = max(1, -(-n_ok // GRID_PAGE_SIZE))
+page = st.number_input(f"Halaman (1–{pages}, {n_ok} video)", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+remove_ids, pin_paths = [], []
+results = store.results(OK, limit=GRID_PAGE_SIZE, offset=(page - 1) * GRID_PAGE_SIZE)
+indexed = index.lookup([r["path"] for r in results])  # one query instead of a stat per item
+for row_start in range(0, len(results), GRID_COLS):
+    for col, r in zip(st.columns(GRID_COLS, gap="small"), results[row_start:row_start + GRID_COLS]):
+        vid_id = r["id"]; path = r["path"]; prompt = r["prompt"]
+        meta = indexed.get(path)  # None = not indexed yet (just finished): trust the journal
+        with col:
+            if not path or (meta is not None and not meta["present"]):
+                st.error(f"{r['fname']}: file tidak ditemukan di server.")
+                if st.button("🗑️ Remove", key=f"rmx_{vid_id}"): remove_ids.append(vid_id)
+                continue
+            thumb = meta["poster"] if meta and meta["poster"] else None
+            if thumb and os.path.exists(thumb):
+                st.image((files.url(thumb, base=fbase) if use_files else None) or thumb, width="stretch")
+            else:
+                st.caption("⏳ Menyiapkan thumbnail…")
+            st.caption(f"{'⭐ ' if meta and meta['pinned'] else ''}**{r['fname']}**  \n{clip_facts(meta)}  \n*{prompt[:80]}{'…' if len(prompt) > 80 else ''}*")
+            bo, bp = st.columns([3, 1], gap="small")
+            with bo:
+                if st.button("▶️ Buka", key=f"open_{vid_id}", width="stretch"):
+                    open_clip(r, meta)
+            with bp:
+                pinned = bool(meta and meta["pinned"])
+                if st.button("⭐" if pinned else "☆", key=f"pin_{vid_id}", disabled=not meta, width="stretch",
+                             help="Lepas pin" if pinned else "Pin: tidak pernah dihapus/diarsip oleh retensi disk"):
+                    pin_paths.append((path, not pinned))
+
+# Apply removals / pins
+for path, pinned in pin_paths:
+    retention.pin(path, pinned)
+if pin_paths:
+    st.rerun()
 if remove_ids:
-    st.session_state.results = [x for x in st.session_state.results if x["id"] not in remove_ids]
+    store.hide(remove_ids)
     st.success(f"Dihapus {len(remove_ids)} item dari daftar.")
 
 # =========================
@@ -472,24 +619,76 @@ if remove_ids:
 # =========================
 if st.session_state["auto_enabled"]:
     # pilih 1 file yang belum auto_done
-    pending = next((x for x in st.session_state.results
-                    if x["status"] == "OK" and not x.get("auto_done", False)
-                    and x["path"] and os.path.exists(x["path"])), None)
+    pending = store.next_auto_download()
+    if pending and pending["path"] and not index.present(pending["path"]):
+        store.mark_auto_done(pending["id"]); pending = None
     if pending and st.session_state.get("auto_last_id") != pending["id"]:
-        trigger_browser_download(pending["path"], pending["fname"])
+        trigger_browser_download(pending["path"], pending["fname"],
+                                 url=files.url(pending["path"], download=True, base=fbase) if use_files else None)
         # tandai sebagai selesai supaya tidak berulang
-        pending["auto_done"] = True
+        store.mark_auto_done(pending["id"])
         st.session_state["auto_last_id"] = pending["id"]
         st.info(f"Mencoba auto-download: {pending['fname']} (jika diblokir browser, gunakan tombol Download MP4).")
 
+# =========================
+# Metrics
+# =========================
+with st.expander("📈 Metrics", expanded=False):
+    mL, mR = st.columns([3, 1], gap="small")
+    with mL:
+        st.caption("Per fase (detik / bytes), persentil dari 2048 sampel terakhir per seri. "
+                   "Hanya worker di proses ini; worker eksternal: --metrics-file.")
+        if files.ok and files.metrics:
+            st.caption(f"Prometheus: {(fbase or f'http://localhost:{files.port}')}/metrics")
+    with mR:
+        if st.button("Reset metrics"):
+            METRICS.reset()
+    summary = METRICS.summary()
+    if summary:
+        st.dataframe(summary, hide_index=True, width="stretch")
+        counters = [r for r in METRICS.scalars("counter") if r["value"]]
+        if counters:
+            st.dataframe(counters, hide_index=True, width="stretch")
+        gauges = METRICS.scalars("gauge")
+        single = {r["metric"]: int(r["value"]) for r in gauges if "phase" not in r}  # unlabelled gauges
+        phases = [f"{r['phase']} {int(r['value'])}" for r in gauges if r["metric"] == "renderx_jobs_inflight"]
+        st.caption("In-flight: " + " • ".join(phases + [f"pending {single.get('renderx_jobs_pending', 0)}"]))
+        st.caption("Circuit breaker: " + ("🔴 terbuka (kickoff ditahan)" if single.get("renderx_breaker_open")
+                                         else "🟢 tertutup"))
+    else:
+        st.caption("Belum ada data: jalankan batch dulu.")
+
 # =========================
 # Logs
 # =========================
 with st.expander("📜 Logs", expanded=False):
     log_file_path = locals().get("log_file")
     if use_file_log and log_file_path and os.path.exists(log_file_path):
-        if st.button("Muat Log Terbaru"):
-            st.text_area("Tail Log", tail_file(log_file_path), height=280)
+        # filtered search over the rotated JSON-lines files (binary search on time, not a full read)
+        lj = {j.id: j for j in store.jobs(st.session_state.my_batches, limit=200)}
+        l1, l2, l3, l4 = st.columns([2, 1, 1, 2], gap="small")
+        with l1:
+            log_job = lj.get(st.selectbox("Job", [""] + list(lj), key="log_job", format_func=lambda i: "(semua)" if not i
+                                          else f"#{lj[i].index} • {lj[i].status} • {lj[i].prompt[:40]}"))
+        with l2:
+            log_min = st.selectbox("Level min.", ["DEBUG", "INFO", "WARNING", "ERROR"], index=1, key="log_level_min")
+        with l3:
+            log_window = st.selectbox("Rentang", ["15 menit", "1 jam", "24 jam", "semua"], index=1, key="log_window")
+        with l4:
+            log_text = st.text_input("Teks", key="log_text", placeholder="mis. 429, Download FAIL")
+        if st.button("🔎 Cari Log", key="btn_log_search"):
+            since = until = None
+            if log_job is not None:  # the job's own window, from the journal
+                since = log_job.created_at - 5
+                until = log_job.finished_at + 5 if log_job.finished_at else None
+            elif log_window != "semua":
+                since = time.time() - {"15 menit": 900, "1 jam": 3600, "24 jam": 86400}[log_window]
+            recs = search_logs(log_file_path, job=log_job.id if log_job else "", level=log_min, since=since,
+                               until=until, text=log_text.strip())
+            st.caption(f"{len(recs)} baris (terbaru dulu, maks. 500)")
+            st.dataframe([{"waktu": r.get("time", ""), "level": r.get("level", ""), "fase": r.get("phase", ""),
+                           "job": r.get("job", "")[:8], "pesan": r.get("msg", "")} for r in recs],
+                         hide_index=True, width="stretch", height=320)
         st.caption(log_file_path)
     else:
         st.caption("File log belum tersedia atau logging dimatikan.")
@@ -0,0 +1,41 @@
+# tests/conftest.py — shared fixtures: the offline mock Veo API (renderx.mockserver) and engines pointed at it
+
+import pytest
+
+from renderx import api, poller
+from renderx.engine import BatchEngine, Job
+from renderx.errors import RETRY
+from renderx.mockserver import MockConfig, MockVeo
+from renderx.poller import PollScheduler
+
+S = 0.01  # time scale: a 20 s mock render takes 0.2 s
+PARAMS = dict(model="veo-3.0-fast-generate-preview", aspect_ratio="16:9", negative_prompt=None,
+              person_generation=None, duration_seconds=None)
+
+@pytest.fixture
+def mock(request, monkeypatch):
+    """Mock API on a free port; parametrize indirectly with MockConfig overrides."""
+    cfg = getattr(request, "param", {})
+    m = MockVeo(MockConfig(**{"render": {"": "fixed:20"}, "time_scale": S, "video_bytes": 4096, "seed": 7, **cfg}),
+                port=0).start()
+    monkeypatch.setattr(api, "BASE_URL", m.base_url)
+    monkeypatch.setattr(poller, "EXPECTED_RENDER", {k: v * S for k, v in poller.EXPECTED_RENDER.items()})
+    yield m
+    m.stop()
+
+@pytest.fixture
+def make_engine(tmp_path):
+    """BatchEngine factory writing to tmp_path, with poll intervals scaled like the mock."""
+    def make(**kw) -> BatchEngine:
+        kw.setdefault("scheduler", PollScheduler(min_interval=2 * S, max_interval=20 * S, near_interval=2.5 * S, seed=1))
+        kw.setdefault("retry", {cls: (n, base * S, cap * S) for cls, (n, base, cap) in RETRY.items()})
+        kw.setdefault("concurrency", 4)
+        return BatchEngine(kw.pop("api_key", "test-key"), str(tmp_path), timeout=30, **kw)
+    return make
+
+def make_jobs(n: int, prompt: str = "prompt {i}") -> list[Job]:
+    return [Job(index=i, prompt=prompt.format(i=i), params=PARAMS) for i in range(1, n + 1)]
+
+@pytest.fixture
+def jobs():
+    return make_jobs
@@ -0,0 +1,60 @@
+# tests/test_cache.py — content-addressed render cache and in-batch dedupe (renderx.cache)
+
+import os, time
+
+import pytest
+
+from renderx.cache import RenderCache, cache_key
+from renderx.engine import OK
+from renderx.store import JobStore
+
+from conftest import PARAMS
+
+@pytest.fixture
+def cache(tmp_path):
+    return RenderCache(JobStore.in_folder(str(tmp_path)), max_bytes=1000, max_age=3600)
+
+def clip(tmp_path, name, size=100):
+    p = tmp_path / name; p.write_bytes(b"\0" * size)
+    return str(p)
+
+def test_key_ignores_whitespace_but_not_parameters():
+    k = cache_key("a  cat\n on a mat", **PARAMS)
+    assert k == cache_key(" a cat on a mat ", **PARAMS)
+    assert k != cache_key("a cat on a mat", **{**PARAMS, "aspect_ratio": "9:16"})
+    assert k != cache_key("a dog on a mat", **PARAMS)
+
+def test_hit_and_miss(cache, tmp_path):
+    assert cache.get("k") is None
+    cache.put("k", clip(tmp_path, "a.mp4"))
+    assert cache.get("k") == str(tmp_path / "a.mp4")
+    assert cache.stats() == {"n": 1, "bytes": 100, "hits": 1}
+
+def test_changed_or_missing_file_is_a_miss(cache, tmp_path):
+    path = clip(tmp_path, "a.mp4"); cache.put("k", path)
+    with open(path, "ab") as f: f.write(b"x")
+    assert cache.get("k") is None and cache.stats()["n"] == 0
+    cache.put("k", path); os.remove(path)
+    assert cache.get("k") is None
+
+def test_evict_by_age_then_lru(cache, tmp_path):
+    for name in ("old", "a", "b", "c"): cache.put(name, clip(tmp_path, f"{name}.mp4", 400))
+    with cache.store.conn() as c:
+        c.execute("UPDATE render_cache SET created_at=? WHERE key='old'", (time.time() - 7200,))
+        c.execute("UPDATE render_cache SET last_used=last_used-10 WHERE key='a'")
+    assert cache.evict() == 2                                                        # "old" by age, "a" by size
+    assert cache.get("a") is None and cache.get("b") and cache.get("c")
+
+def test_engine_serves_a_repeat_from_the_cache(mock, make_engine, jobs, tmp_path):
+    store = JobStore.in_folder(str(tmp_path))
+    with make_engine(store=store, cache=RenderCache(store)) as e:
+        [first] = e.run(jobs(1))
+        [again] = e.run(jobs(1))
+    assert first.status == again.status == OK and again.cached and again.path == first.path
+    assert mock.stats["kickoff"] == 1
+
+def test_identical_prompts_in_a_batch_render_once(mock, make_engine, jobs):
+    with make_engine() as e:
+        done = e.run(jobs(2, prompt="same"))
+    assert [j.status for j in done] == [OK, OK] and sum(j.cached for j in done) == 1
+    assert done[0].path == done[1].path and mock.stats["kickoff"] == 1
@@ -0,0 +1,50 @@
+# tests/test_cli.py — prompt file parsing and the headless entry point (renderx.cli)
+
+import io, json
+
+import pytest
+
+from renderx import cli
+from renderx.engine import HIGH, NORMAL
+
+DEFAULTS = dict(model="veo-2.0-generate-001", aspect_ratio="16:9", negative_prompt=None,
+                person_generation=None, duration_seconds=8)
+
+def test_plain_lines():
+    jobs = cli.read_jobs(["a cat\n", "\n", "  a dog  \n"], DEFAULTS)
+    assert [(j.index, j.prompt) for j in jobs] == [(1, "a cat"), (2, "a dog")]
+    assert jobs[0].batch_id == jobs[1].batch_id and jobs[0].params == DEFAULTS and jobs[0].params is not DEFAULTS
+
+def test_jsonl_overrides_and_aliases():
+    line = json.dumps({"prompt": "x", "aspectRatio": "9:16", "durationSeconds": 5, "force": True,
+                       "priority": "HIGH", "ignored": 1})
+    [job] = cli.read_jobs([line], DEFAULTS, priority="normal")
+    assert job.params["aspect_ratio"] == "9:16" and job.params["duration_seconds"] == 5
+    assert job.force and job.priority == HIGH and "ignored" not in job.params
+
+def test_duration_only_for_veo2_and_default_person_generation():
+    lines = [json.dumps({"prompt": "x", "model": "veo-3.0-generate-preview", "person_generation": "(default)"}), "y"]
+    veo3, veo2 = cli.read_jobs(lines, DEFAULTS)
+    assert veo3.params["duration_seconds"] is None and veo3.params["person_generation"] is None
+    assert veo2.params["duration_seconds"] == 8 and veo2.priority == NORMAL
+
+@pytest.mark.parametrize("line, msg", [
+    ("{not json", "baris 2: JSON tidak valid"),
+    ('{"prompt": "  "}', "baris 2: field 'prompt' kosong"),
+    ('{"prompt": "x", "priority": "urgent"}', "baris 2: priority"),
+])
+def test_errors_name_the_line(line, msg):
+    with pytest.raises(ValueError, match=msg):
+        cli.read_jobs(["ok", line], DEFAULTS)
+
+def test_relative_output_is_made_absolute(tmp_path, monkeypatch):
+    seen = {}
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cli, "setup_logger", lambda *a, **kw: None)
+    monkeypatch.setattr(cli, "execute", lambda args, keys, store, claim, t0: seen.update(
+        output=args.output, db=store.path, jobs=claim("")) or cli.EXIT_OK)
+    monkeypatch.setattr("sys.stdin", io.StringIO("a cat\n"))
+    monkeypatch.setattr("sys.stdout", io.StringIO())
+    assert cli.main(["run", "-", "--output", "out", "--api-key", "k", "--no-log-file"]) == cli.EXIT_OK
+    assert seen["output"] == str(tmp_path / "out") and seen["db"].startswith(str(tmp_path / "out"))
+    assert len(seen["jobs"]) == 1
@@ -0,0 +1,102 @@
+# tests/test_download.py — resumable, verified and parallel-range downloads (renderx.download)
+
+import os, json, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from renderx import download
+from renderx.fileserver import parse_range
+
+BLOB = bytes(range(256)) * 8192  # 2 MiB: two download.CHUNKs
+Q = len(BLOB) // 4
+
+class Server:
+    """Serves BLOB with Range support; records the Range header of every request."""
+    def __init__(self):
+        self.ranges, self.drop_once, self.accept_ranges = [], 0, True
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a): pass
+            def do_GET(self):
+                header = self.headers.get("Range"); server.ranges.append(header)
+                if self.path != "/video.mp4":
+                    self.send_response(404); self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", "2"); self.end_headers(); self.wfile.write(b"{}"); return
+                try:
+                    rng = parse_range(header, len(BLOB)) if server.accept_ranges else None
+                except ValueError:
+                    self.send_response(416); self.send_header("Content-Range", f"bytes */{len(BLOB)}")
+                    self.send_header("Content-Length", "0"); self.end_headers(); return
+                start, end = rng or (0, len(BLOB) - 1)
+                body = BLOB[start:end + 1]
+                self.send_response(206 if rng else 200)
+                self.send_header("Content-Type", "video/mp4"); self.send_header("Content-Length", str(len(body)))
+                if server.accept_ranges: self.send_header("Accept-Ranges", "bytes")
+                if rng: self.send_header("Content-Range", f"bytes {start}-{end}/{len(BLOB)}")
+                self.end_headers()
+                if server.drop_once:  # connection lost mid-body
+                    body, server.drop_once = body[:server.drop_once], 0
+                    self.close_connection = True
+                self.wfile.write(body)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/video.mp4"
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+@pytest.fixture
+def server():
+    s = Server()
+    yield s
+    s.httpd.shutdown(); s.httpd.server_close()
+
+@pytest.fixture
+def out(tmp_path, monkeypatch):
+    monkeypatch.setitem(download.SETTINGS, "parallel_threshold", 32 * 1024 ** 2)
+    monkeypatch.setitem(download.SETTINGS, "parts", 4)
+    return str(tmp_path / "clip.mp4")
+
+def read(path):
+    with open(path, "rb") as f: return f.read()
+
+def test_small_file_single_stream(server, out):
+    assert download.fetch(server.url, out) == (True, out)
+    assert read(out) == BLOB and not os.path.exists(out + ".part") and server.ranges == [None]
+
+def test_resumes_an_existing_part(server, out):
+    with open(out + ".part", "wb") as f: f.write(BLOB[:Q])
+    assert download.fetch(server.url, out)[0] and read(out) == BLOB
+    assert server.ranges == [f"bytes={Q}-"]
+
+def test_stale_part_is_discarded(server, out):
+    with open(out + ".part", "wb") as f: f.write(b"x" * (len(BLOB) + 10))        # from some other, bigger file
+    assert download.fetch(server.url, out)[0] and read(out) == BLOB
+    assert server.ranges == [f"bytes={len(BLOB) + 10}-", None]
+
+def test_dropped_connection_resumes_with_range(server, out):
+    server.drop_once = 3 * Q                                                         # 1 CHUNK reached the .part
+    assert download.fetch(server.url, out)[0] and read(out) == BLOB
+    assert server.ranges == [None, f"bytes={download.CHUNK}-"]
+
+def test_server_without_ranges_restarts_from_zero(server, out):
+    server.accept_ranges = False
+    with open(out + ".part", "wb") as f: f.write(b"garbage")
+    assert download.fetch(server.url, out)[0] and read(out) == BLOB
+
+def test_parallel_ranges(server, out, monkeypatch):
+    monkeypatch.setitem(download.SETTINGS, "parallel_threshold", 1)
+    assert download.fetch(server.url, out)[0] and read(out) == BLOB
+    assert server.ranges[0] is None                                                 # the probe request
+    assert sorted(server.ranges[1:]) == sorted(f"bytes={a}-{a + Q - 1}" for a in range(0, len(BLOB), Q))
+
+def test_parallel_resume_fetches_only_missing_ranges(server, out):
+    half, mid = 2 * Q, 3 * Q                                                         # first range done, second half-way
+    with open(out + ".part", "wb") as f:
+        f.write(BLOB[:mid] + b"\0" * (len(BLOB) - mid))
+    with open(out + ".part.json", "w") as f:
+        json.dump({"total": len(BLOB), "ranges": [(0, half - 1, half), (half, len(BLOB) - 1, mid)]}, f)
+    assert download.fetch(server.url, out)[0] and read(out) == BLOB
+    assert server.ranges == [f"bytes={mid}-{len(BLOB) - 1}"] and not os.path.exists(out + ".part.json")
+
+def test_http_error_fails_without_a_file(server, out):
+    ok, err = download.fetch(server.url.replace("video", "missing"), out)
+    assert not ok and err == "{}" and not os.path.exists(out)
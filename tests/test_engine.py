@@ -0,0 +1,73 @@
+# tests/test_engine.py — BatchEngine end to end against the offline mock API (see conftest.py)
+
+import os
+
+import pytest
+
+from renderx.engine import OK, ERROR, CANCELLED, QUEUED, LOW, HIGH
+from renderx.errors import TRANSIENT
+from renderx.poller import PollScheduler
+
+def test_batch_renders_and_downloads(mock, make_engine, jobs):
+    with make_engine() as e:
+        done = e.run(jobs(3))
+    assert [j.status for j in done] == [OK] * 3
+    assert all(os.path.getsize(j.path) == 4096 and j.fname == os.path.basename(j.path) for j in done)
+    assert mock.stats["kickoff"] == 3 and mock.stats["download"] == 3
+
+def test_jobs_run_in_parallel_up_to_concurrency(mock, make_engine, jobs):
+    with make_engine(concurrency=4) as e:
+        e.run(jobs(4))
+    ends = [o["done_at"] for o in mock.ops.values()]
+    assert max(ends) - min(ends) < 0.2                                             # all four rendered at once
+
+def test_concurrency_one_is_sequential(mock, make_engine, jobs):
+    with make_engine(concurrency=1, reserve=0) as e:
+        e.run(jobs(3))
+    ends = sorted(o["done_at"] for o in mock.ops.values())
+    assert all(b - a >= 0.2 for a, b in zip(ends, ends[1:]))                      # each kickoff waited for the last
+
+def test_caller_scheduler_is_kept(make_engine):
+    s = PollScheduler()                                                            # empty, hence falsy
+    with make_engine(scheduler=s) as e:
+        assert e.scheduler is s
+
+@pytest.mark.parametrize("mock", [{"fail_rate": 1.0}], indirect=True)
+def test_failed_renders_are_retried_then_error(mock, make_engine, jobs):
+    with make_engine(retry={TRANSIENT: (2, 0.01, 0.01)}) as e:
+        [job] = e.run(jobs(1))
+    assert job.status == ERROR and job.error_class == TRANSIENT and job.attempts == 2
+    assert mock.stats["kickoff"] == 3
+
+@pytest.mark.parametrize("mock", [{"fail_rate": 1.0}], indirect=True)
+def test_non_retryable_class_fails_at_once(mock, make_engine, jobs):
+    with make_engine(retry={}) as e:
+        [job] = e.run(jobs(1))
+    assert job.status == ERROR and job.attempts == 0 and mock.stats["kickoff"] == 1
+
+def test_cancel_running_operation(mock, make_engine, jobs):
+    with make_engine() as e:
+        [job] = [e.submit(j) for j in jobs(1)]
+        for _ in range(100):
+            if job.operation: break
+            e.step(0.05)
+        assert e.cancel(job.id) is job
+        for _ in range(100):
+            if e.idle: break
+            e.step(0.05)
+    assert job.status == CANCELLED and mock.stats.get("cancel") == 1
+
+def test_cancel_before_kickoff(make_engine, jobs):
+    with make_engine() as e:
+        [job] = [e.submit(j) for j in jobs(1)]
+        assert e.cancel(job.id) is job and e.idle
+    assert job.status == CANCELLED
+
+def test_high_priority_jumps_the_queue_and_preempts_low(make_engine, jobs):
+    low, normal, high = jobs(3)
+    low.priority, high.priority = LOW, HIGH
+    with make_engine() as e:
+        for j in (low, normal, high): e.submit(j)
+        assert [j.id for j in e._pending] == [high.id, normal.id, low.id]
+        assert e.preempt(HIGH) == [low] and low.status == QUEUED
+        assert [j.id for j in e._pending] == [high.id, normal.id]
@@ -0,0 +1,82 @@
+# tests/test_errors.py — failure taxonomy, backoff and circuit breaker (renderx.errors)
+
+import random
+
+import pytest
+
+from renderx import errors
+from renderx.errors import CircuitBreaker, TRANSIENT, RATE_LIMIT, MODEL, POLICY, AUTH, INVALID, UNKNOWN
+
+@pytest.mark.parametrize("error, cls", [
+    ('503: {"error": {"code": 503, "status": "UNAVAILABLE"}}', TRANSIENT),
+    ("500 Server Error: Internal Server Error for url: …", TRANSIENT),
+    ("EXCEPTION: HTTPSConnectionPool: Read timed out. (read timeout=90)", TRANSIENT),
+    ('400: {"error": {"message": "Model veo-3.0 is not allowed for this project"}}', MODEL),
+    ('400: {"error": {"message": "The prompt violates our usage guidelines"}}', POLICY),
+    ('400: {"error": {"message": "API key not valid. Please pass a valid API key."}}', AUTH),
+    ('403: {"error": {"message": "The caller does not have permission"}}', AUTH),
+    ('400: {"error": {"message": "prompt is required", "status": "INVALID_ARGUMENT"}}', INVALID),
+    ("something odd", UNKNOWN),
+])
+def test_classify(error, cls):
+    assert errors.classify(error)[0] == cls
+
+def test_classify_rate_limit_reads_retry_delay():
+    body = '429: {"error": {"status": "RESOURCE_EXHAUSTED", "details": [{"retryDelay": "12.5s"}]}}'
+    assert errors.classify(body) == (RATE_LIMIT, 12.5)
+    assert errors.classify("429: Too Many Requests") == (RATE_LIMIT, None)
+
+@pytest.mark.parametrize("response, cls", [
+    ({"error": {"code": 13, "message": "Video generation failed."}}, TRANSIENT),
+    ({"error": {"code": 8, "message": "quota"}}, RATE_LIMIT),
+    ({"error": {"code": 3, "message": "bad request"}}, INVALID),
+    ({"error": {"code": 13, "message": "Blocked by safety filter"}}, POLICY),
+    ({"response": {"generateVideoResponse": {"raiMediaFilteredCount": 1,
+                                             "raiMediaFilteredReasons": ["child safety"]}}}, POLICY),
+    ({"response": {"generateVideoResponse": {}}}, UNKNOWN),
+])
+def test_classify_operation(response, cls):
+    assert errors.classify_operation(response)[0] == cls
+
+def test_was_cancelled():
+    assert errors.was_cancelled({"done": True, "error": {"code": 1, "message": "cancelled"}})
+    assert not errors.was_cancelled({"done": True, "error": {"code": 13}})
+
+def test_backoff_grows_is_capped_and_honours_retry_after():
+    rng = random.Random(1)
+    n, base, cap = errors.RETRY[TRANSIENT]
+    delays = [errors.backoff(TRANSIENT, a, rng=rng) for a in range(1, 10)]
+    assert all(base / 2 <= d <= cap for d in delays)
+    assert delays[-1] >= cap / 2
+    assert errors.backoff(TRANSIENT, 1, retry_after=500.0, rng=rng) == 500.0
+    assert errors.backoff(TRANSIENT, 1, rng=rng, policy={TRANSIENT: (1, 0.1, 0.1)}) <= 0.1
+
+class Clock:
+    def __init__(self): self.t = 1000.0
+    def __call__(self): return self.t
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    b = CircuitBreaker(window=60, min_calls=4, threshold=0.5, cooldown=10, max_cooldown=40, clock=clock)
+    for ok in (True, False, False, True):
+        b.record(ok)
+    assert b.state == "open" and b.blocked() and b.retry_at == 1010.0
+    clock.t += 11
+    assert b.state == "half-open" and not b.blocked()
+    assert b.begin() and b.blocked()           # one probe, the rest wait
+    assert not b.begin()
+    b.record(False, probe=True)                 # failed probe: re-open, doubled cooldown
+    assert b.state == "open" and b.cooldown == 20
+    clock.t += 21
+    assert b.begin()
+    b.record(True, probe=True)
+    assert b.state == "closed" and b.cooldown == 10 and not b.blocked()
+
+def test_breaker_ignores_old_and_few_calls():
+    clock = Clock()
+    b = CircuitBreaker(window=60, min_calls=4, threshold=0.5, clock=clock)
+    for _ in range(3): b.record(False)
+    assert b.state == "closed"                  # below min_calls
+    clock.t += 61
+    b.record(True); b.record(True); b.record(True); b.record(False)
+    assert b.state == "closed"                  # the old failures fell out of the window
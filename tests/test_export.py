@@ -0,0 +1,46 @@
+# tests/test_export.py — streamed ZIP export (renderx.export)
+
+import io, os, zipfile
+
+import pytest
+
+from renderx import export
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "a").mkdir(); (tmp_path / "b").mkdir()
+    big = os.urandom(export.CHUNK * 2 + 123)
+    paths = {"a/clip.mp4": big, "b/clip.mp4": b"other", "a/notes.txt": b"hello " * 1000}
+    for rel, data in paths.items(): (tmp_path / rel).write_bytes(data)
+    return {str(tmp_path / rel): data for rel, data in paths.items()}
+
+def test_entries_dedupes_and_renames(files, tmp_path):
+    paths = list(files) + [next(iter(files)), str(tmp_path / "gone.mp4")]
+    assert [name for _, name in export.entries(paths)] == ["clip.mp4", "clip_2.mp4", "notes.txt"]
+    assert len(export.entries([str(tmp_path / "gone.mp4")], check=False)) == 1
+
+def test_iter_zip_streams_a_valid_archive(files):
+    chunks = list(export.iter_zip(export.entries(files)))
+    assert len(chunks) > 2 and max(map(len, chunks)) < 2 * export.CHUNK            # never the whole archive at once
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.testzip() is None
+        assert [zf.read(n) for n in ("clip.mp4", "clip_2.mp4", "notes.txt")] == list(files.values())
+        assert zf.getinfo("clip.mp4").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("notes.txt").compress_type == zipfile.ZIP_DEFLATED
+
+def test_iter_zip_skips_files_removed_since_the_listing(files):
+    listed = export.entries(files)
+    os.remove(listed[1][0])
+    with zipfile.ZipFile(io.BytesIO(b"".join(export.iter_zip(listed)))) as zf:
+        assert zf.namelist() == ["clip.mp4", "notes.txt"] and zf.testzip() is None
+
+def test_write_zip_matches_the_stream(files, tmp_path):
+    out = str(tmp_path / "out" / "batch.zip")
+    assert export.write_zip(files, out) == (True, out) and not os.path.exists(out + ".part")
+    with zipfile.ZipFile(out) as zf, zipfile.ZipFile(io.BytesIO(b"".join(export.iter_zip(export.entries(files))))) as st:
+        assert [(i.filename, i.CRC, i.file_size) for i in zf.infolist()] == \
+               [(i.filename, i.CRC, i.file_size) for i in st.infolist()]
+
+def test_write_zip_without_files(tmp_path):
+    ok, msg = export.write_zip([str(tmp_path / "nope.mp4")], str(tmp_path / "x.zip"))
+    assert not ok and not os.path.exists(tmp_path / "x.zip")
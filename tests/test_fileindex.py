@@ -0,0 +1,61 @@
+# tests/test_fileindex.py — incremental index of the output folder (renderx.fileindex)
+
+import os, hashlib
+
+import pytest
+
+from renderx.engine import OK
+from renderx.fileindex import FileIndex
+from renderx.store import JobStore
+
+@pytest.fixture
+def index(tmp_path):
+    return FileIndex(JobStore.in_folder(str(tmp_path)))
+
+def result(index, jobs, tmp_path, name, data=b"video"):
+    [job] = jobs(1)
+    job.status = OK; job.fname = name; job.path = os.path.join(str(tmp_path), name); job.finished_at = 1.0
+    if data is not None: (tmp_path / name).write_bytes(data)
+    index.store.save(job)
+    return job
+
+def drain(index, folder=None) -> int:
+    n = 0
+    while True:
+        k = index.sync(folder)
+        if not k: return n
+        n += k
+
+def test_new_results_are_indexed(index, jobs, tmp_path):
+    job = result(index, jobs, tmp_path, "a.mp4")
+    gone = result(index, jobs, tmp_path, "b.mp4", data=None)                         # never written / deleted
+    assert drain(index) == 2
+    rows = index.lookup([job.path, gone.path])
+    assert rows[job.path]["sha256"] == hashlib.sha256(b"video").hexdigest()
+    assert rows[job.path]["job_id"] == job.id and rows[job.path]["prompt"] == job.prompt
+    assert rows[job.path]["poster"] and rows[job.path]["last_access"] == rows[job.path]["mtime"]
+    assert rows[gone.path]["present"] == 0 and index.result_paths() == [job.path]
+
+def test_not_yet_indexed_results_count_as_present(index, jobs, tmp_path):
+    job = result(index, jobs, tmp_path, "a.mp4")
+    assert index.present(job.path) and index.result_paths() == [job.path]
+
+def test_folder_scan_only_when_the_folder_changed(index, tmp_path):
+    (tmp_path / "outside.mp4").write_bytes(b"x" * 10); (tmp_path / "notes.txt").write_text("no")
+    folder = str(tmp_path)
+    assert drain(index, folder) == 1 and index.stats()["n"] == 1
+    assert index.sync(folder) == 0                                                   # nothing moved: one stat
+    os.remove(tmp_path / "outside.mp4")
+    assert index.sync(folder) == 1
+    assert index.stats() == {"n": 0, "bytes": 0, "seconds": 0, "missing": 1}
+
+def test_changed_file_is_rehashed_on_recheck(index, jobs, tmp_path):
+    job = result(index, jobs, tmp_path, "a.mp4")
+    drain(index)
+    (tmp_path / "a.mp4").write_bytes(b"re-encoded")
+    assert index.sync() == 0                                                         # not due yet
+    with index.store.conn() as c:
+        c.execute("UPDATE files SET checked_at=0")
+    assert index.sync() == 1
+    row = index.lookup([job.path])[job.path]
+    assert row["size"] == 10 and row["sha256"] == hashlib.sha256(b"re-encoded").hexdigest()
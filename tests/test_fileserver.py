@@ -0,0 +1,58 @@
+# tests/test_fileserver.py — Range parsing, signed URLs and browser base URLs (renderx.fileserver)
+
+import pytest
+
+from renderx.fileserver import FileServer, parse_range
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None), ("", None), ("items=0-1", None), ("bytes=0-1,4-5", None),   # whole file
+    ("bytes=0-99", (0, 99)), ("bytes=100-", (100, 999)), ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)), ("bytes=-5000", (0, 999)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=10-5", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+@pytest.fixture
+def served(tmp_path):
+    root = tmp_path / "out"; (root / "sub").mkdir(parents=True)
+    (root / "sub" / "a b.mp4").write_bytes(b"x" * 10)
+    (tmp_path / "secret.txt").write_text("no")
+    files = FileServer(host="127.0.0.1", port=0)
+    files.allow(str(root))
+    return files, root
+
+def test_signed_url_resolves(served):
+    files, root = served
+    url = files.url(str(root / "sub" / "a b.mp4"), download=True)
+    path, q = files.resolve(url.split(str(files.port), 1)[1])
+    assert path == str(root / "sub" / "a b.mp4") and q["dl"] == "1"
+
+def test_tampered_or_outside_paths_rejected(served, tmp_path):
+    files, root = served
+    assert files.url(str(tmp_path / "secret.txt")) is None
+    url = files.url(str(root / "sub" / "a b.mp4")).split(str(files.port), 1)[1]
+    assert files.resolve(url.replace("a%20b", "a%20c"))[0] is None                       # signature
+    assert files.resolve(url.replace("sig=", "sig=0"))[0] is None
+    rid = url.split("/")[2]
+    assert files.resolve(f"/f/{rid}/../secret.txt?exp=9999999999&sig=x")[0] is None       # containment
+
+def test_base_for():
+    files = FileServer(host="127.0.0.1", port=0)
+    assert files.base_for("localhost") is None                                           # not running
+    files.start()
+    try:
+        assert files.base_for("localhost") == f"http://localhost:{files.port}"
+        assert files.base_for("::1") == f"http://[::1]:{files.port}"
+        assert files.base_for("localhost", "https") is None                              # mixed content
+        assert files.base_for("render.lan") is None                                      # bound to loopback
+        files.host = "0.0.0.0"
+        assert files.base_for("render.lan") == f"http://render.lan:{files.port}"
+        files.public_url = "https://files.example"
+        assert files.base_for("render.lan", "https") == "https://files.example"
+    finally:
+        files.stop()
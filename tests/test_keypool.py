@@ -0,0 +1,71 @@
+# tests/test_keypool.py — per-key token bucket, in-flight cap, 429 benching (renderx.keypool)
+
+import time
+
+import pytest
+
+from renderx.keypool import KeyPool, key_id, split_keys
+
+def test_split_keys_and_ids():
+    assert split_keys("k1, k2\nk3 k1") == ["k1", "k2", "k3"]
+    assert key_id("k1") == key_id("k1") != key_id("k2") and len(key_id("k1")) == 16
+
+def test_single_key_pool_id_is_the_key_id():
+    pool = KeyPool()
+    assert pool.add("k1") == key_id("k1")
+    assert pool.add(["k1", "k2"]).startswith("pool-")
+
+def test_burst_then_refill():
+    pool = KeyPool(rate_per_min=60.0, burst=2, max_inflight=10)
+    pid = pool.add("k1"); now = time.time()
+    assert pool.acquire(pid, "m", now) and pool.acquire(pid, "m", now)
+    assert pool.acquire(pid, "m", now) is None                       # bucket empty
+    assert pool.next_ready(pid, "m", now) == pytest.approx(now + 1.0, abs=0.05)
+    assert pool.acquire(pid, "m", now + 1.01) == key_id("k1")         # 1 token/s
+
+def test_inflight_cap_and_release():
+    pool = KeyPool(rate_per_min=6000.0, burst=10, max_inflight=2)
+    pid = pool.add("k1"); now = time.time()
+    kid = pool.acquire(pid, "m", now); pool.acquire(pid, "m", now)
+    assert pool.acquire(pid, "m", now) is None
+    assert pool.next_ready(pid, "m", now) is None                     # only a release frees a slot
+    pool.release(kid)
+    assert pool.acquire(pid, "m", now) == kid
+
+def test_spreads_over_keys():
+    pool = KeyPool(rate_per_min=60.0, burst=4, max_inflight=10)
+    pid = pool.add(["k1", "k2"]); now = time.time()
+    got = [pool.acquire(pid, "m", now) for _ in range(4)]
+    assert sorted(got) == sorted([key_id("k1"), key_id("k2")] * 2)
+
+def test_throttled_benches_key_and_uses_the_other():
+    pool = KeyPool(rate_per_min=600.0, burst=4, bench_base=30.0)
+    pid = pool.add(["k1", "k2"])
+    pool.throttled(key_id("k1"))
+    now = time.time()
+    assert {pool.acquire(pid, "m", now) for _ in range(3)} == {key_id("k2")}
+    assert pool.acquire(pid, "m", now + 31) == key_id("k1")
+
+def test_retry_after_wins_over_the_default_bench():
+    pool = KeyPool(bench_base=30.0); pool.add("k1")
+    pool.throttled(key_id("k1"), retry_after=5.0)
+    assert pool.snapshot()[0]["benched_s"] == 5
+
+def test_throttle_backoff_doubles_until_success():
+    pool = KeyPool(bench_base=10.0, bench_max=25.0)
+    kid = key_id("k1"); pool.add("k1")
+    for expected in (10, 20, 25):
+        t0 = time.time(); pool.throttled(kid)
+        assert pool._state[kid].benched_until - t0 == pytest.approx(expected, abs=0.5)
+    pool.succeeded(kid)
+    assert pool._state[kid].strikes == 0
+
+def test_reject_model_only_for_that_model():
+    pool = KeyPool(); pid = pool.add("k1")
+    pool.reject_model(key_id("k1"), "veo-3")
+    assert not pool.can_serve(pid, "veo-3") and pool.can_serve(pid, "veo-2")
+    assert pool.acquire(pid, "veo-3") is None and pool.acquire(pid, "veo-2") == key_id("k1")
+
+def test_unknown_option():
+    with pytest.raises(ValueError):
+        KeyPool(bogus=1)
@@ -0,0 +1,69 @@
+# tests/test_logs.py — JSON-lines log records, binary search by time and search filters (renderx.logs)
+
+import io, json, logging
+
+import pytest
+
+from renderx import logs
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+def record(ts: float, i: int) -> dict:
+    return {"ts": ts, "time": "", "level": LEVELS[i % 4], "msg": f"message {i}" + (" needle" if i % 7 == 0 else ""),
+            "job": f"job{i % 3}"}
+
+@pytest.fixture
+def log(tmp_path):
+    """1000 records at ts 1000…1999 over the current file and two rotated ones (oldest in .2)."""
+    path = tmp_path / "app.log"
+    recs = [record(1000.0 + i, i) for i in range(1000)]
+    for name, chunk in ((f"{path}.2", recs[:300]), (f"{path}.1", recs[300:600]), (str(path), recs[600:])):
+        with open(name, "w") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in chunk))
+    return str(path), recs
+
+def test_rotated_files_oldest_first(log):
+    path, _ = log
+    assert logs.rotated_files(path) == [f"{path}.2", f"{path}.1", path]
+
+@pytest.mark.parametrize("t", [0, 600, 600.5, 777, 999, 5000])
+def test_seek_time(log, t):
+    path, recs = log
+    with open(path, "rb") as f:
+        pos = logs.seek_time(f, t)
+        f.seek(0); before = f.read(pos)
+        after = [json.loads(l) for l in f]
+    assert all(json.loads(l)["ts"] < t for l in before.splitlines())
+    assert [r["ts"] for r in after if r["ts"] >= t] == [r["ts"] for r in recs[600:] if r["ts"] >= t]
+
+def test_seek_time_skips_unparseable_lines():
+    lines = [json.dumps({"ts": float(i)}) + "\n" + ("Traceback …\n" if i % 5 == 0 else "") for i in range(100)]
+    f = io.BytesIO("".join(lines).encode())
+    pos = logs.seek_time(f, 50); f.seek(pos)
+    first = next(r for r in map(logs.parse_line, f.read().decode().splitlines()) if r)
+    assert 45 <= first["ts"] <= 50
+
+def test_search_filters(log):
+    path, recs = log
+    got = logs.search(path, job="job1", level="WARNING", since=1250, until=1700, text="NEEDLE")
+    want = [r for r in recs if r["job"] == "job1" and r["level"] in ("WARNING", "ERROR") and 1250 <= r["ts"] <= 1700
+            and "needle" in r["msg"]]
+    assert got == list(reversed(want)) and got                                       # newest first, across files
+
+def test_search_limit_keeps_the_newest(log):
+    path, recs = log
+    assert logs.search(path, limit=5) == list(reversed(recs[-5:]))
+    assert logs.search(path, until=1100, limit=3) == list(reversed(recs[98:101]))
+
+def test_legacy_text_lines():
+    rec = logs.parse_line("2024-05-01 10:00:00,123 | ERROR | Poll FAIL job=1 | x")
+    assert rec["level"] == "ERROR" and rec["msg"] == "Poll FAIL job=1 | x" and rec["ts"] > 0
+    assert logs.parse_line("    at some traceback line") is None
+
+def test_json_formatter_carries_context_tags():
+    rec = logging.LogRecord("veo_gemini_adv", logging.INFO, __file__, 1, "hello %s", ("x",), None)
+    with logs.context(job="j1", op="models/m/operations/o"):
+        logs.ContextFilter().filter(rec)
+    out = json.loads(logs.JsonFormatter().format(rec))
+    assert out["msg"] == "hello x" and out["job"] == "j1" and out["op"] == "models/m/operations/o"
+    assert "phase" not in out
@@ -0,0 +1,61 @@
+# tests/test_mp4.py — renderx.mp4 box reader against synthetic MP4s (no media data needed)
+
+import struct
+
+import pytest
+
+from renderx import mp4
+
+IDENTITY = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)  # a real tkhd matrix
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+def full(kind: bytes, version: int, payload: bytes) -> bytes:
+    return box(kind, bytes([version, 0, 0, 0]) + payload)
+
+def tkhd(w: int, h: int, version: int = 0) -> bytes:
+    times = struct.pack(">QQIIQ", 0, 0, 1, 0, 8000) if version else struct.pack(">IIIII", 0, 0, 1, 0, 8000)
+    return full(b"tkhd", version, times + b"\0" * 16 + IDENTITY + struct.pack(">II", w << 16, h << 16))
+
+def trak(kind: bytes, fourcc: bytes, w: int = 0, h: int = 0, version: int = 0, entry_w: int = 0, entry_h: int = 0) -> bytes:
+    entry = b"\0" * 6 + b"\0\1" + b"\0" * 16 + struct.pack(">HH", entry_w, entry_h) + b"\0" * 50
+    stsd = full(b"stsd", 0, struct.pack(">I", 1) + struct.pack(">I4s", 8 + len(entry), fourcc) + entry)
+    hdlr = full(b"hdlr", 0, b"\0" * 4 + kind + b"\0" * 12 + b"name\0")
+    return box(b"trak", tkhd(w, h, version) + box(b"mdia", full(b"mdhd", 0, b"\0" * 20) + hdlr +
+                                                  box(b"minf", box(b"stbl", stsd))))
+
+def movie(*traks: bytes, scale: int = 1000, dur: int = 8000, mvhd_version: int = 0) -> bytes:
+    if mvhd_version:
+        mvhd = full(b"mvhd", 1, struct.pack(">QQIQ", 0, 0, scale, dur) + b"\0" * 80)
+    else:
+        mvhd = full(b"mvhd", 0, struct.pack(">IIII", 0, 0, scale, dur) + b"\0" * 80)
+    # moov after mdat, like Veo writes it
+    return box(b"ftyp", b"isom\0\0\2\0isom") + box(b"mdat", b"\1" * 4096) + box(b"moov", mvhd + b"".join(traks))
+
+@pytest.fixture
+def write(tmp_path):
+    def write(data: bytes, name: str = "clip.mp4") -> str:
+        p = tmp_path / name; p.write_bytes(data)
+        return str(p)
+    return write
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_tkhd_size_v0_and_v1(write, version):
+    info = mp4.probe(write(movie(trak(b"vide", b"avc1", 1280, 720, version))))
+    assert (info["width"], info["height"]) == (1280, 720)
+
+def test_probe_video_and_audio(write):
+    info = mp4.probe(write(movie(trak(b"vide", b"hvc1", 720, 1280), trak(b"soun", b"mp4a"))))
+    assert info == {"duration": 8.0, "width": 720, "height": 1280, "codec": "hvc1", "audio": True, "audio_codec": "mp4a"}
+
+def test_visual_sample_entry_fallback(write):
+    info = mp4.probe(write(movie(trak(b"vide", b"avc1", 0, 0, entry_w=1920, entry_h=1080))))
+    assert (info["width"], info["height"], info["audio"]) == (1920, 1080, False)
+
+def test_mvhd_v1_duration(write):
+    assert mp4.duration(write(movie(trak(b"vide", b"avc1", 16, 9), scale=600, dur=3000, mvhd_version=1))) == 5.0
+
+@pytest.mark.parametrize("data", [b"", b"junk" * 10, movie()[:-20]])
+def test_not_an_mp4(write, data):
+    assert mp4.probe(write(data)) is None
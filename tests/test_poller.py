@@ -0,0 +1,56 @@
+# tests/test_poller.py — adaptive poll intervals and the global 429 pause (renderx.poller)
+
+import pytest
+
+from renderx import poller
+from renderx.poller import PollScheduler
+
+T0 = 1000.0  # add() treats a started_at of 0 as "now"
+
+def entry(sched: PollScheduler, model: str = "veo-3.0-fast-generate-preview", polls: int = 0) -> dict:
+    sched.add("j", model, started_at=T0)
+    e = sched._jobs["j"]; e["polls"] = polls
+    return e
+
+@pytest.fixture
+def sched():
+    return PollScheduler(jitter=0.0, seed=1)
+
+def test_expected_render_time_longest_prefix():
+    assert poller.expected_render_time("veo-3.0-fast-generate-preview") == poller.EXPECTED_RENDER["veo-3.0-fast"]
+    assert poller.expected_render_time("veo-3.0-generate-preview") == poller.EXPECTED_RENDER["veo-3.0"]
+    assert poller.expected_render_time("something-else") == poller.DEFAULT_EXPECTED
+
+def test_early_backoff_grows_but_stops_at_the_window(sched):
+    e = entry(sched)                               # expected 45 s → window 36 … 67.5 s
+    assert sched._interval(e, T0 + 0.0) == pytest.approx(2.0)
+    e["polls"] = 3
+    assert sched._interval(e, T0 + 5.0) == pytest.approx(2.0 * 1.6 ** 3)
+    e["polls"] = 20
+    assert sched._interval(e, T0 + 10.0) == pytest.approx(20.0)        # max_interval
+    assert sched._interval(e, T0 + 30.0) == pytest.approx(6.0)         # never sleeps past the window start
+    assert sched._interval(e, T0 + 35.5) == pytest.approx(2.0)         # but not below min_interval
+
+def test_tight_polling_inside_the_window(sched):
+    e = entry(sched, polls=10)
+    assert sched._interval(e, T0 + 40.0) == pytest.approx(2.5)
+    assert sched._interval(e, T0 + 67.0) == pytest.approx(2.5)
+
+def test_overdue_backs_off_to_the_cap(sched):
+    e = entry(sched)
+    just_late, very_late = sched._interval(e, T0 + 70.0), sched._interval(e, T0 + 400.0)
+    assert 2.5 < just_late < very_late == pytest.approx(20.0)
+
+def test_jitter_stays_in_bounds():
+    sched = PollScheduler(jitter=0.15, seed=3)
+    e = entry(sched)
+    assert all(0.85 * 2.5 <= sched._interval(e, T0 + 50.0) <= 1.15 * 2.5 for _ in range(200))
+
+def test_due_record_and_throttle(sched):
+    sched.add("a", started_at=100.0); sched.add("b", started_at=100.0)
+    assert len(sched) == 2 and not sched.due(101.0) and sorted(sched.due(102.0)) == ["a", "b"]
+    sched.record("a", now=102.0)
+    assert sched.due(102.5) == ["b"]
+    sched.throttle(retry_after=30.0)
+    assert sched.paused and sched.due() == []
+    assert sched.next_wakeup() == sched.paused_until
@@ -0,0 +1,64 @@
+# tests/test_prompts.py — bulk prompt store: ingestion, paging, filters and bulk edits (renderx.prompts)
+
+import io, json
+
+import pytest
+
+from renderx import prompts
+from renderx.engine import OK, RUNNING
+from renderx.prompts import PromptStore, parse_line
+from renderx.store import JobStore
+
+@pytest.fixture
+def ps(tmp_path):
+    return PromptStore(JobStore.in_folder(str(tmp_path)))
+
+def test_parse_line():
+    assert parse_line("  a cat ") == ("a cat", [], {})
+    assert parse_line(json.dumps({"prompt": "x", "tags": "Sky, sea,sky", "aspectRatio": "9:16"})) == \
+           ("x", ["sky", "sea"], {"aspect_ratio": "9:16"})
+    assert parse_line("") is None and parse_line("{bad") is None and parse_line('{"prompt": ""}') is None
+
+def test_ingest_streams_and_counts_skipped(ps):
+    raw = "one\n\n{bad json\n" + json.dumps({"prompt": "two", "tags": ["a"]}) + "\nthree\n"
+    assert ps.ingest("u", io.BytesIO(raw.encode()), tags="imported") == (3, 1)
+    rows = ps.page("u")
+    assert [(r["seq"], r["text"]) for r in rows] == [(1, "one"), (2, "two"), (3, "three")]
+    assert rows[1]["tags"] in ("a, imported", "imported, a") and ps.tags("u") == ["a", "imported"]
+
+def test_add_in_batches_and_page(ps, monkeypatch):
+    monkeypatch.setattr(prompts, "BATCH", 7)
+    assert ps.add("u", (f"p{i}" for i in range(30))) == 30
+    assert ps.count("u") == 30 and ps.count("other") == 0
+    assert [r["text"] for r in ps.page("u", limit=5, offset=10)] == [f"p{i}" for i in range(10, 15)]
+    assert [r["text"] for r in ps.iter("u")] == [f"p{i}" for i in range(30)]
+
+def test_filters(ps):
+    ps.add("u", [("a red car", ["car"], {}), ("100% blue_sky", [], {}), ("a red sky", ["sky"], {})])
+    assert ps.count("u", search="red") == 2 and ps.count("u", search="%") == 1 and ps.count("u", search="_") == 1
+    assert ps.count("u", tag="SKY") == 1 and ps.count("u", search="red", tag="car") == 1
+    assert ps.count("u", status="baru") == 3 and ps.count("u", status="aktif") == 0
+
+def test_bulk_edits_by_ids_or_filter(ps):
+    ps.add("u", ["keep me", "drop me", "drop me too"]); ps.add("v", ["drop me (other user)"])
+    ids = [r["id"] for r in ps.page("u")]
+    assert ps.tag("u", "x, y", ids=ids[:2]) == 4 and ps.untag("u", "y", ids=ids[:2]) == 2
+    assert ps.delete("u", search="drop") == 2
+    assert [r["text"] for r in ps.page("u")] == ["keep me"] and ps.count("v") == 1
+    assert ps.delete("u", ids=[]) == 0 and ps.clear("u") == 1 and ps.count("v") == 1
+
+def test_update(ps):
+    ps.add("u", ["old"]); [row] = ps.page("u")
+    ps.update(row["id"], text="  new  ", tags="a,b"); ps.update(row["id"], text=" ")
+    [row] = ps.page("u")
+    assert row["text"] == "new" and row["tags"] in ("a, b", "b, a")
+
+def test_status_follows_the_latest_job(ps, jobs):
+    ps.add("u", ["p"]); [row] = ps.page("u")
+    ps.mark([row["id"]], "QUEUED")
+    [job] = jobs(1); job.prompt_id = row["id"]; job.status = RUNNING
+    ps.store.save(job)
+    assert ps.refresh("u") == 1 and ps.page("u")[0]["status"] == RUNNING
+    job.status = OK; ps.store.save(job)
+    assert ps.refresh("u") == 1 and ps.count("u", status="OK") == 1
+    assert ps.refresh("u") == 0                                                      # finished prompts are left alone
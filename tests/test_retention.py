@@ -0,0 +1,81 @@
+# tests/test_retention.py — LRU eviction plan, pinning and archiving (renderx.retention)
+
+import os, time, argparse
+
+import pytest
+
+from renderx.fileindex import FileIndex
+from renderx.retention import GRACE, Retention, add_retention_args, retention_settings
+from renderx.store import JobStore
+
+DAY = 86400
+
+@pytest.fixture
+def index(tmp_path):
+    store = JobStore.in_folder(str(tmp_path))
+    idx = FileIndex(store)
+    now = time.time()
+    for name, size, age_days in (("a", 400, 10), ("b", 300, 5), ("c", 200, 2), ("new", 100, 0)):
+        p = tmp_path / f"{name}.mp4"; p.write_bytes(b"\0" * size)
+        t = now - age_days * DAY - (60 if age_days else 0)
+        with store.conn() as c:
+            c.execute("INSERT INTO files (path, size, mtime, last_access, present, indexed_at, checked_at) "
+                      "VALUES (?, ?, ?, ?, 1, ?, ?)", (str(p), size, t, t, now, now))
+    return idx
+
+def path(index, name):
+    return os.path.join(os.path.dirname(index.store.path), f"{name}.mp4")
+
+def names(rows):
+    return [(os.path.basename(r["path"])[:-4], r["reason"]) for r in rows]
+
+def test_no_limits_no_plan(index):
+    assert Retention(index, max_bytes=0, max_age=0).plan() == []
+
+def test_quota_evicts_least_recently_used_until_under(index):
+    assert names(Retention(index, max_bytes=500, max_age=0).plan()) == [("a", "quota"), ("b", "quota")]
+    assert Retention(index, max_bytes=1000, max_age=0).plan() == []
+
+def test_age_limit(index):
+    assert names(Retention(index, max_bytes=0, max_age=3 * DAY).plan()) == [("a", "age"), ("b", "age")]
+
+def test_age_and_quota_together(index):
+    assert names(Retention(index, max_bytes=250, max_age=7 * DAY).plan()) == [("a", "age"), ("b", "quota"),
+                                                                          ("c", "quota")]
+
+def test_grace_and_pinned_are_kept(index):
+    ret = Retention(index, max_bytes=1, max_age=0)
+    ret.pin(path(index, "b"))
+    planned = names(ret.plan())
+    assert planned == [("a", "quota"), ("c", "quota")]   # "new" is younger than GRACE
+    later = names(ret.plan(now=time.time() + GRACE + 120))
+    assert ("new", "quota") in later and ("b", "quota") not in later
+
+def test_touch_moves_a_file_to_the_back(index):
+    ret = Retention(index, max_bytes=500, max_age=0)
+    ret.touch([path(index, "a")])
+    assert names(ret.plan()) == [("b", "quota"), ("c", "quota")]
+
+def test_sweep_archives_and_updates_the_index(index, tmp_path):
+    ret = Retention(index, max_bytes=500, max_age=0, archive_dir=str(tmp_path / "archive"))
+    assert ret.sweep()["n"] == 2
+    assert not os.path.exists(path(index, "a")) and (tmp_path / "archive" / "a.mp4").exists()
+    s = ret.stats()
+    assert s["bytes"] == 300 and s["evicted"] == s["archived"] == 2
+    assert ret.plan() == []
+
+def test_discard_skips_pinned(index):
+    ret = Retention(index)
+    ret.pin(path(index, "a"))
+    assert ret.discard([path(index, "a"), path(index, "c")]) == [path(index, "c")]
+    assert os.path.exists(path(index, "a")) and not os.path.exists(path(index, "c"))
+
+def test_unknown_option(index):
+    with pytest.raises(ValueError):
+        Retention(index, max_files=3)
+
+def test_command_line_settings():
+    p = argparse.ArgumentParser(); add_retention_args(p)
+    assert retention_settings(p.parse_args([])) == {"max_bytes": None, "max_age": None, "archive_dir": None}
+    assert retention_settings(p.parse_args(["--max-gb", "0.5", "--max-days", "2"])) == \
+           {"max_bytes": 512 * 1024 ** 2, "max_age": 2 * DAY, "archive_dir": None}
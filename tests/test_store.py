@@ -0,0 +1,104 @@
+# tests/test_store.py — job journal: round trip, queue claims, orphans and reattaching (renderx.store)
+
+import os, socket
+
+import pytest
+
+from renderx.engine import LIVE_OWNERS, OK, ERROR, QUEUED, RUNNING, STARTING, CANCELLED, HIGH
+from renderx.errors import POLICY, TRANSIENT
+from renderx.store import JobStore
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore.in_folder(str(tmp_path))
+
+def test_round_trip(store, jobs):
+    [job] = jobs(1)
+    job.status = RUNNING; job.operation = "models/m/operations/x"; job.attempts = 2
+    store.save(job)
+    got = store.get(job.id)
+    assert (got.status, got.operation, got.params, got.attempts) == (RUNNING, job.operation, job.params, 2)
+
+def test_save_does_not_clear_a_cancel_request(store, jobs):
+    [job] = jobs(1)
+    job.owner = "h:1:e"; job.status = RUNNING; store.save(job)
+    assert store.cancel(job_ids=[job.id]) == 1
+    store.save(job)                                                                  # the engine's next journal write
+    assert [r["id"] for r in store.requests("h:1:e") if r["cancel"]] == [job.id]
+
+def test_claim_is_exclusive_and_fifo(store, jobs):
+    queued = jobs(2)
+    for j in queued: j.pool = "p"
+    store.enqueue(queued)
+    assert store.queued_users(["p"]) == [("", queued[0].priority)]
+    first = store.claim_next("", ["p"], "h:1:a"); second = store.claim_next("", ["p"], "h:1:b")
+    assert (first.id, second.id) == (queued[0].id, queued[1].id)
+    assert store.claim_next("", ["p"], "h:1:c") is None
+
+def test_orphans(store, jobs):
+    host = socket.gethostname()
+    owners = {"live": f"{host}:{os.getpid()}:live", "gone": f"{host}:{os.getpid()}:gone",
+              "other_pid": f"{host}:{os.getppid()}:x", "dead_pid": f"{host}:999999999:x"}
+    for owner, job in zip(owners.values(), jobs(4)):
+        job.owner = owner; job.status = RUNNING; store.save(job)
+    orphans = {j.owner for j in store.orphans({owners["live"]})}
+    assert orphans == {owners["gone"], owners["dead_pid"]}                           # the parent process is alive
+
+def test_adopt_is_compare_and_set(store, jobs):
+    [job] = jobs(1)
+    job.owner = "h:1:old"; job.status = RUNNING; store.save(job)
+    a, b = store.get(job.id), store.get(job.id)
+    assert store.adopt(a, "h:2:new") and not store.adopt(b, "h:3:late")
+
+def test_reattach_polls_the_existing_operation(mock, make_engine, jobs, store):
+    first = make_engine(store=store)
+    [job] = [first.submit(j) for j in jobs(1)]
+    for _ in range(100):
+        if job.operation: break
+        first.step(0.05)
+    first.close()                                                                    # "crash" while rendering
+    [orphan] = store.orphans(LIVE_OWNERS)
+    assert orphan.id == job.id and orphan.status == RUNNING and orphan.operation == job.operation
+    with make_engine(store=store) as second:
+        assert store.adopt(orphan, second.owner)
+        second.run([orphan])
+    assert store.get(job.id).status == OK and mock.stats["kickoff"] == 1
+
+def test_kickoff_without_operation_is_not_resent(make_engine, jobs, store):
+    [job] = jobs(1)
+    job.status = STARTING; job.owner = "h:1:gone"; store.save(job)
+    with make_engine(store=store) as e:
+        e.attach(store.get(job.id))
+    assert store.get(job.id).status == ERROR                                         # may have been billed already
+
+def test_release_puts_a_job_back_in_the_queue(store, jobs):
+    [job] = jobs(1)
+    job.owner = "h:1:gone"; job.status = STARTING; store.save(job)
+    store.release(job)
+    assert store.get(job.id).status == QUEUED and store.get(job.id).owner == ""
+
+def test_resubmit_requeues_only_retryable_failures(store, jobs):
+    transient, policy = jobs(2)
+    for job, cls in ((transient, TRANSIENT), (policy, POLICY)):
+        job.status = ERROR; job.error_class = cls; job.attempts = 3; job.operation = "models/m/operations/o"
+        store.save(job)
+    assert store.count_retryable() == 1 and store.count_retryable(batch_ids=[]) == 0
+    [again] = store.resubmit(owner="h:1:e")
+    row = store.get(again.id)
+    assert again.id == transient.id and (row.status, row.owner, row.attempts, row.error_class) == (QUEUED, "h:1:e", 0, "")
+    assert row.operation == transient.operation and store.get(policy.id).status == ERROR
+
+def test_pause_priority_and_cancel_of_queued_batches(store, jobs):
+    a, b = jobs(2)
+    a.batch_id, b.batch_id = "A", "B"
+    for j in (a, b): j.pool = "p"
+    store.enqueue([a, b])
+    assert store.pause(["A"]) == 1 and store.paused_batches(["A", "B"]) == {"A"}
+    assert store.claim_next("", ["p"], "h:1:e").id == b.id and store.claim_next("", ["p"], "h:1:e") is None
+    store.pause(["A"], paused=False)
+    assert store.set_priority(HIGH, batch_ids=["A"]) == 1 and store.get(a.id).priority == HIGH
+    assert [r["batch_id"] for r in store.active_batches()] == ["A", "B"]
+    assert store.cancel(batch_ids=["A", "B"]) == 2                                   # A unclaimed, B flagged for its engine
+    assert store.get(a.id).status == CANCELLED and store.get(b.id).status == QUEUED
+    assert [r["id"] for r in store.requests("h:1:e")] == [b.id]
+    assert [r["batch_id"] for r in store.active_batches()] == ["B"]